@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from django.contrib import admin
 from .models import StringRecord
+from .services import delete_records
 
 @admin.register(StringRecord)
 class StringRecordAdmin(admin.ModelAdmin):
@@ -9,3 +10,17 @@ class StringRecordAdmin(admin.ModelAdmin):
     search_fields = ('value',)
     list_filter = ('is_palindrome', 'word_count', 'created_at')
 
+    # Records are only written through the API: a saved form would skip the analysis,
+    # the StringCharacter rows and the counters that services keeps in step
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Deletes go through services too, which update the counters and invalidate the caches
+    def delete_model(self, request, obj):
+        delete_records([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        delete_records(list(queryset.values_list('pk', flat=True)))
@@ -0,0 +1,35 @@
+from django.urls import path
+from . import async_views
+from .metrics import metrics_view
+from .views import StringBulkCreateView, StringBatchView, DetailCacheStatsView, DedupStatsView, StringSimilarView
+
+# Used instead of analyzer.urls when ANALYZER_ASYNC_VIEWS is on; endpoints without
+# an async version keep their DRF views, which Django runs in a thread under ASGI.
+urlpatterns = [
+    # GET / POST /strings
+    path("strings", async_views.strings_list_create, name="strings_list_create"),
+
+    # POST /strings/bulk
+    path("strings/bulk", StringBulkCreateView.as_view(), name="strings_bulk_create"),
+
+    # POST (lookup) / DELETE /strings/batch
+    path("strings/batch", StringBatchView.as_view(), name="strings_batch"),
+
+    # GET /strings/filter-by-natural-language
+    path("strings/filter-by-natural-language", async_views.filter_by_natural_language, name="strings_filter_by_natural_language"),
+
+    # GET /strings/similar?value=...
+    path("strings/similar", StringSimilarView.as_view(), name="strings_similar"),
+
+    # GET /strings/cache/stats
+    path("strings/cache/stats", DetailCacheStatsView.as_view(), name="strings_cache_stats"),
+
+    # GET /strings/dedup/stats
+    path("strings/dedup/stats", DedupStatsView.as_view(), name="strings_dedup_stats"),
+
+    # GET /metrics (Prometheus text format)
+    path("metrics", metrics_view, name="metrics"),
+
+    # GET / DELETE /strings/{string_value}, after the literal paths (see analyzer/urls.py)
+    path("strings/<str:string_value>", async_views.string_detail, name="strings_detail"),
+]
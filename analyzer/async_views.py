@@ -0,0 +1,157 @@
+# analyzer/async_views.py
+"""
+Async versions of the create, list, detail and natural-language endpoints, for ASGI
+workers (enabled with ANALYZER_ASYNC_VIEWS). They answer with the same bodies and
+status codes as the DRF views in analyzer/views.py, but read through Django's async
+ORM so one worker can hold many concurrent keep-alive clients. Writes, which need a
+transaction, still run in services through sync_to_async.
+"""
+import hashlib
+from functools import partial
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from .cache import current_generation, get_detail_cache, get_nl_result_cache
+from .executor import ExecutorBusy, get_executor
+from .filters import QueryError, apply_filters, apply_plan, parse_list_filters
+from .ingest import BUSY, CONFLICT, check_value, insert_value, json_response as plain_json_response, read_value
+from .metrics import phase
+from .models import StringRecord
+from .nlquery import compile_query, describe_plan, normalize_query
+from .pagination import KEYSET_ORDERING, apaginate, parse_page_size
+from .renderers import NDJSON_CONTENT_TYPE, dumps, dumps_line
+from .serializers import StringRecordSerializer, output_timezone, row_values, serialize_row, serialize_rows
+from .services import delete_records, known_ids
+from .statistics import count_matching
+from .writer import get_writer
+
+NOT_FOUND = {"error": "String does not exist in the system"}
+
+
+# Encoded like DRF's JSONRenderer so bodies match the sync views byte for byte
+json_response = partial(plain_json_response, dumps=dumps)
+
+
+def wants_ndjson(request):
+    return request.GET.get("format") == "ndjson" or NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+@csrf_exempt
+async def strings_list_create(request):
+    if request.method == "POST":
+        return await create_string(request)
+    if request.method == "GET":
+        return await list_strings(request)
+    return HttpResponseNotAllowed(["GET", "POST"])
+
+
+async def create_string(request):
+    # The steps of analyzer.ingest.create_value, with analysis and storage awaited
+    with phase("parse"):
+        value = read_value(request)
+    invalid = check_value(value)
+    if invalid is not None:
+        return json_response(*invalid)
+
+    try:
+        props = (await sync_to_async(get_executor().analyze, thread_sensitive=False)([value]))[0]
+    except ExecutorBusy:
+        return json_response(*BUSY)
+    # The duplicate check queries, so it stays on the shared ORM thread, whose connection
+    # Django closes with the request's
+    if await sync_to_async(known_ids)([props["sha256_hash"]]):
+        return json_response(*CONFLICT)
+    # With write batching the insert only queues the record for the writer thread and
+    # waits; waiting off the shared ORM thread lets concurrent creates land in the same batch
+    return json_response(*await sync_to_async(insert_value, thread_sensitive=get_writer() is None)(value, props))
+
+
+async def list_strings(request):
+    params = request.GET
+    try:
+        filters = parse_list_filters(params)
+        rows = row_values(apply_filters(StringRecord.objects.all(), filters))
+
+        if wants_ndjson(request):
+            return StreamingHttpResponse(stream_rows(rows.order_by(*KEYSET_ORDERING)),
+                                         content_type=NDJSON_CONTENT_TYPE)
+
+        if "cursor" in params or "page_size" in params:
+            page, next_cursor = await apaginate(rows, params.get("cursor"),
+                                                parse_page_size(params.get("page_size")))
+            data = serialize_rows(page)
+            return json_response({
+                "data": data,
+                "count": len(data),
+                "total": await sync_to_async(count_matching)(rows, filters),
+                "next_cursor": next_cursor,
+                "filters_applied": filters,
+            })
+    except ValidationError as exc:
+        return json_response(exc.detail, status.HTTP_400_BAD_REQUEST)
+
+    data = serialize_rows([row async for row in rows])
+    return json_response({"data": data, "count": len(data), "filters_applied": filters})
+
+
+async def stream_rows(rows):
+    tz = output_timezone()
+    async for row in rows.aiterator(chunk_size=settings.ANALYZER_STREAM_CHUNK_SIZE):
+        yield dumps_line(serialize_row(row, tz))
+
+
+@csrf_exempt
+async def string_detail(request, string_value):
+    sha = hashlib.sha256(string_value.encode()).hexdigest()
+
+    if request.method == "GET":
+        async def render():
+            # length is implied by the id; it lets a length-partitioned table read one partition
+            record = await StringRecord.objects.filter(id=sha, length=len(string_value)).afirst()
+            return None if record is None else dumps(StringRecordSerializer(record).data)
+
+        body = await get_detail_cache().aget_or_load(sha, render)
+        if body is None:
+            return json_response(NOT_FOUND, status.HTTP_404_NOT_FOUND)
+        return HttpResponse(body, content_type="application/json")
+
+    if request.method == "DELETE":
+        if not await sync_to_async(delete_records)([sha]):
+            return json_response(NOT_FOUND, status.HTTP_404_NOT_FOUND)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    return HttpResponseNotAllowed(["GET", "DELETE"])
+
+
+async def filter_by_natural_language(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    query = request.GET.get("query", "")
+    if not query or not query.strip():
+        return json_response({"error": "Query is required"}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with phase("parse"):
+            plan = compile_query(normalize_query(query))
+    except QueryError as exc:
+        return json_response({"error": str(exc)}, status.HTTP_400_BAD_REQUEST)
+
+    if not plan:
+        return json_response({"error": "Query parsed but resulted in conflicting filters"},
+                             status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    async def run_query():
+        rows = row_values(apply_plan(StringRecord.objects.all(), plan))
+        return serialize_rows([row async for row in rows])
+
+    key = f"{await sync_to_async(current_generation)()}:{plan!r}"
+    data = await get_nl_result_cache().aget_or_load(key, run_query)
+    return json_response({
+        "data": data,
+        "count": len(data),
+        "interpreted_query": {"original": query, "parsed_filters": describe_plan(plan)},
+    })
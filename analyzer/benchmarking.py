@@ -0,0 +1,269 @@
+# analyzer/benchmarking.py
+"""Shared helpers and corpora for the bench_* management commands and analyzer/tests.py."""
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, urlencode, urlsplit
+from django.conf import settings
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import Resolver404, resolve
+from .models import StringRecord
+from .services import build_record, delete_records, store_records
+from .utils import analyze_batch
+
+# Every seeded value starts with this marker so benchmark rows can be removed again
+SEED_PREFIX = "bench:"
+
+WORDS = (
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa",
+)
+
+
+def synthetic_values(count: int, seed: int = 13, prefix: str = SEED_PREFIX):
+    """
+    Yield ``count`` distinct strings with a spread of lengths, word counts and
+    roughly 5% palindromes, deterministically for a given ``seed``.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < 0.05:
+            half = f"{prefix}{i}" + "".join(rng.choices("abcxyz", k=rng.randint(0, 40)))
+            yield half + half[::-1]
+        else:
+            words = rng.choices(WORDS, k=rng.randint(1, 12))
+            yield f"{prefix}{i} " + " ".join(words)
+
+
+ALPHABETS = {
+    "ascii": "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,!?",
+    "unicode": "aàâäéèêëîïôöùûüçÆæŒœßİıΣσςДдЖж你好世界🙂🎉 \t\n  ",
+}
+
+
+def random_corpus(count, length, rng):
+    """
+    ``count`` random strings of ``length`` characters: every fourth drawn from a Unicode
+    alphabet with whitespace and astral characters, every tenth a palindrome.
+    """
+    values = []
+    for i in range(count):
+        alphabet = ALPHABETS["unicode" if i % 4 == 0 else "ascii"]
+        value = "".join(rng.choices(alphabet, k=length))
+        if i % 10 == 0:
+            value = value[: length // 2] + value[: length // 2][::-1]
+        values.append(value)
+    return values
+
+
+LEVELS = ("INFO", "WARN", "ERROR", "DEBUG")
+
+
+def templated_corpus(count, body_length, templates, rng):
+    """
+    Messages built from ``templates`` fixed bodies of about ``body_length`` characters,
+    each followed by per-message fields, like log lines or notification texts.
+    """
+    bodies = []
+    for t in range(templates):
+        words = []
+        while sum(map(len, words)) + len(words) < body_length:
+            words.append(rng.choice(WORDS))
+        bodies.append(f"[{LEVELS[t % len(LEVELS)]}] template-{t} " + " ".join(words))
+    return [
+        f"{rng.choice(bodies)} user={rng.randint(1, 10 ** 6)} took={rng.random() * 100:.2f}ms seq={i}"
+        for i in range(count)
+    ]
+
+
+def seed_records(count: int, seed: int = 13, batch_size: int = 5000, progress=None) -> int:
+    """Insert ``count`` synthetic records through services; returns how many rows were written."""
+    written = 0
+    batch = []
+    for value in synthetic_values(count, seed):
+        batch.append(value)
+        if len(batch) >= batch_size:
+            written += _insert(batch)
+            batch = []
+            if progress:
+                progress(written)
+    if batch:
+        written += _insert(batch)
+    return written
+
+
+def _insert(values):
+    records = [build_record(value, props) for value, props in zip(values, analyze_batch(values))]
+    return len(store_records(records))
+
+
+def clear_seeded() -> int:
+    ids = StringRecord.objects.filter(value__startswith=SEED_PREFIX).values_list("id", flat=True)
+    return len(delete_records(list(ids)))
+
+
+_test_environment_ready = False
+
+
+def api_client() -> Client:
+    """A test client that runs requests through the full middleware stack in-process."""
+    global _test_environment_ready
+    if not _test_environment_ready:
+        setup_test_environment()  # lets the client's "testserver" host through ALLOWED_HOSTS
+        _test_environment_ready = True
+    return Client()
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples_ms) -> dict:
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+def time_call(func, iterations: int, warmup: int = 1) -> list:
+    """Run ``func`` and return per-call latencies in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# Request mix for bench_endpoints: endpoint -> weight
+DEFAULT_MIX = {"detail": 50, "list": 25, "nl": 15, "create": 10}
+
+LIST_QUERIES = (
+    {"page_size": 20},
+    {"page_size": 20, "is_palindrome": "true"},
+    {"page_size": 50, "min_length": 30, "max_length": 80},
+    {"page_size": 20, "word_count": 1},
+    {"page_size": 20, "contains_character": "z"},
+)
+
+NL_QUERIES = (
+    "all single word palindromic strings",
+    "strings longer than 60 characters",
+    "palindromic strings containing the letter a",
+    "strings longer than 20 and shorter than 40",
+)
+
+
+def parse_mix(text: str) -> dict:
+    """``"detail=50,list=25"`` -> {"detail": 50, "list": 25}."""
+    mix = {}
+    for part in filter(None, text.split(",")):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"unknown endpoint {name.strip()!r}; expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def synthetic_traffic(count: int, rows: int, mix=None, seed: int = 13, misses: float = 0.05, duplicates: float = 0.3):
+    """
+    ``count`` request dicts (method, path, body) drawn from ``mix``. Detail lookups
+    and duplicate creates target the values ``seed_records(rows, seed)`` writes, so a
+    given seed always produces the same requests against the same data.
+    """
+    rng = random.Random(seed)
+    values = list(synthetic_values(rows, seed))
+    names, weights = zip(*(mix or DEFAULT_MIX).items())
+    traffic = []
+    for i in range(count):
+        name = rng.choices(names, weights)[0]
+        if name == "detail":
+            value = f"{SEED_PREFIX}missing {i}" if rng.random() < misses else rng.choice(values)
+            traffic.append({"method": "GET", "path": f"/strings/{quote(value, safe='')}", "body": None})
+        elif name == "list":
+            traffic.append({"method": "GET", "path": f"/strings?{urlencode(rng.choice(LIST_QUERIES))}", "body": None})
+        elif name == "nl":
+            query = urlencode({"query": rng.choice(NL_QUERIES)})
+            traffic.append({"method": "GET", "path": f"/strings/filter-by-natural-language?{query}", "body": None})
+        else:
+            value = rng.choice(values) if rng.random() < duplicates else f"{SEED_PREFIX}new {seed} {i}"
+            traffic.append({"method": "POST", "path": "/strings", "body": {"value": value}})
+    return traffic
+
+
+def load_traffic(path: str) -> list:
+    """Read recorded traffic: one JSON object per line with method, path and optional body."""
+    traffic = []
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "method" not in entry or "path" not in entry:
+                raise ValueError(f"{path}:{number}: each line needs \"method\" and \"path\"")
+            traffic.append({"method": entry["method"].upper(), "path": entry["path"], "body": entry.get("body")})
+    return traffic
+
+
+def save_traffic(traffic, path: str):
+    with open(path, "w", encoding="utf-8") as handle:
+        for entry in traffic:
+            handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """Group requests by method and URL name, e.g. "GET strings_detail"."""
+    try:
+        return f"{method} {resolve(urlsplit(path).path).url_name}"
+    except Resolver404:
+        return f"{method} unmatched"
+
+
+def wait_for_port(port, timeout=30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+@contextmanager
+def gunicorn_server(port, env=None, workers=1, threads=1):
+    """
+    Run ``gunicorn string_analyzer.wsgi`` on 127.0.0.1:``port`` with ``env`` added to
+    this process's environment; yields the base URL once it accepts connections.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "string_analyzer.wsgi", "-w", str(workers), "--threads", str(threads),
+         "-b", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_port(port):
+            raise RuntimeError(f"gunicorn did not start on port {port}")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
@@ -0,0 +1,215 @@
+# analyzer/cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LocalLRUBackend:
+    """In-process LRU map with an optional TTL (seconds, 0 = never expire)."""
+
+    def __init__(self, max_entries=10000, ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """Stores entries in one of Django's CACHES, which then owns eviction."""
+
+    evictions = None  # not reported by Django's cache API
+
+    def __init__(self, alias="default", ttl=0, prefix="analyzer:detail:"):
+        self.cache = caches[alias]
+        self.ttl = ttl or None
+        self.prefix = prefix
+
+    def _key(self, key):
+        # Keys such as natural-language plans hold spaces and can be long; memcached
+        # accepts neither, so every backend gets a fixed-length digest
+        return self.prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, value):
+        self.cache.set(self._key(key), value, timeout=self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    def clear(self):
+        self.cache.clear()
+
+    def size(self):
+        return None
+
+
+class NullBackend:
+    evictions = 0
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def size(self):
+        return 0
+
+
+class ReadThroughCache:
+    """Serves cached values and fills misses from a loader, counting hits and misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    async def aget_or_load(self, key, loader):
+        """get_or_load() with an async ``loader``; backend calls stay synchronous (in-memory or fast cache ops)."""
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        self.invalidations += 1
+        self.backend.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+            "size": self.backend.size(),
+        }
+
+
+def build_backend(name, max_entries, ttl, alias, prefix="analyzer:detail:"):
+    if name == "local":
+        return LocalLRUBackend(max_entries=max_entries, ttl=ttl)
+    if name == "django":
+        return DjangoCacheBackend(alias=alias, ttl=ttl, prefix=prefix)
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown cache backend {name!r} (expected local, django or none)")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _named_cache(name) -> ReadThroughCache:
+    prefix = f"ANALYZER_{name.upper()}_CACHE_"
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = ReadThroughCache(build_backend(
+                getattr(settings, prefix + "BACKEND"),
+                getattr(settings, prefix + "MAX_ENTRIES"),
+                getattr(settings, prefix + "TTL"),
+                getattr(settings, prefix + "ALIAS"),
+                prefix=f"analyzer:{name}:",
+            ))
+        return _caches[name]
+
+
+def reset_caches():
+    """Drop the configured caches so the next lookup rebuilds them from settings."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def get_detail_cache() -> ReadThroughCache:
+    """Cache of serialized GET /strings/<value> bodies, keyed by the record's SHA-256."""
+    return _named_cache("detail")
+
+
+def get_nl_result_cache() -> ReadThroughCache:
+    """Cache of natural-language filter results, keyed by data generation and parsed filters."""
+    return _named_cache("nl")
+
+
+# Generation counter bumped whenever StringRecord rows are created or deleted.
+# Result caches put it in their keys, so a bump makes every older entry unreachable.
+# It lives in Django's cache so workers sharing a cache backend see each other's bumps.
+# If the key is ever evicted it restarts from the clock, never from an old value.
+GENERATION_KEY = "analyzer:generation"
+
+
+def current_generation() -> int:
+    return caches[settings.ANALYZER_GENERATION_CACHE_ALIAS].get_or_set(
+        GENERATION_KEY, time.time_ns, timeout=None
+    )
+
+
+def bump_generation():
+    cache = caches[settings.ANALYZER_GENERATION_CACHE_ALIAS]
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,143 @@
+# analyzer/dedup.py
+import math
+import threading
+from django.conf import settings
+from django.db import connections
+
+
+class BloomFilter:
+    """
+    Set-membership filter over sha256 hex ids with no false negatives and a false-
+    positive rate of about ``error_rate`` up to ``capacity`` items. The ids are
+    already uniform hashes, so the bit positions come straight from their digits
+    (double hashing on two 64-bit slices) instead of hashing again.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, sha: str):
+        first, second = int(sha[:16], 16), int(sha[16:32], 16) | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, sha: str):
+        bits = self._bits
+        for position in self._positions(sha):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, sha: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(sha))
+
+    def estimated_error_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class KnownHashes:
+    """
+    Bloom filter of the StringRecord ids this process has loaded or inserted.
+    ``maybe_exists`` is False only for ids it has never seen, so create can insert
+    without a lookup; the primary key still rejects rows other workers stored. Until
+    the background warm-up from StringRecord.id finishes every id answers "maybe",
+    which falls back to the primary-key check. Deleted ids stay in the filter and
+    show up as false positives.
+    """
+
+    def __init__(self, capacity, error_rate, warm_chunk_size=20000):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.warm_chunk_size = warm_chunk_size
+        self.ready = False
+        self.checks = 0
+        self.skipped = 0          # negatives: no lookup needed
+        self.false_positives = 0  # positives the primary-key lookup did not confirm
+        self._warm_thread = None
+        self._lock = threading.Lock()
+
+    def warm(self):
+        from .models import StringRecord
+        try:
+            ids = StringRecord.objects.values_list("id", flat=True).iterator(chunk_size=self.warm_chunk_size)
+            for sha in ids:
+                self.add(sha)
+            self.ready = True
+        finally:
+            connections.close_all()  # this thread's connections
+
+    def start_warming(self):
+        with self._lock:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self.warm, name="analyzer-bloom-warm", daemon=True)
+                self._warm_thread.start()
+        return self._warm_thread
+
+    def add(self, sha: str):
+        with self._lock:
+            self.bloom.add(sha)
+
+    def maybe_exists(self, sha: str) -> bool:
+        self.checks += 1
+        if self.ready and sha not in self.bloom:
+            self.skipped += 1
+            return False
+        return True
+
+    def record_false_positives(self, count):
+        self.false_positives += count
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "ready": self.ready,
+            "items": self.bloom.count,
+            "capacity": self.bloom.capacity,
+            "target_error_rate": self.bloom.error_rate,
+            "estimated_error_rate": round(self.bloom.estimated_error_rate(), 6),
+            "bits": self.bloom.size,
+            "hashes": self.bloom.hashes,
+            "memory_bytes": self.bloom.memory_bytes(),
+            "checks": self.checks,
+            "skipped_lookups": self.skipped,
+            "false_positives": self.false_positives,
+        }
+
+
+_known_hashes = None
+_known_hashes_lock = threading.Lock()
+
+
+def get_known_hashes():
+    """
+    This process's KnownHashes, warming in the background on first use; None when
+    ANALYZER_BLOOM_CAPACITY is 0, in which case every create does the primary-key check.
+    """
+    global _known_hashes
+    if not settings.ANALYZER_BLOOM_CAPACITY:
+        return None
+    with _known_hashes_lock:
+        if _known_hashes is None:
+            _known_hashes = KnownHashes(settings.ANALYZER_BLOOM_CAPACITY, settings.ANALYZER_BLOOM_ERROR_RATE)
+            _known_hashes.start_warming()
+        return _known_hashes
+
+
+def reset_known_hashes():
+    global _known_hashes
+    with _known_hashes_lock:
+        _known_hashes = None
+
+
+def remember(ids):
+    """Add freshly inserted ids to this process's filter, if one is in use."""
+    known = _known_hashes
+    if known is not None:
+        for sha in ids:
+            known.add(sha)
@@ -0,0 +1,119 @@
+# analyzer/executor.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from .metrics import timed
+from .utils import PrefixCache, analyze_batch, init_worker_prefix_cache
+
+MODES = ("inline", "thread", "process")
+
+
+class ExecutorBusy(Exception):
+    """Raised when the analysis queue stays full for longer than the queue timeout."""
+
+
+class AnalysisExecutor:
+    """
+    Runs analyze_batch either inline in the request worker or on a thread/process pool.
+    Batches whose total character count is below ``threshold`` always run inline.
+    At most ``max_pending`` chunks may be queued on the pool at once; callers block
+    for up to ``queue_timeout`` seconds for a free slot, then get ExecutorBusy.
+    With ``prefix_cache_entries`` set, analysis goes through a PrefixCache: one shared
+    by the inline path and thread pool, or one per worker in process mode.
+    """
+
+    def __init__(self, mode="inline", workers=None, threshold=0, chunk_size=500,
+                 max_pending=64, queue_timeout=5.0, prefix_cache_entries=0, prefix_stride=64):
+        if mode not in MODES:
+            raise ValueError(f"executor mode must be one of {', '.join(MODES)}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.queue_timeout = queue_timeout
+        self.prefix_cache_entries = prefix_cache_entries
+        self.prefix_stride = prefix_stride
+        self.prefix_cache = PrefixCache(prefix_cache_entries, prefix_stride) if prefix_cache_entries else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    # spawn: forking a threaded gunicorn worker can copy held locks
+                    initializer, initargs = None, ()
+                    if self.prefix_cache_entries:
+                        initializer = init_worker_prefix_cache
+                        initargs = (self.prefix_cache_entries, self.prefix_stride)
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                        initializer=initializer, initargs=initargs,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analyzer")
+            return self._pool
+
+    @timed("analyze")
+    def analyze(self, values) -> list:
+        values = list(values)
+        if self.mode == "inline" or sum(map(len, values)) < self.threshold:
+            return analyze_batch(values, self.prefix_cache)
+
+        pool = self._get_pool()
+        futures = []
+        try:
+            for start in range(0, len(values), self.chunk_size):
+                if not self._slots.acquire(timeout=self.queue_timeout):
+                    raise ExecutorBusy("analysis queue is full")
+                try:
+                    chunk = values[start:start + self.chunk_size]
+                    if self.mode == "process":
+                        future = pool.submit(analyze_batch, chunk)  # the worker's own cache
+                    else:
+                        future = pool.submit(analyze_batch, chunk, self.prefix_cache)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append(future)
+        except ExecutorBusy:
+            for future in futures:
+                future.cancel()
+            raise
+
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AnalysisExecutor:
+    """The process-wide executor configured by the ANALYZER_EXECUTOR_* settings."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = AnalysisExecutor(
+                mode=settings.ANALYZER_EXECUTOR_MODE,
+                workers=settings.ANALYZER_EXECUTOR_WORKERS,
+                threshold=settings.ANALYZER_EXECUTOR_THRESHOLD,
+                chunk_size=settings.ANALYZER_EXECUTOR_CHUNK_SIZE,
+                max_pending=settings.ANALYZER_EXECUTOR_MAX_PENDING,
+                queue_timeout=settings.ANALYZER_EXECUTOR_QUEUE_TIMEOUT,
+                prefix_cache_entries=settings.ANALYZER_PREFIX_CACHE_ENTRIES,
+                prefix_stride=settings.ANALYZER_PREFIX_CACHE_STRIDE,
+            )
+        return _executor
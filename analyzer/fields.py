@@ -0,0 +1,123 @@
+# analyzer/fields.py
+import sys
+from array import array
+from base64 import b64encode
+from collections.abc import Mapping
+from django.db import models
+
+# Blob layout: two header bytes giving the item width (1, 2 or 4 bytes) of the code
+# point and count arrays, then the code points, then the counts, both little-endian
+# and in the map's own key order (first occurrence in the string).
+_TYPECODES = {1: "B", 2: "H", 4: "I"}
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _width(largest: int) -> int:
+    if largest < 0x100:
+        return 1
+    if largest < 0x10000:
+        return 2
+    return 4
+
+
+def _pack(items, width: int) -> bytes:
+    packed = array(_TYPECODES[width], items)
+    if _BIG_ENDIAN and width > 1:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(blob: bytes, width: int) -> list:
+    unpacked = array(_TYPECODES[width])
+    unpacked.frombytes(blob)
+    if _BIG_ENDIAN and width > 1:
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def encode_frequency_map(frequency_map) -> bytes:
+    if isinstance(frequency_map, FrequencyMap):
+        return frequency_map.blob
+    codes = [ord(ch) for ch in frequency_map]
+    counts = list(frequency_map.values())
+    code_width = _width(max(codes, default=0))
+    count_width = _width(max(counts, default=0))
+    return bytes((code_width, count_width)) + _pack(codes, code_width) + _pack(counts, count_width)
+
+
+def decode_frequency_map(blob: bytes) -> dict:
+    code_width, count_width = blob[0], blob[1]
+    size = (len(blob) - 2) // (code_width + count_width)
+    split = 2 + size * code_width
+    if code_width == 1:
+        keys = blob[2:split].decode("latin-1")
+    else:
+        keys = map(chr, _unpack(blob[2:split], code_width))
+    return dict(zip(keys, _unpack(blob[split:], count_width)))
+
+
+class FrequencyMap(Mapping):
+    """
+    Read-only view of a stored character_frequency_map. The blob is only decoded
+    on first access, so rows that are loaded but never rendered cost nothing extra.
+    """
+    __slots__ = ("blob", "_decoded")
+
+    def __init__(self, blob):
+        self.blob = bytes(blob)
+        self._decoded = None
+
+    def _map(self) -> dict:
+        if self._decoded is None:
+            self._decoded = decode_frequency_map(self.blob)
+        return self._decoded
+
+    def __getitem__(self, key):
+        return self._map()[key]
+
+    def __iter__(self):
+        return iter(self._map())
+
+    def __len__(self):
+        return len(self._map())
+
+    def __eq__(self, other):
+        if isinstance(other, FrequencyMap):
+            return self.blob == other.blob
+        return self._map() == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (FrequencyMap, (self.blob,))
+
+    def __repr__(self):
+        return f"FrequencyMap({self._map()!r})"
+
+    def to_dict(self) -> dict:
+        return dict(self._map())
+
+
+class FrequencyMapField(models.BinaryField):
+    """Stores a {character: count} map in the compact layout described above."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return FrequencyMap(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Mapping):
+            return value
+        return FrequencyMap(super().to_python(value))
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        if isinstance(value, Mapping):
+            return encode_frequency_map(value)
+        return super().get_prep_value(value)
+
+    def value_to_string(self, obj):
+        # serializers (dumpdata) get base64, like BinaryField
+        return b64encode(self.get_prep_value(self.value_from_object(obj))).decode("ascii")
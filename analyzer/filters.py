@@ -0,0 +1,364 @@
+# analyzer/filters.py
+"""
+Filters shared by GET /strings and the natural-language endpoint. Both build the same
+filter tree (Range, Flag, Contains, Not, All, AnyOf), and compile_filters() flattens it
+into a plan: a tuple of Conjunction branches, OR-ed together, each with the constraints
+on a column merged into one. Contradictory branches are dropped there, so an empty plan
+is known to match nothing before any query is sent.
+"""
+from functools import reduce
+from operator import or_
+from typing import NamedTuple, Optional
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+from .metrics import timed
+from .models import MAX_VALUE_LENGTH, StringCharacter
+
+# Clause order used by conjunction_clauses(): the most selective indexed predicate first.
+# word_count equality and palindrome=True are served by the composite/partial indexes
+# on StringRecord, a bare length range by strrec_length_idx, and is_palindrome=False
+# matches most rows, so it is left to be checked last against already-narrowed rows.
+CLAUSE_RANK = {
+    "word_count": 0,
+    "is_palindrome=true": 1,
+    "length": 2,
+    "word_count_range": 3,
+    "is_palindrome=false": 4,
+    "contains_character": 5,
+}
+
+# Smallest length and word count of a stored string: empty and blank values are rejected
+MIN_LENGTH = 1
+MIN_WORD_COUNT = 1
+# Largest: longer values are rejected, and n words take at least 2n - 1 characters
+MAX_LENGTH = MAX_VALUE_LENGTH
+MAX_WORD_COUNT = (MAX_VALUE_LENGTH + 1) // 2
+
+# Most OR-ed branches a filter may expand to; "(a or b) and (c or d)" is 4
+MAX_BRANCHES = 16
+
+
+@timed("parse")
+def parse_list_filters(params) -> dict:
+    """Validate GET /strings query parameters into a filters_applied dict."""
+    filters = {}
+    try:
+        if "is_palindrome" in params:
+            v = params.get("is_palindrome").lower()
+            if v not in ("true", "false"):
+                raise ValidationError("is_palindrome must be 'true' or 'false'")
+            filters["is_palindrome"] = (v == "true")
+
+        if "min_length" in params:
+            filters["min_length"] = int(params.get("min_length"))
+
+        if "max_length" in params:
+            filters["max_length"] = int(params.get("max_length"))
+
+        if "word_count" in params:
+            filters["word_count"] = int(params.get("word_count"))
+
+        if "contains_character" in params:
+            # repeat the parameter to require several characters at once
+            chars = params.getlist("contains_character")
+            if any(len(char) != 1 for char in chars):
+                raise ValidationError("contains_character must be a single character")
+            filters["contains_character"] = chars[0] if len(chars) == 1 else chars
+    except ValueError:
+        raise ValidationError("Invalid query parameter values or types")
+    return filters
+
+
+def parse_similar_params(params) -> dict:
+    """Validate GET /strings/similar query parameters."""
+    value = params.get("value", "")
+    if not value.strip():
+        raise ValidationError("value is required")
+    try:
+        max_distance = int(params.get("max_distance", 2))
+        limit = int(params.get("limit", 20))
+    except ValueError:
+        raise ValidationError("max_distance and limit must be integers")
+    if not 0 <= max_distance <= settings.ANALYZER_SIMILAR_MAX_DISTANCE:
+        raise ValidationError(f"max_distance must be between 0 and {settings.ANALYZER_SIMILAR_MAX_DISTANCE}")
+    if not 1 <= limit <= settings.ANALYZER_SIMILAR_MAX_LIMIT:
+        raise ValidationError(f"limit must be between 1 and {settings.ANALYZER_SIMILAR_MAX_LIMIT}")
+    return {"value": value, "max_distance": max_distance, "limit": limit}
+
+
+def filter_contains_characters(queryset, characters):
+    """
+    Keep records containing every character in ``characters`` (case-insensitive).
+    Each character adds one join on the StringCharacter (character, record) index,
+    so the cost follows the number of matching records rather than the table size.
+    """
+    for character in characters:
+        queryset = queryset.filter(characters__character=StringCharacter.fold(character))
+    return queryset
+
+
+class QueryError(ValueError):
+    """A filter that cannot be compiled; the message is returned to the client."""
+
+
+# Filter tree nodes. Leaves test one column (Range, Flag) or one case-folded character
+# (Contains); Not, All and AnyOf combine them.
+class Range(NamedTuple):
+    field: str  # "length" or "word_count"
+    low: Optional[int]  # inclusive; None = unbounded
+    high: Optional[int]
+
+
+class Flag(NamedTuple):
+    field: str  # "is_palindrome"
+    value: bool
+
+
+class Contains(NamedTuple):
+    character: str
+
+
+class Not(NamedTuple):
+    node: tuple
+
+
+class All(NamedTuple):
+    nodes: tuple
+
+
+class AnyOf(NamedTuple):
+    nodes: tuple
+
+
+class Conjunction(NamedTuple):
+    """One branch of a plan: the AND of every constraint it carries."""
+    is_palindrome: Optional[bool] = None
+    length: tuple = (None, None)
+    word_count: tuple = (None, None)
+    contains: tuple = ()  # case-folded characters every match contains
+    excludes: tuple = ()  # case-folded characters no match contains
+
+    def as_filters(self) -> dict:
+        """The branch in filters_applied form, as GET /strings reports its filters."""
+        filters = {}
+        if self.is_palindrome is not None:
+            filters["is_palindrome"] = self.is_palindrome
+        low, high = self.word_count
+        if low is not None and low == high:
+            filters["word_count"] = low
+        else:
+            if low is not None:
+                filters["min_word_count"] = low
+            if high is not None:
+                filters["max_word_count"] = high
+        low, high = self.length
+        if low is not None:
+            filters["min_length"] = low
+        if high is not None:
+            filters["max_length"] = high
+        for key, characters in (("contains_character", self.contains), ("excludes_character", self.excludes)):
+            if characters:
+                filters[key] = characters[0] if len(characters) == 1 else characters
+        return filters
+
+
+def filters_node(filters: dict):
+    """The filter tree of a filters_applied dict (GET /strings): every filter AND-ed."""
+    nodes = []
+    if "is_palindrome" in filters:
+        nodes.append(Flag("is_palindrome", filters["is_palindrome"]))
+    if "word_count" in filters:
+        nodes.append(Range("word_count", filters["word_count"], filters["word_count"]))
+    if "min_length" in filters or "max_length" in filters:
+        nodes.append(Range("length", filters.get("min_length"), filters.get("max_length")))
+    chars = filters.get("contains_character")
+    if chars:
+        nodes.extend(Contains(StringCharacter.fold(char)) for char in ([chars] if isinstance(chars, str) else chars))
+    return All(tuple(nodes))
+
+
+def _negate(node):
+    """``node`` negated, with the negation pushed down to the leaves."""
+    if isinstance(node, Range):
+        # lengths and word counts are integers, so the complement is two closed ranges
+        parts = []
+        if node.low is not None:
+            parts.append(Range(node.field, None, node.low - 1))
+        if node.high is not None:
+            parts.append(Range(node.field, node.high + 1, None))
+        return AnyOf(tuple(parts))
+    if isinstance(node, Flag):
+        return Flag(node.field, not node.value)
+    if isinstance(node, Contains):
+        return Not(node)
+    if isinstance(node, Not):
+        return node.node
+    if isinstance(node, All):
+        return AnyOf(tuple(_negate(child) for child in node.nodes))
+    return All(tuple(_negate(child) for child in node.nodes))
+
+
+def _branches(node) -> list:
+    """``node`` in disjunctive normal form: a list of branches, each a list of leaves."""
+    if isinstance(node, Not) and not isinstance(node.node, Contains):
+        return _branches(_negate(node.node))
+    if isinstance(node, AnyOf):
+        return [branch for child in node.nodes for branch in _branches(child)]
+    if isinstance(node, All):
+        branches = [[]]
+        for child in node.nodes:
+            branches = [left + right for left in branches for right in _branches(child)]
+            if len(branches) > MAX_BRANCHES:
+                raise QueryError(f"Query expands to more than {MAX_BRANCHES} alternatives")
+        return branches
+    return [[node]]
+
+
+def _effective(bounds, floor, ceiling) -> tuple:
+    low, high = bounds
+    return max(floor, low if low is not None else floor), min(ceiling, high if high is not None else ceiling)
+
+
+def _merge(leaves):
+    """The Conjunction of ``leaves``, or None when they contradict each other."""
+    fields = {"length": (None, None), "word_count": (None, None)}
+    is_palindrome = None
+    contains, excludes = [], []
+    for leaf in leaves:
+        if isinstance(leaf, Range):
+            low, high = fields[leaf.field]
+            if leaf.low is not None:
+                low = leaf.low if low is None else max(low, leaf.low)
+            if leaf.high is not None:
+                high = leaf.high if high is None else min(high, leaf.high)
+            fields[leaf.field] = (low, high)
+        elif isinstance(leaf, Flag):
+            if is_palindrome is not None and is_palindrome != leaf.value:
+                return None
+            is_palindrome = leaf.value
+        elif isinstance(leaf, Contains):
+            if leaf.character not in contains:
+                contains.append(leaf.character)
+        elif leaf.node.character not in excludes:
+            excludes.append(leaf.node.character)
+
+    if set(contains) & set(excludes):
+        return None
+    length_low, length_high = _effective(fields["length"], MIN_LENGTH, MAX_LENGTH)
+    words_low, words_high = _effective(fields["word_count"], MIN_WORD_COUNT, MAX_WORD_COUNT)
+    # n words take at least 2n - 1 characters, and each required character one
+    if length_high < max(length_low, 2 * words_low - 1, len(contains)):
+        return None
+    if words_high < words_low:
+        return None
+    return Conjunction(is_palindrome, fields["length"], fields["word_count"], tuple(contains), tuple(excludes))
+
+
+def _implies(narrow: Conjunction, broad: Conjunction) -> bool:
+    """Whether every row matching ``narrow`` also matches ``broad``."""
+    if broad.is_palindrome is not None and broad.is_palindrome != narrow.is_palindrome:
+        return False
+    for field, floor, ceiling in (("length", MIN_LENGTH, MAX_LENGTH),
+                                  ("word_count", MIN_WORD_COUNT, MAX_WORD_COUNT)):
+        narrow_low, narrow_high = _effective(getattr(narrow, field), floor, ceiling)
+        broad_low, broad_high = _effective(getattr(broad, field), floor, ceiling)
+        if narrow_low < broad_low or narrow_high > broad_high:
+            return False
+    return set(broad.contains) <= set(narrow.contains) and set(broad.excludes) <= set(narrow.excludes)
+
+
+def compile_filters(node) -> tuple:
+    """
+    Compile a filter tree into a plan: its satisfiable branches, without those another
+    branch already covers, in a canonical order (so equivalent filters share a cache
+    key). An empty plan matches nothing.
+    """
+    branches = []
+    for leaves in _branches(node):
+        conjunction = _merge(leaves)
+        if conjunction is not None and conjunction not in branches:
+            branches.append(conjunction)
+    kept = [
+        branch for i, branch in enumerate(branches)
+        if not any(_implies(branch, other) and (not _implies(other, branch) or j < i)
+                   for j, other in enumerate(branches) if j != i)
+    ]
+    return tuple(sorted(kept, key=repr))
+
+
+def plan_filters(filters: dict) -> tuple:
+    """The plan of a filters_applied dict: one branch, or none when it can never match."""
+    return compile_filters(filters_node(filters))
+
+
+def _range_q(field, low, high) -> Q:
+    if low is not None and high is not None:
+        return Q(**{f"{field}__range": (low, high)})
+    if low is not None:
+        return Q(**{f"{field}__gte": low})
+    return Q(**{f"{field}__lte": high})
+
+
+def conjunction_clauses(conjunction: Conjunction) -> list:
+    """The column predicates of a branch as (clause, Q) pairs, most selective first."""
+    clauses = []
+    low, high = conjunction.word_count
+    if low is not None and low == high:
+        clauses.append(("word_count", Q(word_count=low)))
+    elif low is not None or high is not None:
+        clauses.append(("word_count_range", _range_q("word_count", low, high)))
+    if conjunction.is_palindrome is not None:
+        flag = conjunction.is_palindrome
+        clauses.append((f"is_palindrome={str(flag).lower()}", Q(is_palindrome=flag)))
+    low, high = conjunction.length
+    if low is not None or high is not None:
+        clauses.append(("length", _range_q("length", low, high)))
+
+    clauses.sort(key=lambda clause: CLAUSE_RANK[clause[0]])
+    return clauses
+
+
+def _has_character(character) -> Exists:
+    return Exists(StringCharacter.objects.filter(record=OuterRef("pk"), character=character))
+
+
+def apply_plan(queryset, plan: tuple):
+    if not plan:
+        return queryset.none()
+
+    if len(plan) == 1:
+        conjunction = plan[0]
+        for _, clause in conjunction_clauses(conjunction):
+            queryset = queryset.filter(clause)
+        if conjunction.contains:
+            queryset = filter_contains_characters(queryset, conjunction.contains)
+        for character in conjunction.excludes:
+            queryset = queryset.filter(~_has_character(character))
+        return queryset
+
+    # Column predicates common to every branch are applied outside the OR, where an
+    # index can narrow the rows before the branches are tested
+    clause_lists = [conjunction_clauses(conjunction) for conjunction in plan]
+    shared = [clause for clause in clause_lists[0] if all(clause in other for other in clause_lists[1:])]
+    for _, clause in shared:
+        queryset = queryset.filter(clause)
+
+    # OR-ed branches cannot share joins: each required character becomes an EXISTS
+    # probe of the (character, record) index instead
+    branches = []
+    for conjunction, clauses in zip(plan, clause_lists):
+        condition = Q()
+        for clause in clauses:
+            if clause not in shared:
+                condition &= clause[1]
+        for character in conjunction.contains:
+            condition &= Q(_has_character(character))
+        for character in conjunction.excludes:
+            condition &= ~Q(_has_character(character))
+        branches.append(condition)
+    return queryset.filter(reduce(or_, branches))
+
+
+def apply_filters(queryset, filters: dict):
+    return apply_plan(queryset, plan_filters(filters))
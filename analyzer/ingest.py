@@ -0,0 +1,116 @@
+# analyzer/ingest.py
+"""
+The POST /strings create flow: validation, analysis, the duplicate check, the insert and
+the response body, shared by StringListCreateView.create, the async view and
+ingest_string, the plain Django view below. It only imports the write path (executor,
+services), so a worker serving the ingest-only urlconf (ANALYZER_INGEST_ONLY) starts
+without loading rest_framework or drf_yasg.
+"""
+import json
+from http import HTTPStatus
+from typing import NamedTuple, Optional
+from django.db import IntegrityError
+from django.http import HttpResponse, QueryDict
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .executor import ExecutorBusy, get_executor
+from .metrics import phase
+from .models import MAX_VALUE_LENGTH, VALUE_TOO_LONG
+from .services import create_record, known_ids
+from .writer import WriterBusy, write_behind
+
+
+class Outcome(NamedTuple):
+    """Body, status and extra headers of a create response, for each view to render."""
+    data: dict
+    status: int
+    headers: Optional[dict] = None
+
+
+BUSY = Outcome({"error": "Server is busy analyzing other requests, retry shortly"},
+               HTTPStatus.SERVICE_UNAVAILABLE, {"Retry-After": "1"})
+CONFLICT = Outcome({"error": "String already exists in the system"}, HTTPStatus.CONFLICT)
+
+
+def encode(data) -> bytes:
+    # Same bytes as DRF's JSONRenderer for the str/int/bool/dict bodies sent here
+    text = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def json_response(data, status_code=HTTPStatus.OK, headers=None, dumps=encode):
+    return HttpResponse(dumps(data), content_type="application/json", status=status_code, headers=headers)
+
+
+def value_from(payload):
+    return payload.get("value", None) if hasattr(payload, "get") else None
+
+
+def read_value(request):
+    """The 'value' of a JSON or form-encoded body read without DRF's parsers, or None."""
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    else:
+        payload = QueryDict(request.body, encoding=request.encoding)
+    return value_from(payload)
+
+
+def check_value(value) -> Optional[Outcome]:
+    """The error response for a value that cannot be created, or None."""
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        return Outcome({"error": "Invalid request body or missing 'value' field"}, HTTPStatus.BAD_REQUEST)
+    if not isinstance(value, str):
+        return Outcome({"error": "Invalid data type for 'value' (must be string)"},
+                       HTTPStatus.UNPROCESSABLE_ENTITY)
+    if len(value) > MAX_VALUE_LENGTH:
+        # Rejected before analysis, and before a write-behind create would be acknowledged
+        return Outcome({"error": VALUE_TOO_LONG}, HTTPStatus.UNPROCESSABLE_ENTITY)
+    return None
+
+
+def store_value(value: str, props: dict) -> Outcome:
+    """Insert an analyzed value; the sha256 primary key is the duplicate check."""
+    # ids the Bloom filter rules out are inserted straight away, and a racing insert
+    # still surfaces as IntegrityError
+    if known_ids([props["sha256_hash"]]):
+        return CONFLICT
+    return insert_value(value, props)
+
+
+def insert_value(value: str, props: dict) -> Outcome:
+    """The insert half of store_value, for a value already checked against known_ids."""
+    try:
+        record = create_record(value, props)
+    except IntegrityError:  # inserted by a concurrent request after the check
+        return CONFLICT
+    except WriterBusy:
+        return BUSY
+
+    data = {"id": record.id, "value": record.value, "properties": props}
+    if write_behind():  # accepted, not committed yet: created_at is set by the commit
+        return Outcome(data, HTTPStatus.ACCEPTED)
+    data["created_at"] = record.created_at.isoformat().replace("+00:00", "Z")
+    return Outcome(data, HTTPStatus.CREATED)
+
+
+def create_value(value) -> Outcome:
+    """The whole create flow, for the sync views."""
+    invalid = check_value(value)
+    if invalid is not None:
+        return invalid
+    try:
+        props = get_executor().analyze([value])[0]
+    except ExecutorBusy:
+        return BUSY
+    return store_value(value, props)
+
+
+@csrf_exempt
+@require_POST
+def ingest_string(request):
+    with phase("parse"):
+        value = read_value(request)
+    return json_response(*create_value(value))
@@ -0,0 +1,13 @@
+from django.urls import path
+from .ingest import ingest_string
+from .metrics import metrics_view
+
+# Used instead of analyzer.urls when ANALYZER_INGEST_ONLY is on: a write-only worker
+# that accepts POST /strings and nothing else from the API.
+urlpatterns = [
+    # POST /strings
+    path("strings", ingest_string, name="strings_list_create"),
+
+    # GET /metrics (Prometheus text format)
+    path("metrics", metrics_view, name="metrics"),
+]
@@ -0,0 +1,109 @@
+# analyzer/loadgen.py
+"""
+Minimal asyncio HTTP/1.1 load generator with keep-alive connections, used by the
+bench_http command. Each virtual client holds one connection and sends its share of
+the request mix back to back, so concurrency equals the number of open connections.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class Result:
+    def __init__(self):
+        self.latencies_ms = []
+        self.statuses = {}
+        self.errors = 0
+        self.by_endpoint = {}  # endpoint label -> latencies in ms, for labelled requests
+
+    def record(self, status_code, elapsed, endpoint=None):
+        self.latencies_ms.append(elapsed * 1000)
+        self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+        if endpoint is not None:
+            self.by_endpoint.setdefault(endpoint, []).append(elapsed * 1000)
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status_code = int(status_line.split()[1])
+    length, chunked, close = None, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name == "connection" and value == "close":
+            close = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status_code, close
+
+
+def _encode_request(host, method, path, body=None, content_type="application/json"):
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+    if body is not None:
+        head += f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+    return head.encode() + b"\r\n" + (body or b"")
+
+
+async def _client(base, requests, result, deadline):
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+    prefix = parts.path.rstrip("/")
+    reader = writer = None
+    for method, path, body, *label in requests:
+        if deadline and time.perf_counter() > deadline:
+            break
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(_encode_request(parts.netloc, method, prefix + path, body))
+            await writer.drain()
+            status_code, close = await _read_response(reader)
+            result.record(status_code, time.perf_counter() - start, label[0] if label else None)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            result.errors += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run(base, requests, concurrency, duration):
+    result = Result()
+    deadline = time.perf_counter() + duration if duration else None
+    shares = [requests[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(base, share, result, deadline) for share in shares if share))
+    return result, time.perf_counter() - start
+
+
+def run_load(base, requests, concurrency=50, duration=None):
+    """
+    Send ``requests`` (method, path, body-bytes-or-None tuples, optionally followed by
+    an endpoint label) to ``base`` over ``concurrency`` keep-alive connections.
+    Returns (Result, elapsed seconds).
+    """
+    return asyncio.run(_run(base, list(requests), concurrency, duration))
@@ -0,0 +1,46 @@
+import json
+import random
+import time
+from django.core.management.base import BaseCommand
+from analyzer.benchmarking import random_corpus
+from analyzer.utils import analyze_batch, analyze_string
+
+
+class Command(BaseCommand):
+    # analyze_string/analyze_batch are checked against the reference analyzer in analyzer/tests.py
+    help = "Report strings/sec of analyze_string and analyze_batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lengths", default="8,64,256,1000")
+        parser.add_argument("--batch-sizes", default="1,100,10000")
+        parser.add_argument("--min-strings", type=int, default=20000,
+                            help="Strings analyzed per measurement (batches repeat to reach it)")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(5)
+        engines = {
+            "analyze_string": lambda values: [analyze_string(v) for v in values],
+            "analyze_batch": analyze_batch,
+        }
+        rows = []
+        for length in map(int, opts["lengths"].split(",")):
+            for batch_size in map(int, opts["batch_sizes"].split(",")):
+                batch = random_corpus(batch_size, length, rng)
+                repeats = max(1, opts["min_strings"] // batch_size)
+                row = {"length": length, "batch_size": batch_size}
+                for name, engine in engines.items():
+                    start = time.perf_counter()
+                    for _ in range(repeats):
+                        engine(batch)
+                    row[name] = round(repeats * batch_size / (time.perf_counter() - start))
+                rows.append(row)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(f"{'length':>7} {'batch':>7} " + " ".join(f"{name + '/s':>16}" for name in engines))
+        for row in rows:
+            self.stdout.write(
+                f"{row['length']:>7} {row['batch_size']:>7} " + " ".join(f"{row[name]:>16}" for name in engines)
+            )
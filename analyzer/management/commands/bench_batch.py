@@ -0,0 +1,96 @@
+import json
+import random
+import time
+from urllib.parse import quote
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from analyzer.benchmarking import SEED_PREFIX, api_client, clear_seeded, seed_records, synthetic_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare looking up and deleting many strings one request at a time "
+        "(GET/DELETE /strings/{value}) with POST/DELETE /strings/batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Synthetic rows to seed first")
+        parser.add_argument("--items", type=int, default=5000, help="Strings looked up, then deleted, per mode")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Items per /strings/batch request")
+        parser.add_argument("--misses", type=float, default=0.2, help="Share of items that are not stored")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        if opts["items"] * 2 > opts["rows"]:
+            raise CommandError("--rows must be at least twice --items")
+        clear_seeded()
+        self.stderr.write(f"Seeding {opts['rows']} rows on {connection.vendor}...")
+        seed_records(opts["rows"], progress=lambda n: self.stderr.write(f"  {n}", ending="\r"))
+        self.stderr.write("")
+
+        # Disjoint item sets per mode, so neither deletes what the other looks up
+        rng = random.Random(11)
+        stored = rng.sample(list(synthetic_values(opts["rows"])), opts["items"] * 2)
+        sets = {}
+        for mode, values in (("single", stored[:opts["items"]]), ("batch", stored[opts["items"]:])):
+            misses = int(len(values) * opts["misses"])
+            sets[mode] = values[misses:] + [f"{SEED_PREFIX}missing {mode} {i}" for i in range(misses)]
+            rng.shuffle(sets[mode])
+
+        client = api_client()
+        results = {"vendor": connection.vendor, "rows": opts["rows"], "items": opts["items"], "cases": {}}
+        for operation in ("lookup", "delete"):
+            results["cases"][operation] = {
+                "single": self.measure(lambda: self.run_single(client, operation, sets["single"])),
+                "batch": self.measure(lambda: self.run_batch(client, operation, sets["batch"], opts["batch_size"])),
+            }
+        clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['vendor']} | {results['rows']} rows | {results['items']} items per mode")
+        self.stdout.write(f"{'operation':10} {'mode':7} {'requests':>9} {'queries':>9} {'seconds':>9} {'items/s':>10}")
+        for operation, modes in results["cases"].items():
+            for mode, case in modes.items():
+                self.stdout.write(
+                    f"{operation:10} {mode:7} {case['requests']:>9} {case['queries']:>9} "
+                    f"{case['seconds']:>9.3f} {opts['items'] / case['seconds']:>10.0f}"
+                )
+
+    @staticmethod
+    def measure(run) -> dict:
+        # Counted with a wrapper: connection.queries_log only keeps the last 9000 queries
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            requests = run()
+            elapsed = time.perf_counter() - start
+        return {"requests": requests, "queries": queries, "seconds": round(elapsed, 3)}
+
+    @staticmethod
+    def run_single(client, operation, values) -> int:
+        send = client.get if operation == "lookup" else client.delete
+        for value in values:
+            response = send(f"/strings/{quote(value, safe='')}")
+            if response.status_code not in (200, 204, 404):
+                raise CommandError(f"{operation} {value!r}: HTTP {response.status_code}")
+        return len(values)
+
+    @staticmethod
+    def run_batch(client, operation, values, batch_size) -> int:
+        method = "POST" if operation == "lookup" else "DELETE"
+        requests = 0
+        for start in range(0, len(values), batch_size):
+            body = json.dumps(values[start:start + batch_size])
+            response = client.generic(method, "/strings/batch", body, content_type="application/json")
+            if response.status_code != 200:
+                raise CommandError(f"{operation} batch: HTTP {response.status_code}")
+            requests += 1
+        return requests
@@ -0,0 +1,107 @@
+import json
+from urllib.parse import quote
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from analyzer.benchmarking import (
+    clear_seeded, gunicorn_server, seed_records, summarize, synthetic_values, time_call,
+)
+from analyzer.loadgen import run_load
+
+# Environment overrides per mode; the server reads them through settings.py
+MODES = {
+    "reconnect": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "0", "DB_CONN_HEALTH_CHECKS": "false"},
+    "persistent": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "false"},
+    "persistent_checked": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "true"},
+    "pool": {"DB_POOL": "true", "DB_CONN_HEALTH_CHECKS": "false"},
+    "pool_checked": {"DB_POOL": "true", "DB_CONN_HEALTH_CHECKS": "true"},
+}
+
+
+def connect_ms(iterations) -> list:
+    """Milliseconds to open (and close) one new database connection, handshake and auth included."""
+    params = connection.get_connection_params()
+
+    def connect():
+        connection.get_new_connection(params).close()
+
+    return time_call(connect, iterations)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn once per connection mode (reconnect per request, CONN_MAX_AGE, psycopg pool; "
+        "with and without health checks) and compare request latency against the same PostgreSQL database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--threads", type=int, default=4, help="gunicorn threads, also the client concurrency")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--modes", default=",".join(MODES))
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("bench_connections needs DB_ENGINE=django.db.backends.postgresql")
+        modes = [mode.strip() for mode in opts["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"unknown modes: {', '.join(sorted(unknown))}")
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(opts["rows"])
+
+        values = list(synthetic_values(min(opts["rows"], 500)))
+        requests = [
+            ("GET", f"/strings/{quote(values[i % len(values)], safe='')}", None, "detail")
+            if i % 4 else ("GET", "/strings?page_size=20&is_palindrome=true", None, "list_page")
+            for i in range(opts["requests"])
+        ]
+
+        results = {"connect": summarize(connect_ms(50))}
+        for mode in modes:
+            results[mode] = self.run_mode(mode, requests, opts)
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"new connection: p50 {results['connect']['p50_ms']} ms, p99 {results['connect']['p99_ms']} ms"
+        )
+        self.stdout.write(
+            f"{'mode':20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'detail p50':>11} {'list p50':>9}"
+        )
+        for mode in modes:
+            row = results[mode]
+            self.stdout.write(
+                f"{mode:20} {row['throughput_rps']:>8} {row['latency']['p50_ms']:>8.3f} {row['latency']['p95_ms']:>8.3f} "
+                f"{row['latency']['p99_ms']:>8.3f} {row['detail']['p50_ms']:>11.3f} {row['list_page']['p50_ms']:>9.3f}"
+            )
+
+    def run_mode(self, mode, requests, opts) -> dict:
+        env = {
+            **MODES[mode],
+            "GUNICORN_THREADS": str(opts["threads"]),
+            "DB_POOL_MIN_SIZE": str(opts["threads"]),
+            "DB_POOL_MAX_SIZE": str(opts["threads"] + 1),
+            "ANALYZER_METRICS_ENABLED": "false",
+            "ANALYZER_DETAIL_CACHE_BACKEND": "none",  # every detail request must reach the database
+        }
+        try:
+            with gunicorn_server(opts["port"], env, threads=opts["threads"]) as url:
+                run_load(url, requests[:200], opts["threads"])  # warm-up: imports, caches, connections
+                result, elapsed = run_load(url, requests, opts["threads"])
+        except RuntimeError as exc:
+            raise CommandError(f"{mode}: {exc}")
+        if result.errors or set(result.statuses) - {200}:
+            raise CommandError(f"{mode}: {result.errors} errors, statuses {result.statuses}")
+        return {
+            "throughput_rps": round(len(result.latencies_ms) / elapsed, 1),
+            "latency": summarize(result.latencies_ms),
+            **{label: summarize(samples) for label, samples in result.by_endpoint.items()},
+        }
@@ -0,0 +1,91 @@
+import hashlib
+import json
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from analyzer.benchmarking import SEED_PREFIX, api_client, clear_seeded, seed_records, summarize, time_call
+from analyzer.dedup import BloomFilter, get_known_hashes, reset_known_hashes
+from analyzer.models import StringRecord
+
+
+def measured_error_rate(bloom, probes) -> float:
+    """Share of ``probes`` ids never added to ``bloom`` that it still reports as present."""
+    misses = (hashlib.sha256(f"absent {i}".encode()).hexdigest() for i in range(probes))
+    return sum(sha in bloom for sha in misses) / probes
+
+
+class Command(BaseCommand):
+    help = "Measure POST /strings for new and duplicate strings with and without the Bloom filter."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--iterations", type=int, default=500)
+        parser.add_argument("--capacity", type=int, default=1000000)
+        parser.add_argument("--error-rate", type=float, default=0.01)
+        parser.add_argument("--probes", type=int, default=100000)
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(opts["rows"])
+        duplicates = list(
+            StringRecord.objects.filter(value__startswith=SEED_PREFIX).values_list("value", flat=True)[:opts["iterations"]]
+        )
+
+        client = api_client()
+        results = {}
+        for label, capacity in (("pk_lookup", 0), ("bloom", opts["capacity"])):
+            with override_settings(ANALYZER_BLOOM_CAPACITY=capacity, ANALYZER_BLOOM_ERROR_RATE=opts["error_rate"]):
+                reset_known_hashes()
+                known = get_known_hashes()
+                if known is not None:
+                    known._warm_thread.join()
+                dupes, fresh = iter(duplicates), iter(range(len(duplicates) + 1))
+                results[label] = {
+                    "duplicate": summarize(time_call(
+                        lambda: client.post("/strings", {"value": next(dupes)}, content_type="application/json"),
+                        len(duplicates) - 1,
+                    )),
+                    "new": summarize(time_call(
+                        lambda: client.post("/strings", {"value": f"{SEED_PREFIX}new {label} {next(fresh)}"},
+                                            content_type="application/json"),
+                        len(duplicates),
+                    )),
+                }
+                if known is not None:
+                    results[label]["filter"] = known.stats()
+                    results[label]["filter"]["measured_error_rate"] = measured_error_rate(known.bloom, opts["probes"])
+        reset_known_hashes()
+
+        # Filter sizing alone, for a few targets at the configured capacity
+        results["sizing"] = [
+            {"error_rate": rate, "memory_bytes": bloom.memory_bytes(), "hashes": bloom.hashes}
+            for rate in (0.1, 0.01, 0.001, 0.0001)
+            for bloom in [BloomFilter(opts["capacity"], rate)]
+        ]
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'mode':10} {'dup p50':>9} {'dup p99':>9} {'new p50':>9} {'new p99':>9}")
+        for label in ("pk_lookup", "bloom"):
+            row = results[label]
+            self.stdout.write(
+                f"{label:10} {row['duplicate']['p50_ms']:>9.3f} {row['duplicate']['p99_ms']:>9.3f} "
+                f"{row['new']['p50_ms']:>9.3f} {row['new']['p99_ms']:>9.3f}"
+            )
+        stats = results["bloom"]["filter"]
+        self.stdout.write(
+            f"filter: {stats['items']} ids, {stats['memory_bytes'] / 1024:.0f} KiB, {stats['hashes']} hashes, "
+            f"estimated FP {stats['estimated_error_rate']:.6f}, measured FP {stats['measured_error_rate']:.6f}, "
+            f"skipped lookups {stats['skipped_lookups']}/{stats['checks']}"
+        )
+        for row in results["sizing"]:
+            self.stdout.write(
+                f"  target FP {row['error_rate']:<7} -> {row['memory_bytes'] / 1024:>8.0f} KiB, {row['hashes']} hashes"
+            )
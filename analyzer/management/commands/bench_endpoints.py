@@ -0,0 +1,184 @@
+import json
+import platform
+import subprocess
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from analyzer.benchmarking import (
+    DEFAULT_MIX, api_client, clear_seeded, endpoint_label, load_traffic, parse_mix, save_traffic, seed_records,
+    summarize, synthetic_traffic,
+)
+from analyzer.loadgen import Result, run_load
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def replay_in_process(traffic, warmup):
+    """Send ``traffic`` one request at a time through the Django test client."""
+    client = api_client()
+
+    def send(entry):
+        body = json.dumps(entry["body"]) if entry["body"] is not None else ""
+        return client.generic(entry["method"], entry["path"], body, content_type="application/json")
+
+    for entry in traffic[:warmup]:
+        send(entry)
+    result = Result()
+    start = time.perf_counter()
+    for entry in traffic[warmup:]:
+        sent = time.perf_counter()
+        response = send(entry)
+        result.record(response.status_code, time.perf_counter() - sent, entry["label"])
+    return result, time.perf_counter() - start
+
+
+def replay_http(url, traffic, concurrency, warmup):
+    """Send ``traffic`` to a running server over ``concurrency`` keep-alive connections."""
+    requests = [
+        (entry["method"], entry["path"], json.dumps(entry["body"]).encode() if entry["body"] is not None else None,
+         entry["label"])
+        for entry in traffic
+    ]
+    if warmup:
+        run_load(url, requests[:warmup], concurrency)
+    return run_load(url, requests[warmup:], concurrency)
+
+
+def delta_pct(new, old):
+    return round((new - old) / old * 100, 1) if old else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed StringRecord rows and replay a synthetic or recorded request mix against /strings, "
+        "/strings/<value> and the natural-language filter; report throughput and p50/p95/p99 as text or JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--mix", default="", help="Endpoint weights, default detail=50,list=25,nl=15,create=10")
+        parser.add_argument("--seed", type=int, default=13, help="Seeds both the rows and the synthetic mix")
+        parser.add_argument("--replay", metavar="FILE", help="Recorded traffic: JSON lines of method, path, body")
+        parser.add_argument("--record", metavar="FILE", help="Write the request mix used to FILE for later replay")
+        parser.add_argument("--warmup", type=int, default=100, help="Leading requests sent but not measured")
+        parser.add_argument("--url", help="Drive a running server instead of the in-process test client")
+        parser.add_argument("--concurrency", type=int, default=50, help="Connections when --url is given")
+        parser.add_argument("--label", default="")
+        parser.add_argument("--compare", metavar="FILE", help="A previous --output report to print deltas against")
+        parser.add_argument("--output", metavar="FILE", help="Write the JSON report to FILE")
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        try:
+            mix = parse_mix(opts["mix"]) if opts["mix"] else DEFAULT_MIX
+            traffic = (
+                load_traffic(opts["replay"]) if opts["replay"]
+                else synthetic_traffic(opts["requests"] + opts["warmup"], opts["rows"], mix, opts["seed"])
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        if len(traffic) <= opts["warmup"]:
+            raise CommandError(f"{len(traffic)} requests leave nothing to measure after --warmup {opts['warmup']}")
+        if opts["record"]:
+            save_traffic(traffic, opts["record"])
+        for entry in traffic:
+            entry["label"] = endpoint_label(entry["method"], entry["path"])
+
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(opts["rows"], opts["seed"])
+
+        if opts["url"]:
+            result, elapsed = replay_http(opts["url"], traffic, opts["concurrency"], opts["warmup"])
+        else:
+            result, elapsed = replay_in_process(traffic, opts["warmup"])
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        measured = len(result.latencies_ms)
+        report = {
+            "label": opts["label"],
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "async_views": settings.ANALYZER_ASYNC_VIEWS,
+            "target": opts["url"] or "in-process",
+            "concurrency": opts["concurrency"] if opts["url"] else 1,
+            "rows": opts["rows"],
+            "seed": opts["seed"],
+            "mix": opts["replay"] or mix,
+            "requests": measured,
+            "errors": result.errors,
+            "statuses": {str(code): count for code, count in sorted(result.statuses.items())},
+            "throughput_rps": round(measured / elapsed, 1) if elapsed else 0.0,
+            "latency": summarize(result.latencies_ms),
+            "endpoints": {
+                label: {"requests": len(samples), **summarize(samples)}
+                for label, samples in sorted(result.by_endpoint.items())
+            },
+        }
+        if opts["compare"]:
+            with open(opts["compare"], encoding="utf-8") as handle:
+                report["compare"] = self.compare(report, json.load(handle))
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+                handle.write("\n")
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.write_text(report)
+
+    @staticmethod
+    def compare(report, baseline) -> dict:
+        """Percent change of throughput and each endpoint's latencies against ``baseline``."""
+        deltas = {
+            "baseline_revision": baseline.get("revision", ""),
+            "throughput_rps": delta_pct(report["throughput_rps"], baseline["throughput_rps"]),
+            "endpoints": {},
+        }
+        for label, row in report["endpoints"].items():
+            old = baseline["endpoints"].get(label)
+            if old:
+                deltas["endpoints"][label] = {
+                    key: delta_pct(row[key], old[key]) for key in ("p50_ms", "p95_ms", "p99_ms")
+                }
+        return deltas
+
+    def write_text(self, report):
+        latency = report["latency"]
+        self.stdout.write(
+            f"{report['label'] or report['target']} @ {report['revision'] or 'unknown'} ({report['database']}): "
+            f"{report['requests']} requests, {report['errors']} errors, {report['throughput_rps']} req/s | "
+            f"p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms | "
+            f"statuses {report['statuses']}"
+        )
+        deltas = report.get("compare", {}).get("endpoints", {})
+        self.stdout.write(f"{'endpoint':42} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  vs baseline p50/p95/p99")
+        for label, row in report["endpoints"].items():
+            change = deltas.get(label)
+            extra = "  " + " ".join(
+                f"{value:+.1f}%" if value is not None else "n/a" for value in change.values()
+            ) if change else ""
+            self.stdout.write(
+                f"{label:42} {row['requests']:>6} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f}{extra}"
+            )
+        if "compare" in report:
+            self.stdout.write(
+                f"throughput vs {report['compare']['baseline_revision'] or 'baseline'}: "
+                f"{report['compare']['throughput_rps']:+.1f}%"
+                if report["compare"]["throughput_rps"] is not None else "throughput vs baseline: n/a"
+            )
@@ -0,0 +1,55 @@
+import json
+import os
+import random
+import time
+from django.core.management.base import BaseCommand
+from analyzer.executor import AnalysisExecutor
+
+
+class Command(BaseCommand):
+    help = "Measure analysis throughput of the inline/thread/process executors as workers increase."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strings", type=int, default=200000)
+        parser.add_argument("--length", type=int, default=500)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--workers", default="",
+                            help="Comma-separated worker counts (default: 1, 2, 4, ... up to the CPU count)")
+        parser.add_argument("--modes", default="inline,thread,process")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        cpus = os.cpu_count() or 1
+        if opts["workers"]:
+            worker_counts = [int(w) for w in opts["workers"].split(",")]
+        else:
+            worker_counts = sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+
+        rng = random.Random(3)
+        alphabet = "abcdefghijklmnopqrstuvwxyz      "
+        values = ["".join(rng.choices(alphabet, k=opts["length"])) for _ in range(opts["strings"])]
+
+        rows = []
+        for mode in opts["modes"].split(","):
+            for workers in ([1] if mode == "inline" else worker_counts):
+                executor = AnalysisExecutor(
+                    mode=mode, workers=workers, chunk_size=opts["chunk_size"], max_pending=10 ** 6
+                )
+                executor.analyze(values[: opts["chunk_size"] * workers])  # start the pool
+                start = time.perf_counter()
+                executor.analyze(values)
+                elapsed = time.perf_counter() - start
+                executor.shutdown()
+                rows.append({"mode": mode, "workers": workers, "strings_per_sec": round(len(values) / elapsed)})
+
+        baseline = rows[0]["strings_per_sec"]
+        for row in rows:
+            row["speedup"] = round(row["strings_per_sec"] / baseline, 2)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps({"cpus": cpus, "results": rows}, indent=2))
+            return
+        self.stdout.write(f"{cpus} CPUs | {len(values)} strings x {opts['length']} chars")
+        self.stdout.write(f"{'mode':8} {'workers':>7} {'strings/s':>12} {'speedup':>8}")
+        for row in rows:
+            self.stdout.write(f"{row['mode']:8} {row['workers']:>7} {row['strings_per_sec']:>12} {row['speedup']:>8}")
@@ -0,0 +1,88 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from analyzer.benchmarking import clear_seeded, seed_records, summarize, time_call
+from analyzer.filters import apply_filters
+from analyzer.models import StringRecord
+from analyzer.pagination import paginate
+
+# Filter combinations exercised by GET /strings, as filters_applied dicts
+CASES = {
+    "min_length": {"min_length": 60},
+    "length_range": {"min_length": 40, "max_length": 45},
+    "word_count": {"word_count": 3},
+    "word_count+length": {"word_count": 3, "min_length": 30, "max_length": 40},
+    "palindrome": {"is_palindrome": True},
+    "palindrome+length": {"is_palindrome": True, "min_length": 20, "max_length": 40},
+    "not_palindrome+word_count": {"is_palindrome": False, "word_count": 8},
+    "all": {"is_palindrome": False, "word_count": 5, "min_length": 40, "max_length": 60},
+}
+
+
+def apply_naive(queryset, filters):
+    # The fixed clause order the views used before plan_filters()
+    if "is_palindrome" in filters:
+        queryset = queryset.filter(is_palindrome=filters["is_palindrome"])
+    if "min_length" in filters:
+        queryset = queryset.filter(length__gte=filters["min_length"])
+    if "max_length" in filters:
+        queryset = queryset.filter(length__lte=filters["max_length"])
+    if "word_count" in filters:
+        queryset = queryset.filter(word_count=filters["word_count"])
+    return queryset
+
+
+class Command(BaseCommand):
+    help = "Measure p50/p99 latency of the GET /strings numeric filters on the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic rows to seed first")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--naive", action="store_true", help="Apply filters in the old fixed order")
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse rows seeded by an earlier run")
+        parser.add_argument("--keep", action="store_true", help="Leave the seeded rows in place")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            self.stderr.write(f"Seeding {opts['rows']} rows on {connection.vendor}...")
+            seed_records(opts["rows"], progress=lambda n: self.stderr.write(f"  {n}", ending="\r"))
+            self.stderr.write("")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {StringRecord._meta.db_table}")
+        elif connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        apply = apply_naive if opts["naive"] else apply_filters
+        results = {
+            "vendor": connection.vendor,
+            "rows": StringRecord.objects.count(),
+            "planner": "naive" if opts["naive"] else "planned",
+            "cases": {},
+        }
+        for name, filters in CASES.items():
+            queryset = apply(StringRecord.objects.all(), filters)
+            page = lambda: paginate(queryset, page_size=opts["page_size"])  # noqa: E731
+            count = lambda: queryset.count()  # noqa: E731
+            results["cases"][name] = {
+                "page": summarize(time_call(page, opts["iterations"])),
+                "count": summarize(time_call(count, opts["iterations"])),
+            }
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['vendor']} | {results['rows']} rows | {results['planner']}")
+        self.stdout.write(f"{'case':28} {'page p50':>10} {'page p99':>10} {'count p50':>10} {'count p99':>10}")
+        for name, case in results["cases"].items():
+            self.stdout.write(
+                f"{name:28} {case['page']['p50_ms']:>10.3f} {case['page']['p99_ms']:>10.3f} "
+                f"{case['count']['p50_ms']:>10.3f} {case['count']['p99_ms']:>10.3f}"
+            )
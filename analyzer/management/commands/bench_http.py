@@ -0,0 +1,69 @@
+import json
+import random
+from django.core.management.base import BaseCommand
+from analyzer.benchmarking import summarize
+from analyzer.loadgen import run_load
+
+
+def synthetic_mix(count, rng, writes=0.1):
+    """GETs on the list, detail and natural-language endpoints plus a share of POSTs."""
+    phrases = ("palindromic strings", "single word palindromic strings", "strings longer than 10")
+    requests = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < writes:
+            requests.append(("POST", "/strings", json.dumps({"value": f"load {rng.random()}"}).encode()))
+        elif roll < 0.5:
+            requests.append(("GET", f"/strings/load%20seed%20{rng.randrange(100)}", None))
+        elif roll < 0.8:
+            requests.append(("GET", "/strings?page_size=20&is_palindrome=false", None))
+        else:
+            phrase = rng.choice(phrases).replace(" ", "%20")
+            requests.append(("GET", f"/strings/filter-by-natural-language?query={phrase}", None))
+    return requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server (gunicorn WSGI or an ASGI worker) with concurrent keep-alive "
+        "clients and report throughput and tail latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+        parser.add_argument("--writes", type=float, default=0.1, help="Share of POST /strings requests")
+        parser.add_argument("--no-seed", action="store_true", help="Skip creating the strings the GETs look up")
+        parser.add_argument("--label", default="")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(11)
+        if not opts["no_seed"]:
+            seed = [("POST", "/strings", json.dumps({"value": f"load seed {i}"}).encode()) for i in range(100)]
+            run_load(opts["url"], seed, concurrency=10)
+
+        requests = synthetic_mix(opts["requests"], rng, opts["writes"])
+        result, elapsed = run_load(opts["url"], requests, opts["concurrency"], opts["duration"])
+
+        report = {
+            "label": opts["label"],
+            "url": opts["url"],
+            "concurrency": opts["concurrency"],
+            "requests": len(result.latencies_ms),
+            "errors": result.errors,
+            "statuses": result.statuses,
+            "throughput_rps": round(len(result.latencies_ms) / elapsed, 1),
+            "latency": summarize(result.latencies_ms),
+        }
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        latency = report["latency"]
+        self.stdout.write(
+            f"{report['label'] or report['url']}: {report['requests']} requests, {report['errors']} errors, "
+            f"{report['throughput_rps']} req/s | p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, "
+            f"p99 {latency['p99_ms']} ms | statuses {report['statuses']}"
+        )
@@ -0,0 +1,142 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.benchmarking import SEED_PREFIX, clear_seeded, summarize
+
+# Environment overrides per mode; the child process reads them through settings.py
+MODES = {
+    "drf": {"ANALYZER_INGEST_ONLY": "false"},
+    "ingest": {"ANALYZER_INGEST_ONLY": "true"},
+}
+
+# Run in a fresh interpreter per sample, like a newly forked (or recycled) worker with
+# preload_app off: load the WSGI application and the urlconf, then serve POST /strings
+# through the WSGI callable and report timings, RSS and what was imported.
+WORKER = r"""
+import io, json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "string_analyzer.settings")
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns  # imported by the first request otherwise
+ready = time.perf_counter()
+
+def rss_kib():
+    # Current VmRSS; ru_maxrss would report the forking manage.py process's peak after exec
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+
+ready_rss = rss_kib()
+
+def post(value):
+    body = json.dumps({"value": value}).encode()
+    environ = {"REQUEST_METHOD": "POST", "PATH_INFO": "/strings", "CONTENT_TYPE": "application/json",
+               "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+    setup_testing_defaults(environ)
+    statuses = []
+    start = time.perf_counter()
+    b"".join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    return (time.perf_counter() - start) * 1000, statuses[0]
+
+prefix, count = sys.argv[1], int(sys.argv[2])
+first_ms, _ = post(f"{prefix}first")
+samples, statuses = [], {}
+for i in range(count):
+    elapsed, status = post(f"{prefix}{i}")
+    samples.append(elapsed)
+    statuses[status] = statuses.get(status, 0) + 1
+# Rejected before analysis or any query: what is left is the framework's own overhead
+rejected = [post("")[0] for _ in range(count)]
+print(json.dumps({
+    "startup_ms": (ready - started) * 1000,
+    "first_request_ms": first_ms,
+    "samples_ms": samples,
+    "statuses": statuses,
+    "rejected_ms": rejected,
+    "ready_rss_kib": ready_rss,
+    "rss_kib": rss_kib(),
+    "modules": len(sys.modules),
+    "drf_loaded": "rest_framework" in sys.modules,
+    "drf_yasg_loaded": "drf_yasg" in sys.modules,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare POST /strings through the DRF view with the plain Django ingest view "
+        "(ANALYZER_INGEST_ONLY): worker cold start, latency of created and rejected requests, and RSS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="POSTs per worker after the first")
+        parser.add_argument("--workers", type=int, default=5, help="Fresh worker processes per mode")
+        parser.add_argument("--modes", default=",".join(MODES))
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        modes = [mode.strip() for mode in opts["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"unknown modes: {', '.join(sorted(unknown))}")
+
+        clear_seeded()
+        results = {mode: self.run_mode(mode, opts) for mode in modes}
+        clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'mode':8} {'startup ms':>11} {'first req ms':>13} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'req/s':>8} {'400 p50 ms':>11} {'RSS MiB ready/after':>20} {'modules':>8}  drf/yasg loaded"
+        )
+        for mode in modes:
+            row = results[mode]
+            self.stdout.write(
+                f"{mode:8} {row['startup_ms']:>11.1f} {row['first_request_ms']:>13.1f} "
+                f"{row['latency']['p50_ms']:>8.3f} {row['latency']['p99_ms']:>8.3f} {row['requests_per_s']:>8} "
+                f"{row['rejected_latency']['p50_ms']:>11.3f} {row['ready_rss_mib']:>10.1f}/{row['rss_mib']:<9.1f} "
+                f"{row['modules']:>8}  {row['drf_loaded']}/{row['drf_yasg_loaded']}"
+            )
+
+    def run_mode(self, mode, opts) -> dict:
+        # DEBUG off, as in production: no per-query log growing during the run
+        env = {**os.environ, **MODES[mode], "ENVIRONMENT": "production", "ANALYZER_METRICS_ENABLED": "false"}
+        runs = []
+        for worker in range(opts["workers"]):
+            completed = subprocess.run(
+                [sys.executable, "-c", WORKER, f"{SEED_PREFIX}ingest {mode} {worker} ", str(opts["requests"])],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if completed.returncode:
+                raise CommandError(f"{mode}: worker failed\n{completed.stderr}")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        statuses = {}
+        for run in runs:
+            for code, count in run["statuses"].items():
+                statuses[code] = statuses.get(code, 0) + count
+        if set(statuses) != {"201 Created"}:
+            raise CommandError(f"{mode}: unexpected statuses {statuses}")
+        samples = [sample for run in runs for sample in run["samples_ms"]]
+        return {
+            "workers": len(runs),
+            "startup_ms": round(statistics.median(run["startup_ms"] for run in runs), 1),
+            "first_request_ms": round(statistics.median(run["first_request_ms"] for run in runs), 1),
+            "latency": summarize(samples),
+            "requests_per_s": round(len(samples) / (sum(samples) / 1000), 1),
+            "rejected_latency": summarize([sample for run in runs for sample in run["rejected_ms"]]),
+            "ready_rss_mib": round(statistics.median(run["ready_rss_kib"] for run in runs) / 1024, 1),
+            "rss_mib": round(statistics.median(run["rss_kib"] for run in runs) / 1024, 1),
+            "modules": runs[0]["modules"],
+            "drf_loaded": runs[0]["drf_loaded"],
+            "drf_yasg_loaded": runs[0]["drf_yasg_loaded"],
+        }
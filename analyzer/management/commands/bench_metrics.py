@@ -0,0 +1,112 @@
+import json
+import time
+from urllib.parse import quote
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+from analyzer.benchmarking import SEED_PREFIX, api_client, clear_seeded, seed_records, summarize, time_call
+from analyzer.metrics import MetricsMiddleware, phase, reset_metrics, timed
+from analyzer.models import StringRecord
+
+MODES = (("off", False, 0.0), ("sample_0.1", True, 0.1), ("sample_1.0", True, 1.0))
+
+
+def per_call_us(func, calls=200000) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def instrumentation_cost(rate) -> float:
+    """
+    Microseconds the middleware and five phase markers add to one request at sample
+    ``rate``, measured against a view that does nothing, so the figure is not lost in
+    request-to-request noise.
+    """
+    request = RequestFactory().get("/strings")
+    request.resolver_match = resolve("/strings")
+    response = HttpResponse()
+
+    @timed("analyze")
+    def marked():
+        return None
+
+    def view(request):
+        with phase("parse"):
+            pass
+        for _ in range(4):
+            marked()
+        return response
+
+    def bare(request):
+        return response
+
+    with override_settings(ANALYZER_METRICS_ENABLED=True, ANALYZER_METRICS_SAMPLE_RATE=rate):
+        middleware = MetricsMiddleware(view)
+        instrumented = per_call_us(lambda: middleware(request))
+    baseline = per_call_us(lambda: bare(request))
+    return instrumented - baseline
+
+
+class Command(BaseCommand):
+    help = "Measure the overhead of MetricsMiddleware and the phase timers at different sample rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument("--rounds", type=int, default=3, help="Modes are interleaved this many times")
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(opts["rows"])
+
+        value = StringRecord.objects.filter(value__startswith=SEED_PREFIX).values_list("value", flat=True).first()
+        endpoints = {
+            "detail": lambda client: client.get(f"/strings/{quote(value)}"),
+            "list_page": lambda client: client.get("/strings", {"page_size": 20, "is_palindrome": "true"}),
+            "nl": lambda client: client.get("/strings/filter-by-natural-language", {"query": "single word palindromic strings"}),
+            "create_dup": lambda client: client.post("/strings", {"value": value}, content_type="application/json"),
+        }
+        api_client()  # test environment setup must happen outside override_settings
+        samples = {label: {name: [] for name in endpoints} for label, _, _ in MODES}
+        for _ in range(opts["rounds"]):
+            for label, enabled, rate in MODES:
+                with override_settings(ANALYZER_METRICS_ENABLED=enabled, ANALYZER_METRICS_SAMPLE_RATE=rate):
+                    client = api_client()  # a new client loads the middleware with these settings
+                    for name, call in endpoints.items():
+                        samples[label][name].extend(time_call(lambda: call(client), opts["iterations"]))
+        reset_metrics()
+
+        results = {label: {name: summarize(values) for name, values in by_name.items()} for label, by_name in samples.items()}
+        for label, _, _ in MODES[1:]:
+            for name in endpoints:
+                base = results["off"][name]["mean_ms"]
+                results[label][name]["overhead_pct"] = round((results[label][name]["mean_ms"] - base) / base * 100, 2)
+
+        reset_metrics()
+        results["instrumentation_us"] = {label: round(instrumentation_cost(rate), 2) for label, _, rate in MODES[1:]}
+        reset_metrics()
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'endpoint':12} " + " ".join(f"{label + ' mean':>17}" for label, _, _ in MODES))
+        for name in endpoints:
+            cells = []
+            for label, _, _ in MODES:
+                row = results[label][name]
+                extra = f" ({row['overhead_pct']:+.1f}%)" if "overhead_pct" in row else ""
+                cells.append(f"{row['mean_ms']:.3f}{extra}".rjust(17))
+            self.stdout.write(f"{name:12} " + " ".join(cells))
+        for label, cost in results["instrumentation_us"].items():
+            self.stdout.write(f"instrumentation cost per request at {label}: {cost:.2f} us")
@@ -0,0 +1,78 @@
+import json
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from analyzer.benchmarking import api_client, clear_seeded, seed_records, summarize, time_call
+from analyzer.cache import reset_caches
+from analyzer.nlquery import compile_query, normalize_query
+
+# Dashboard-style phrases, each sent repeatedly
+QUERIES = (
+    "all single word palindromic strings",
+    "strings longer than 60 characters",
+    "palindromic strings containing the letter a",
+    "strings longer than 20 and shorter than 40",
+    "palindromes or strings of 2 to 4 words without the letter z",
+    "(letter a or letter e) and not single word and at most 30 characters",
+)
+
+
+class Command(BaseCommand):
+    help = "Compare repeated GET /strings/filter-by-natural-language latency with and without the result cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(opts["rows"])
+
+        client = api_client()
+        results = {}
+        for label, backend in (("uncached", "none"), ("cached", "local")):
+            with override_settings(ANALYZER_NL_CACHE_BACKEND=backend):
+                reset_caches()
+                compile_query.cache_clear()
+                results[label] = {}
+                for query in QUERIES:
+                    call = lambda: client.get("/strings/filter-by-natural-language", {"query": query})  # noqa: E731
+                    results[label][query] = summarize(time_call(call, opts["iterations"]))
+        reset_caches()
+
+        # Compiling a plan (tokenize, parse, DNF, merge) versus reading it from compile_query's cache
+        compile_cost = {}
+        for query in QUERIES:
+            normalized = normalize_query(query)
+
+            def compile_fresh():
+                compile_query.cache_clear()
+                compile_query(normalized)
+
+            compile_cost[query] = {
+                "uncached": summarize(time_call(compile_fresh, opts["iterations"])),
+                "cached": summarize(time_call(lambda: compile_query(normalized), opts["iterations"])),
+            }
+        results["compile"] = compile_cost
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'query':70} {'uncached p50':>13} {'cached p50':>11} {'uncached p99':>13} {'cached p99':>11} "
+            f"{'compile p50':>12} {'plan hit p50':>13}"
+        )
+        for query in QUERIES:
+            before, after = results["uncached"][query], results["cached"][query]
+            compiled = results["compile"][query]
+            self.stdout.write(
+                f"{query:70} {before['p50_ms']:>13.3f} {after['p50_ms']:>11.3f} "
+                f"{before['p99_ms']:>13.3f} {after['p99_ms']:>11.3f} "
+                f"{compiled['uncached']['p50_ms']:>12.4f} {compiled['cached']['p50_ms']:>13.4f}"
+            )
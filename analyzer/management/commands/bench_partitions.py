@@ -0,0 +1,127 @@
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from analyzer.benchmarking import SEED_PREFIX, summarize, synthetic_values, time_call
+from analyzer.fields import encode_frequency_map
+from analyzer.filters import apply_filters
+from analyzer.models import StringRecord
+from analyzer.pagination import paginate
+from analyzer.services import build_record
+from analyzer.utils import analyze_batch
+from analyzer.management.commands.partition_strings import partitions
+
+# GET /strings filter combinations with a length range, as filters_applied dicts
+CASES = {
+    "length_40_45": {"min_length": 40, "max_length": 45},
+    "length_64_79": {"min_length": 64, "max_length": 79},
+    "length_max_20": {"max_length": 20},
+    "length_min_100": {"min_length": 100},
+    "word_count+length": {"word_count": 3, "min_length": 30, "max_length": 40},
+    "palindrome+length": {"is_palindrome": True, "min_length": 20, "max_length": 40},
+    "no_filter": {},
+}
+
+COLUMNS = (
+    "id", "value", "length", "is_palindrome", "unique_characters", "word_count", "sha256_hash",
+    "character_frequency_map", "anagram_key", "sketch", "created_at",
+)
+
+
+def copy_seed(count, batch_size=20000, progress=None) -> int:
+    """
+    COPY ``count`` synthetic StringRecord rows in, without their StringCharacter rows or
+    counter updates: enough for the length filters measured here, at a fraction of the
+    cost of seed_records() at tens of millions of rows.
+    """
+    table = connection.ops.quote_name(StringRecord._meta.db_table)
+    start = timezone.now()
+    written = 0
+    values = synthetic_values(count)
+    with connection.cursor() as cursor:
+        while written < count:
+            batch = [value for _, value in zip(range(batch_size), values)]
+            with cursor.cursor.copy(f"COPY {table} ({', '.join(COLUMNS)}) FROM STDIN") as copy:
+                for value, props in zip(batch, analyze_batch(batch)):
+                    record = build_record(value, props)
+                    copy.write_row((
+                        record.id, record.value, record.length, record.is_palindrome, record.unique_characters,
+                        record.word_count, record.sha256_hash, encode_frequency_map(record.character_frequency_map),
+                        record.anagram_key, record.sketch, start + timedelta(microseconds=written),
+                    ))
+                    written += 1
+            if progress:
+                progress(written)
+    return written
+
+
+def clear_copied():
+    table = connection.ops.quote_name(StringRecord._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE value LIKE %s", [f"{SEED_PREFIX}%"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /strings length filters on PostgreSQL, with and without partition pruning "
+        "once partition_strings has been run (or on the plain table before it)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000, help="Synthetic rows to COPY in first")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse rows seeded by an earlier run")
+        parser.add_argument("--keep", action="store_true", help="Leave the seeded rows in place")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("bench_partitions needs DB_ENGINE=django.db.backends.postgresql")
+        if not opts["skip_seed"]:
+            clear_copied()
+            self.stderr.write(f"Copying {opts['rows']} rows...")
+            copy_seed(opts["rows"], progress=lambda n: self.stderr.write(f"  {n}", ending="\r"))
+            self.stderr.write("")
+        with connection.cursor() as cursor:
+            # Freshly copied rows are not all-visible until vacuumed; without this, counts depend
+            # on when autovacuum happens to run
+            cursor.execute(f"VACUUM (ANALYZE) {connection.ops.quote_name(StringRecord._meta.db_table)}")
+            layout = partitions(cursor, StringRecord._meta.db_table)
+
+        # On a partitioned table the same queries run again with pruning switched off
+        settings = {"pruned": "on", "unpruned": "off"} if layout else {"unpartitioned": "on"}
+        results = {
+            "rows": StringRecord.objects.count(),
+            "partitions": len(layout),
+            "cases": {name: {} for name in CASES},
+        }
+        for label, pruning in settings.items():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET enable_partition_pruning = {pruning}")
+            for name, filters in CASES.items():
+                queryset = apply_filters(StringRecord.objects.all(), filters)
+                page = lambda: paginate(queryset, page_size=opts["page_size"])  # noqa: E731
+                count = lambda: queryset.count()  # noqa: E731
+                results["cases"][name][label] = {
+                    "page": summarize(time_call(page, opts["iterations"])),
+                    "count": summarize(time_call(count, opts["iterations"])),
+                }
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_partition_pruning")
+
+        if not opts["keep"]:
+            clear_copied()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"postgresql | {results['rows']} rows | {results['partitions'] or 'no'} partitions")
+        self.stdout.write(f"{'case':20} {'layout':14} {'page p50':>10} {'page p99':>10} {'count p50':>10} {'count p99':>10}")
+        for name, by_label in results["cases"].items():
+            for label, case in by_label.items():
+                self.stdout.write(
+                    f"{name:20} {label:14} {case['page']['p50_ms']:>10.3f} {case['page']['p99_ms']:>10.3f} "
+                    f"{case['count']['p50_ms']:>10.3f} {case['count']['p99_ms']:>10.3f}"
+                )
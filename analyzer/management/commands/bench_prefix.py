@@ -0,0 +1,60 @@
+import json
+import random
+import sys
+import time
+from django.core.management.base import BaseCommand
+from analyzer.benchmarking import templated_corpus
+from analyzer.utils import PrefixCache, analyze_string
+
+
+def approx_size(cache) -> int:
+    """Bytes held by the cached prefixes and count maps (hash states are opaque, ~200 B each)."""
+    total = sys.getsizeof(cache._entries)
+    for prefix, (counts, _hasher, _words, _in_word) in list(cache._entries.items()):
+        total += sys.getsizeof(prefix) + sys.getsizeof(counts) + 200
+    return total
+
+
+class Command(BaseCommand):
+    # PrefixCache is checked against analyze_string in analyzer/tests.py
+    help = "Compare analyze_string with prefix-aware analysis on a templated-message corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20000)
+        parser.add_argument("--body-lengths", default="32,128,512,900")
+        parser.add_argument("--templates", type=int, default=20)
+        parser.add_argument("--entries", type=int, default=4096)
+        parser.add_argument("--stride", type=int, default=64)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(7)
+        rows = []
+        for body_length in map(int, opts["body_lengths"].split(",")):
+            values = templated_corpus(opts["count"], body_length, opts["templates"], rng)
+            cache = PrefixCache(opts["entries"], opts["stride"])
+            row = {"body_length": body_length, "mean_length": round(sum(map(len, values)) / len(values))}
+            for name, analyze in (("analyze_string", analyze_string), ("prefix_cache", cache.analyze)):
+                start = time.perf_counter()
+                for value in values:
+                    analyze(value)
+                row[name] = round(len(values) / (time.perf_counter() - start))
+            stats = cache.stats()
+            lookups = stats["hits"] + stats["misses"]  # strings under 2 * stride skip the cache
+            row["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            row["entries"] = stats["size"]
+            row["cache_kib"] = round(approx_size(cache) / 1024)
+            rows.append(row)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(
+            f"{'body':>6} {'mean len':>9} {'analyze_string/s':>17} {'prefix_cache/s':>15} "
+            f"{'hit rate':>9} {'entries':>8} {'KiB':>7}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['body_length']:>6} {row['mean_length']:>9} {row['analyze_string']:>17} "
+                f"{row['prefix_cache']:>15} {row['hit_rate']:>9} {row['entries']:>8} {row['cache_kib']:>7}"
+            )
@@ -0,0 +1,77 @@
+import gc
+import json
+import time
+from unittest import mock
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from analyzer import renderers
+from analyzer.benchmarking import SEED_PREFIX, clear_seeded, seed_records
+from analyzer.models import StringRecord
+from analyzer.pagination import KEYSET_ORDERING
+from analyzer.serializers import StringRecordSerializer, row_values, serialize_rows
+
+
+def render_drf(queryset):
+    return JSONRenderer().render({"data": StringRecordSerializer(queryset, many=True).data})
+
+
+def render_fast(queryset):
+    return renderers.dumps({"data": serialize_rows(row_values(queryset))})
+
+
+def render_fast_stdlib(queryset):
+    with mock.patch.object(renderers, "orjson", None):
+        return render_fast(queryset)
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of the DRF serializer with the values_list fast path used by list responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+        parser.add_argument("--iterations", type=int, default=3)
+        parser.add_argument("--skip-seed", action="store_true")
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            seed_records(max(opts["sizes"]))
+
+        paths = {"drf": render_drf, "fast_stdlib": render_fast_stdlib}
+        if renderers.orjson is not None:
+            paths["fast_orjson"] = render_fast
+
+        seeded = StringRecord.objects.filter(value__startswith=SEED_PREFIX).order_by(*KEYSET_ORDERING)
+        results = []
+        for size in opts["sizes"]:
+            queryset = seeded[:size]
+            bodies = {}
+            row = {"rows": size}
+            for label, render in paths.items():
+                best = None
+                for _ in range(opts["iterations"]):
+                    bodies.pop(label, None)
+                    gc.collect()
+                    start = time.perf_counter()
+                    bodies[label] = render(queryset.all())  # fresh clone: no cached rows
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                row[f"{label}_rows_per_sec"] = round(size / best)
+            if len(set(bodies.values())) != 1:
+                raise CommandError(f"fast path output differs from DRF at {size} rows")
+            row["bytes"] = len(bodies["drf"])
+            results.append(row)
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'rows':>8} " + " ".join(f"{label + ' rows/s':>20}" for label in paths))
+        for row in results:
+            self.stdout.write(
+                f"{row['rows']:>8} " + " ".join(f"{row[f'{label}_rows_per_sec']:>20}" for label in paths)
+            )
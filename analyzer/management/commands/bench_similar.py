@@ -0,0 +1,93 @@
+import json
+import random
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import connection
+from analyzer.benchmarking import clear_seeded, seed_records, summarize, synthetic_values, time_call
+from analyzer.models import StringRecord
+from analyzer.similarity import distance, find_similar, letter_vector
+
+
+def perturb(value, edits, rng) -> str:
+    """``value`` shuffled, with ``edits`` characters dropped or added."""
+    characters = list(value)
+    rng.shuffle(characters)
+    for _ in range(edits):
+        if characters and rng.random() < 0.5:
+            characters.pop(rng.randrange(len(characters)))
+        else:
+            characters.insert(rng.randrange(len(characters) + 1), rng.choice("aeiourst"))
+    return "".join(characters)
+
+
+def find_similar_scan(value, max_distance, limit) -> list:
+    # Reference implementation: decode every stored frequency map and compare
+    query = letter_vector(Counter(value))
+    found = []
+    rows = StringRecord.objects.values_list("id", "character_frequency_map").iterator(chunk_size=2000)
+    for pk, frequency_map in rows:
+        row_distance = distance(query, letter_vector(frequency_map))
+        if row_distance <= max_distance:
+            found.append((row_distance, pk))
+    return sorted(found)[:limit]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /strings/similar lookups (anagram key and sketch rings) against a full "
+        "scan of the stored frequency maps on the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000, help="Synthetic rows to seed first")
+        parser.add_argument("--queries", type=int, default=50, help="Distinct query strings per distance")
+        parser.add_argument("--distances", default="0,1,2,4")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--scan-queries", type=int, default=3, help="Queries timed with the full scan; 0 = skip")
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse rows seeded by an earlier run")
+        parser.add_argument("--keep", action="store_true", help="Leave the seeded rows in place")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        if not opts["skip_seed"]:
+            clear_seeded()
+            self.stderr.write(f"Seeding {opts['rows']} rows on {connection.vendor}...")
+            seed_records(opts["rows"], progress=lambda n: self.stderr.write(f"  {n}", ending="\r"))
+            self.stderr.write("")
+
+        rng = random.Random(7)
+        values = list(synthetic_values(opts["rows"]))
+        sample = rng.sample(values, min(opts["queries"], len(values)))
+        results = {"vendor": connection.vendor, "rows": StringRecord.objects.count(), "cases": {}}
+        for max_distance in [int(d) for d in opts["distances"].split(",")]:
+            queries = [perturb(value, rng.randint(0, max_distance), rng) for value in sample]
+            matches = []
+            samples = []
+            for query in queries:
+                samples += time_call(lambda: matches.append(len(find_similar(query, max_distance, opts["limit"]))), 1, 0)
+            case = {"indexed": summarize(samples), "mean_matches": round(sum(matches) / len(matches), 2)}
+
+            if opts["scan_queries"]:
+                scan = []
+                for query in queries[:opts["scan_queries"]]:
+                    expected = [d for d, _ in find_similar_scan(query, max_distance, opts["limit"])]
+                    if [d for d, _ in find_similar(query, max_distance, opts["limit"])] != expected:
+                        self.stderr.write(self.style.ERROR(f"distance mismatch for {query!r}"))
+                    scan += time_call(lambda: find_similar_scan(query, max_distance, opts["limit"]), 1, 0)
+                case["scan"] = summarize(scan)
+            results["cases"][max_distance] = case
+
+        if not opts["keep"]:
+            clear_seeded()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['vendor']} | {results['rows']} rows | limit {opts['limit']}")
+        self.stdout.write(f"{'max_distance':>12} {'p50 ms':>9} {'p99 ms':>9} {'matches':>8} {'scan p50 ms':>12}")
+        for max_distance, case in results["cases"].items():
+            scan = f"{case['scan']['p50_ms']:>12.1f}" if "scan" in case else f"{'-':>12}"
+            self.stdout.write(
+                f"{max_distance:>12} {case['indexed']['p50_ms']:>9.2f} {case['indexed']['p99_ms']:>9.2f} "
+                f"{case['mean_matches']:>8} {scan}"
+            )
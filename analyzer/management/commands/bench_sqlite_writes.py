@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.benchmarking import SEED_PREFIX, gunicorn_server, summarize
+from analyzer.loadgen import run_load
+
+# Environment overrides per mode; the server reads them through settings.py
+MODES = {
+    "default": {"DB_SQLITE_TUNED": "false", "ANALYZER_WRITE_BATCHING": "false"},
+    "tuned": {"DB_SQLITE_TUNED": "true", "ANALYZER_WRITE_BATCHING": "false"},
+    "tuned_batched": {"DB_SQLITE_TUNED": "true", "ANALYZER_WRITE_BATCHING": "true"},
+    "write_behind_journal": {"DB_SQLITE_TUNED": "true", "ANALYZER_WRITE_ACK": "journal"},
+    "write_behind_queued": {"DB_SQLITE_TUNED": "true", "ANALYZER_WRITE_ACK": "queued"},
+}
+
+
+def fresh_database(directory, mode, env) -> str:
+    path = os.path.join(directory, f"{mode}.sqlite3")
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "-v", "0"], cwd=settings.BASE_DIR, check=True,
+        env={**os.environ, **env, "DB_NAME": path}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return path
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent POST /strings requests to gunicorn on SQLite with the default settings, "
+        "with DB_SQLITE_TUNED, with write batching and write-behind; report write throughput, "
+        "latency, error rate and how many acknowledged writes were stored."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn processes writing to the same file")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--reads", type=float, default=0.0, help="Share of GET /strings requests mixed in")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--modes", default=",".join(MODES))
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        if settings.DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("bench_sqlite_writes compares SQLite settings; unset DB_ENGINE")
+        modes = [mode.strip() for mode in opts["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"unknown modes: {', '.join(sorted(unknown))}")
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in modes:
+                results[mode] = self.run_mode(mode, directory, opts)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'mode':21} {'writes/s':>9} {'errors':>7} {'error %':>8} {'p50 ms':>8} {'p99 ms':>9} {'stored':>7}  statuses"
+        )
+        for mode in modes:
+            row = results[mode]
+            self.stdout.write(
+                f"{mode:21} {row['writes_per_s']:>9} {row['failed']:>7} {row['error_pct']:>8} "
+                f"{row['write_latency']['p50_ms']:>8.1f} {row['write_latency']['p99_ms']:>9.1f} "
+                f"{row['stored']:>7}  {row['statuses']}"
+            )
+
+    def run_mode(self, mode, directory, opts) -> dict:
+        env = {**MODES[mode], "ANALYZER_METRICS_ENABLED": "false"}
+        env["ANALYZER_WRITE_JOURNAL_DIR"] = os.path.join(directory, f"{mode}-journal")
+        env["DB_NAME"] = fresh_database(directory, mode, env)
+        rng = random.Random(5)
+        requests = []
+        for i in range(opts["requests"]):
+            if rng.random() < opts["reads"]:
+                requests.append(("GET", "/strings?page_size=20", None, "read"))
+            else:
+                body = json.dumps({"value": f"{SEED_PREFIX}write {mode} {i}"}).encode()
+                requests.append(("POST", "/strings", body, "write"))
+        try:
+            with gunicorn_server(opts["port"], env, opts["workers"], opts["threads"]) as url:
+                run_load(url, [("GET", "/strings?page_size=1", None)] * opts["concurrency"], opts["concurrency"])
+                result, elapsed = run_load(url, requests, opts["concurrency"])
+        except RuntimeError as exc:
+            raise CommandError(f"{mode}: {exc}")
+
+        writes = result.by_endpoint.get("write", [])
+        # 202 is a write-behind acknowledgement; gunicorn has stopped by now, and its
+        # workers flush what they accepted on the way out
+        created = result.statuses.get(201, 0) + result.statuses.get(202, 0)
+        failed = len(writes) - created + result.errors
+        with sqlite3.connect(env["DB_NAME"]) as db:
+            stored = db.execute("SELECT COUNT(*) FROM analyzer_stringrecord WHERE value LIKE ?",
+                                (f"{SEED_PREFIX}write %",)).fetchone()[0]
+        return {
+            "workers": opts["workers"],
+            "threads": opts["threads"],
+            "concurrency": opts["concurrency"],
+            "writes": len(writes),
+            "created": created,
+            "stored": stored,
+            "failed": failed,
+            "error_pct": round(failed / len(writes) * 100, 2) if writes else 0.0,
+            "writes_per_s": round(created / elapsed, 1),
+            "statuses": {str(code): count for code, count in sorted(result.statuses.items())},
+            "write_latency": summarize(writes),
+            "read_latency": summarize(result.by_endpoint.get("read", [])),
+        }
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from analyzer.models import StringRecord, StringStatistic
+from analyzer.statistics import compute_counters
+
+
+class Command(BaseCommand):
+    help = "Compare the maintained StringStatistic counters with a recount of StringRecord."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Overwrite the counters with the recount")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            # Lock the counters so no insert/delete commits between the recount and the repair
+            stored = {
+                stat.key: stat.count
+                for stat in StringStatistic.objects.select_for_update().order_by("key")
+            }
+            actual = compute_counters(StringRecord.objects.all())
+
+            mismatches = {
+                key: (stored.get(key, 0), actual.get(key, 0))
+                for key in sorted(set(stored) | set(actual))
+                if stored.get(key, 0) != actual.get(key, 0)
+            }
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f"{len(actual)} counters consistent"))
+                return
+
+            for key, (have, want) in mismatches.items():
+                self.stdout.write(f"{key}: stored {have}, actual {want}")
+
+            if not opts["repair"]:
+                raise CommandError(f"{len(mismatches)} counters differ; rerun with --repair to fix them")
+
+            # Counters are corrected in place: a writer blocked on one of the locked rows
+            # runs its UPDATE ... SET count = count + n against the repaired row once this
+            # commits, where a deleted and recreated row would lose its delta. Counters
+            # that should not exist are zeroed, not deleted, for the same reason.
+            StringStatistic.objects.bulk_create(
+                [StringStatistic(key=key) for key in mismatches if key not in stored], ignore_conflicts=True
+            )
+            for key in mismatches:
+                StringStatistic.objects.filter(key=key).update(count=actual.get(key, 0))
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(mismatches)} counters"))
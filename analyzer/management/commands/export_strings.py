@@ -0,0 +1,93 @@
+import zlib
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from analyzer.models import StringRecord
+from analyzer.renderers import dumps_line
+from analyzer.serializers import output_timezone, row_values, serialize_row
+from analyzer.transfer import Progress, open_output, read_checkpoint, write_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every StringRecord to NDJSON (the GET /strings?format=ndjson line format), "
+        "gzip-compressed for .gz paths, in primary-key order through a server-side cursor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='Output file, or "-" for stdout')
+        parser.add_argument("--gzip", action="store_true", help="Compress even without a .gz suffix")
+        parser.add_argument("--compress-level", type=int, default=6)
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Rows fetched and written per round trip (default ANALYZER_STREAM_CHUNK_SIZE)")
+        parser.add_argument("--after", metavar="ID", help="Export only ids greater than ID, as printed by an earlier run")
+        parser.add_argument("--checkpoint", metavar="FILE",
+                            help="Record the last id written after every chunk; start after it if it exists")
+        parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines")
+
+    def handle(self, *args, **opts):
+        after = opts["after"]
+        if after is None and opts["checkpoint"]:
+            after = read_checkpoint(opts["checkpoint"])
+            if after:
+                self.stderr.write(f"Resuming after id {after} ({opts['checkpoint']})")
+        chunk_size = opts["chunk_size"] or settings.ANALYZER_STREAM_CHUNK_SIZE
+        compress = opts["gzip"] or opts["path"].endswith(".gz")
+
+        queryset = StringRecord.objects.order_by("id")
+        if after:
+            queryset = queryset.filter(id__gt=after)
+        # iterator() reads through a server-side cursor on PostgreSQL and in chunks elsewhere
+        rows = row_values(queryset).iterator(chunk_size=chunk_size)
+
+        try:
+            out, raw = open_output(opts["path"], compress, opts["compress_level"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        progress = Progress(self.stderr.write, opts["progress_every"])
+        tz = output_timezone()
+        written = 0
+        last_id = committed_id = after
+        lines = []
+        try:
+            for row in rows:
+                lines.append(dumps_line(serialize_row(row, tz)))
+                last_id = row.id
+                if len(lines) >= chunk_size:
+                    written += self.write_chunk(out, lines, compress, opts["checkpoint"], last_id)
+                    committed_id = last_id
+                    lines = []
+                    progress.update(written, f" | last id {last_id} (--after {last_id})")
+            if lines:
+                written += self.write_chunk(out, lines, compress, opts["checkpoint"], last_id)
+        except KeyboardInterrupt:
+            raise CommandError(
+                f"Interrupted after {written} rows; resume into a new file with --after {committed_id}"
+            )
+        finally:
+            if out is not raw:
+                out.close()  # writes the gzip trailer; leaves stdout open
+            if opts["path"] != "-":
+                raw.close()
+            else:
+                raw.flush()
+
+        progress.update(written, f" | last id {last_id}", force=True)
+        target = "stdout" if opts["path"] == "-" else opts["path"]
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {written} strings to {target}{' (gzip)' if compress else ''}"
+        ))
+
+    @staticmethod
+    def write_chunk(out, lines, compress, checkpoint, last_id) -> int:
+        out.write(b"".join(lines))
+        if compress:
+            # A sync point per chunk keeps everything written so far decompressible
+            # even if the run is killed before the gzip trailer
+            out.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            out.flush()
+        if checkpoint:
+            write_checkpoint(checkpoint, last_id)
+        reset_queries()  # keeps DEBUG's query log from growing with the table
+        return len(lines)
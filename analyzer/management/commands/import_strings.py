@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from analyzer.executor import get_executor
+from analyzer.services import build_record, store_new_records
+from analyzer.transfer import (
+    FORMATS, INVALID, Progress, detect_format, open_input, read_checkpoint, read_values, write_checkpoint,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream strings from an NDJSON, CSV or plain-text file (optionally .gz, or - for stdin) "
+        "into StringRecord in analyzed, chunked batches; already stored strings are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='Input file, or "-" for stdin')
+        parser.add_argument("--format", choices=("auto",) + FORMATS, default="auto",
+                            help="Default: from the extension (.ndjson/.jsonl, .csv, anything else is text)")
+        parser.add_argument("--column", default="value", help="CSV header name, or a zero-based index if no header")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Strings analyzed and committed together")
+        parser.add_argument("--resume-from", type=int, default=None, metavar="OFFSET",
+                            help="Byte offset to start at, as printed by an earlier run")
+        parser.add_argument("--checkpoint", metavar="FILE",
+                            help="Record the offset after every committed batch; resume from it if it exists")
+        parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines")
+
+    def handle(self, *args, **opts):
+        start = opts["resume_from"]
+        if start is None and opts["checkpoint"]:
+            start = int(read_checkpoint(opts["checkpoint"]) or 0)
+            if start:
+                self.stderr.write(f"Resuming from byte {start} ({opts['checkpoint']})")
+        fmt = detect_format(opts["path"], opts["format"])
+        executor = get_executor()
+        totals = {"created": 0, "duplicate": 0, "invalid": 0}
+        progress = Progress(self.stderr.write, opts["progress_every"], unit="lines")
+        committed = start or 0
+
+        def flush(values, offset):
+            nonlocal committed
+            records = [build_record(value, props) for value, props in zip(values, executor.analyze(values))]
+            created = len(store_new_records(records))
+            totals["created"] += created
+            totals["duplicate"] += len(values) - created
+            committed = offset
+            reset_queries()  # with DEBUG on, every INSERT's SQL would otherwise stay in memory
+            if opts["checkpoint"]:
+                write_checkpoint(opts["checkpoint"], offset)
+
+        try:
+            stream = open_input(opts["path"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        batch = []
+        seen = 0
+        try:
+            with stream:
+                for value, offset in read_values(stream, fmt, start or 0, opts["column"]):
+                    seen += 1
+                    if value is INVALID:
+                        totals["invalid"] += 1
+                        continue
+                    batch.append(value)
+                    if len(batch) >= opts["batch_size"]:
+                        flush(batch, offset)
+                        batch = []
+                        progress.update(seen, self.detail(totals, committed))
+                if batch:
+                    flush(batch, offset)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        except KeyboardInterrupt:
+            raise CommandError(f"Interrupted; resume with --resume-from {committed}")
+
+        progress.update(seen, self.detail(totals, committed), force=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} strings ({totals['duplicate']} already stored, "
+            f"{totals['invalid']} invalid) in {fmt} format with batch size {opts['batch_size']} "
+            f"and the {settings.ANALYZER_EXECUTOR_MODE} executor"
+        ))
+
+    @staticmethod
+    def detail(totals, offset) -> str:
+        return (
+            f" | created {totals['created']}, duplicate {totals['duplicate']}, invalid {totals['invalid']}"
+            f" | committed up to byte {offset} (--resume-from {offset})"
+        )
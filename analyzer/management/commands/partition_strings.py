@@ -0,0 +1,129 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from analyzer.models import StringRecord
+
+DEFAULT_BOUNDS = "16,32,48,64,80,96,112,128,256,1024"
+
+
+def partition_sql(table, bounds) -> list:
+    """
+    Statements that rebuild ``table`` as a PostgreSQL table range-partitioned on length,
+    one partition per interval between ``bounds`` plus one below and one above them.
+
+    A partitioned table's primary key must contain the partition key, so it becomes
+    (id, length). That enforces the same uniqueness as id alone: the id is the sha256
+    of the value, so it determines the length; for the same reason the unique index on
+    value becomes one on (value, length). The foreign key from StringCharacter cannot
+    reference id alone any more and is dropped; Django still cascades record deletes
+    to the character rows itself.
+    """
+    quote = connection.ops.quote_name
+    staging = f"{table}_partitioned"
+    edges = ["MINVALUE", *map(str, bounds), "MAXVALUE"]
+    statements = [
+        f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE",
+        f"CREATE TABLE {quote(staging)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (length)",
+    ]
+    for low, high in zip(edges, edges[1:]):
+        name = f"{table}_len_{low.lower()}_{high.lower()}"
+        statements.append(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(staging)} FOR VALUES FROM ({low}) TO ({high})"
+        )
+    statements += [
+        f"INSERT INTO {quote(staging)} SELECT * FROM {quote(table)}",
+        f"DROP TABLE {quote(table)} CASCADE",
+        f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}",
+        f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} PRIMARY KEY (id, length)",
+    ]
+    return statements
+
+
+def secondary_indexes(cursor, table) -> list:
+    """
+    CREATE INDEX statements of ``table``'s indexes other than its primary key, with
+    length appended to the columns of unique ones, as partitioning requires.
+    """
+    cursor.execute(
+        "SELECT i.indexdef FROM pg_indexes i JOIN pg_class c ON c.relname = i.indexname "
+        "JOIN pg_index x ON x.indexrelid = c.oid "
+        "WHERE i.schemaname = current_schema() AND i.tablename = %s AND NOT x.indisprimary ORDER BY i.indexname",
+        [table],
+    )
+    statements = []
+    for (definition,) in cursor.fetchall():
+        if definition.startswith("CREATE UNIQUE INDEX"):
+            definition = re.sub(r"\(([^()]*)\)$", r"(\1, length)", definition)
+        statements.append(definition)
+    return statements
+
+
+def partitions(cursor, table) -> list:
+    """(name, bound expression, estimated rows) per partition, or [] when ``table`` is not partitioned."""
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s AND p.relnamespace = current_schema()::regnamespace",
+        [table],
+    )
+    return sorted(cursor.fetchall(), key=lambda row: _lower_bound(row[1]))
+
+
+def _lower_bound(bound) -> float:
+    match = re.search(r"FROM \((\d+)\)", bound)
+    return int(match.group(1)) if match else float("-inf")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the StringRecord table on PostgreSQL as range partitions on length, so queries "
+        "with min_length/max_length only read the partitions that can match. Run it once, "
+        "during a maintenance window: the table is locked while its rows are copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bounds", default=DEFAULT_BOUNDS,
+                            help="Increasing length boundaries between partitions")
+        parser.add_argument("--dry-run", action="store_true", help="Print the SQL without running it")
+        parser.add_argument("--status", action="store_true", help="List the current partitions")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                "partition_strings needs PostgreSQL; SQLite has no table partitioning, and its "
+                "length filters are served by strrec_length_idx"
+            )
+        table = StringRecord._meta.db_table
+        with connection.cursor() as cursor:
+            existing = partitions(cursor, table)
+            if opts["status"]:
+                if not existing:
+                    self.stdout.write(f"{table} is not partitioned")
+                for name, bound, rows in existing:
+                    self.stdout.write(f"{name:44} {bound:44} ~{max(rows, 0)} rows")
+                return
+            if existing:
+                raise CommandError(f"{table} is already partitioned ({len(existing)} partitions)")
+
+            try:
+                bounds = [int(bound) for bound in opts["bounds"].split(",") if bound.strip()]
+            except ValueError:
+                raise CommandError("--bounds must be comma-separated integers")
+            if not bounds or bounds != sorted(set(bounds)) or bounds[0] <= 0:
+                raise CommandError("--bounds must be increasing positive integers")
+
+            statements = partition_sql(table, bounds) + secondary_indexes(cursor, table)
+            # Outside the transaction (VACUUM cannot run in one): sets the visibility map of
+            # the copied rows, so counts can use index-only scans straight away
+            vacuum = f"VACUUM (ANALYZE) {connection.ops.quote_name(table)}"
+            if opts["dry_run"]:
+                for statement in statements + [vacuum]:
+                    self.stdout.write(statement + ";")
+                return
+            with transaction.atomic():
+                for statement in statements:
+                    cursor.execute(statement)
+            cursor.execute(vacuum)
+            created = partitions(cursor, table)
+        self.stdout.write(self.style.SUCCESS(f"{table} now has {len(created)} length partitions"))
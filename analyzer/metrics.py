@@ -0,0 +1,253 @@
+# analyzer/metrics.py
+"""
+Per-process request metrics in Prometheus text format.
+
+MetricsMiddleware counts every request and, for the sampled share
+(ANALYZER_METRICS_SAMPLE_RATE), records its duration, the number of DB queries it ran
+and the time spent in each hot-path phase marked with ``timed``/``phase``. Outside a
+sampled request those markers cost one context-variable lookup.
+"""
+import functools
+import hmac
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# The sample of the request being handled, or None when it is not sampled
+_current = ContextVar("analyzer_metrics_sample", default=None)
+
+
+class Sample:
+    __slots__ = ("phases", "queries")
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            labels = _labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {count}'
+            yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {series[-1]}'
+            yield f"{self.name}_sum{{{labels}}} {series[-2]:.6f}"
+            yield f"{self.name}_count{{{labels}}} {series[-1]}"
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_values, value in sorted(snapshot.items()):
+            yield f"{self.name}{{{_labels(self.labels, label_values)}}} {value}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _labels(names, values) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUESTS = Counter("analyzer_requests_total", "Requests handled, sampled or not.", ("route", "method", "status"))
+SAMPLED = Counter("analyzer_sampled_requests_total", "Requests whose timings were recorded.", ("route", "method"))
+REQUEST_SECONDS = Histogram(
+    "analyzer_request_duration_seconds", "Time in the Django handler, sampled requests only.",
+    ("route", "method"), DURATION_BUCKETS,
+)
+PHASE_SECONDS = Histogram(
+    "analyzer_phase_duration_seconds", "Time per hot-path phase within a sampled request.",
+    ("route", "phase"), DURATION_BUCKETS,
+)
+QUERIES = Histogram("analyzer_db_queries_per_request", "DB queries per sampled request.", ("route",), QUERY_BUCKETS)
+METRICS = (REQUESTS, SAMPLED, REQUEST_SECONDS, PHASE_SECONDS, QUERIES)
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as ``name`` when the current request is sampled."""
+    sample = _current.get()
+    if sample is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.add(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of ``phase``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sample = _current.get()
+            if sample is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sample.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Installed on every DB connection (see AnalyzerConfig.ready). Counts the query and
+    its time against the sampled request, including from sync_to_async threads, which
+    inherit the request's context.
+    """
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    sample.queries += 1
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.add("db", time.perf_counter() - start)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.ANALYZER_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.ANALYZER_METRICS_SAMPLE_RATE
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample, token, start = self.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, sample, start)
+        return response
+
+    async def __acall__(self, request):
+        sample, token, start = self.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, sample, start)
+        return response
+
+    def begin(self):
+        sample = Sample() if random.random() < self.sample_rate else None
+        return sample, _current.set(sample), time.perf_counter()
+
+    @staticmethod
+    def finish(request, response, sample, start):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        REQUESTS.inc((route, request.method, response.status_code))
+        if sample is None:
+            return
+        REQUEST_SECONDS.observe((route, request.method), time.perf_counter() - start)
+        SAMPLED.inc((route, request.method))
+        QUERIES.observe((route,), sample.queries)
+        for name, seconds in sample.phases.items():
+            PHASE_SECONDS.observe((route, name), seconds)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.clear()
+
+
+def metrics_view(request):
+    """
+    GET /metrics → this worker's metrics in Prometheus text format; 404 with metrics
+    off, 401 without the bearer token when ANALYZER_METRICS_TOKEN is set.
+    """
+    if not settings.ANALYZER_METRICS_ENABLED:
+        raise Http404
+    token = settings.ANALYZER_METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get("Authorization", "").encode(),
+                                         f"Bearer {token}".encode()):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_existing_records(apps, schema_editor):
+    StringRecord = apps.get_model("analyzer", "StringRecord")
+    StringCharacter = apps.get_model("analyzer", "StringCharacter")
+    rows = []
+    for pk, freq_map in StringRecord.objects.values_list("id", "character_frequency_map").iterator(chunk_size=2000):
+        rows.extend(
+            StringCharacter(record_id=pk, character=ch)
+            for ch in {c.lower() for c in freq_map}
+        )
+        if len(rows) >= 5000:
+            StringCharacter.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    StringCharacter.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StringCharacter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character', models.CharField(max_length=4)),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='characters', to='analyzer.stringrecord')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('character', 'record'), name='unique_character_per_record')],
+            },
+        ),
+        migrations.RunPython(index_existing_records, migrations.RunPython.noop),
+    ]
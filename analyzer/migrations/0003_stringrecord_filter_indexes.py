@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0002_stringcharacter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(fields=['created_at', 'id'], name='strrec_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(fields=['length'], name='strrec_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(fields=['word_count', 'length'], name='strrec_words_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(condition=models.Q(('is_palindrome', True)), fields=['length'], name='strrec_pal_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(condition=models.Q(('is_palindrome', True)), fields=['word_count'], name='strrec_pal_words_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:08
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def count_existing_records(apps, schema_editor):
+    # Same counters as analyzer.statistics.compute_counters, against the historical model
+    StringRecord = apps.get_model("analyzer", "StringRecord")
+    StringStatistic = apps.get_model("analyzer", "StringStatistic")
+    counters = Counter()
+    for length, is_palindrome, word_count in StringRecord.objects.values_list(
+        "length", "is_palindrome", "word_count"
+    ).iterator(chunk_size=5000):
+        counters["total"] += 1
+        counters[f"word_count:{word_count}"] += 1
+        counters[f"length_bucket:{length.bit_length()}"] += 1
+        if is_palindrome:
+            counters["palindromes"] += 1
+    StringStatistic.objects.bulk_create(
+        [StringStatistic(key=key, count=count) for key, count in counters.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0003_stringrecord_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StringStatistic',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_existing_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:20
+
+import analyzer.fields
+from django.db import migrations, models
+
+
+def pack_frequency_maps(apps, schema_editor):
+    StringRecord = apps.get_model("analyzer", "StringRecord")
+    batch = []
+    for pk, freq_map in StringRecord.objects.values_list("id", "character_frequency_map").iterator(chunk_size=2000):
+        batch.append(StringRecord(id=pk, character_frequency_packed=freq_map))
+        if len(batch) >= 2000:
+            StringRecord.objects.bulk_update(batch, ["character_frequency_packed"])
+            batch = []
+    StringRecord.objects.bulk_update(batch, ["character_frequency_packed"])
+
+
+def unpack_frequency_maps(apps, schema_editor):
+    StringRecord = apps.get_model("analyzer", "StringRecord")
+    batch = []
+    for pk, packed in StringRecord.objects.values_list("id", "character_frequency_packed").iterator(chunk_size=2000):
+        batch.append(StringRecord(id=pk, character_frequency_map=packed.to_dict()))
+        if len(batch) >= 2000:
+            StringRecord.objects.bulk_update(batch, ["character_frequency_map"])
+            batch = []
+    StringRecord.objects.bulk_update(batch, ["character_frequency_map"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0004_stringstatistic'),
+    ]
+
+    # The JSON column is copied into a new binary one and then swapped in by name;
+    # the nullable steps keep every operation reversible on a populated table.
+    operations = [
+        migrations.AlterField(
+            model_name='stringrecord',
+            name='character_frequency_map',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='stringrecord',
+            name='character_frequency_packed',
+            field=analyzer.fields.FrequencyMapField(null=True),
+        ),
+        migrations.RunPython(pack_frequency_maps, unpack_frequency_maps),
+        migrations.RemoveField(
+            model_name='stringrecord',
+            name='character_frequency_map',
+        ),
+        migrations.RenameField(
+            model_name='stringrecord',
+            old_name='character_frequency_packed',
+            new_name='character_frequency_map',
+        ),
+        migrations.AlterField(
+            model_name='stringrecord',
+            name='character_frequency_map',
+            field=analyzer.fields.FrequencyMapField(),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:33
+
+from django.db import migrations, models
+from analyzer.similarity import similarity_keys
+
+
+def fill_similarity_keys(apps, schema_editor):
+    StringRecord = apps.get_model("analyzer", "StringRecord")
+    batch = []
+    for pk, freq_map in StringRecord.objects.values_list("id", "character_frequency_map").iterator(chunk_size=2000):
+        batch.append(StringRecord(id=pk, **similarity_keys(freq_map)))
+        if len(batch) >= 2000:
+            StringRecord.objects.bulk_update(batch, ["anagram_key", "sketch"])
+            batch = []
+    StringRecord.objects.bulk_update(batch, ["anagram_key", "sketch"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0005_pack_character_frequency_map'),
+    ]
+
+    # Keys are filled in before the indexes are built, so the backfill does not
+    # maintain them row by row
+    operations = [
+        migrations.AddField(
+            model_name='stringrecord',
+            name='anagram_key',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='stringrecord',
+            name='sketch',
+            field=models.CharField(default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_similarity_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(fields=['anagram_key'], name='strrec_anagram_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringrecord',
+            index=models.Index(fields=['sketch'], name='strrec_sketch_idx'),
+        ),
+    ]
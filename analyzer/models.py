@@ -2,6 +2,8 @@
 import hashlib
 from django.db import models
 from django.utils import timezone
+from .fields import FrequencyMapField
+from .similarity import similarity_keys
 
 class StringRecord(models.Model):
     id = models.CharField(max_length=64, primary_key=True, editable=False)  # sha256 hex
@@ -11,9 +13,24 @@ class StringRecord(models.Model):
     unique_characters = models.IntegerField()
     word_count = models.IntegerField()
     sha256_hash = models.CharField(max_length=64)  # duplicate but explicit
-    character_frequency_map = models.JSONField()
+    character_frequency_map = FrequencyMapField()  # packed; decoded lazily on access
+    # Keys of the case-folded letter vector for /strings/similar; see analyzer/similarity.py
+    anagram_key = models.CharField(max_length=32, default="", editable=False)
+    sketch = models.CharField(max_length=40, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Chosen for the GET /strings filter combinations; see analyzer/filters.py
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="strrec_created_id_idx"),
+            models.Index(fields=["length"], name="strrec_length_idx"),
+            models.Index(fields=["word_count", "length"], name="strrec_words_length_idx"),
+            models.Index(fields=["length"], condition=models.Q(is_palindrome=True), name="strrec_pal_length_idx"),
+            models.Index(fields=["word_count"], condition=models.Q(is_palindrome=True), name="strrec_pal_words_idx"),
+            models.Index(fields=["anagram_key"], name="strrec_anagram_idx"),
+            models.Index(fields=["sketch"], name="strrec_sketch_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         # compute sha256 and set id if not provided
         import hashlib
@@ -21,7 +38,49 @@ class StringRecord(models.Model):
         self.sha256_hash = sha
         if not self.id:
             self.id = sha
+        if not self.anagram_key:
+            for field, key in similarity_keys(self.character_frequency_map).items():
+                setattr(self, field, key)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.value
+
+
+# Longest value a record holds. Longer values are rejected before they are analyzed:
+# PostgreSQL's multi-row INSERT casts to varchar(1000) and would silently truncate them.
+MAX_VALUE_LENGTH = StringRecord._meta.get_field("value").max_length
+VALUE_TOO_LONG = f"'value' is longer than {MAX_VALUE_LENGTH} characters"
+
+
+class StringCharacter(models.Model):
+    # One row per distinct case-folded character of a record, so contains_character
+    # filters resolve through the (character, record) index instead of a LIKE scan
+    record = models.ForeignKey(StringRecord, on_delete=models.CASCADE, related_name="characters")
+    character = models.CharField(max_length=4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["character", "record"], name="unique_character_per_record"),
+        ]
+
+    @staticmethod
+    def fold(character: str) -> str:
+        return character.lower()
+
+    @classmethod
+    def rows_for(cls, record_id: str, frequency_map) -> list:
+        folded = {cls.fold(ch) for ch in frequency_map}
+        return [cls(record_id=record_id, character=ch) for ch in folded]
+
+    def __str__(self):
+        return f"{self.record_id}:{self.character}"
+
+
+class StringStatistic(models.Model):
+    # Counters kept in step with StringRecord inserts/deletes; see analyzer/statistics.py
+    key = models.CharField(max_length=64, primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.count}"
@@ -0,0 +1,317 @@
+# analyzer/nlquery.py
+"""
+Natural-language filters, e.g. "palindromes longer than 5 that contain the letter a or
+strings of 2 to 3 words without z". A small recursive-descent grammar over word tokens:
+
+    query     := or_expr
+    or_expr   := and_expr ("or" and_expr)*
+    and_expr  := unary (["and" | "," | "but"] unary)*
+    unary     := ("not" | "no" | "non") unary | ("without" | "excluding") letters
+               | "(" or_expr ")" | predicate
+    predicate := palindrome | "longer than" N | "shorter than" N | "length" bound
+               | ("contain" | "with" ...) letters | letters | bound ("words" | "characters")
+    bound     := N | "exactly" N | "between" N "and" N | N "to" N | "more than" N
+               | "at least" N | "fewer than" N | "at most" N | N "or more" | ...
+    letters   := ["the"] ("letter" | "letters") X ([","] ("and" | "or") X)*
+               | "the first vowel" | "a vowel"
+
+Words the grammar does not know ("strings", "that", "all", ...) are skipped. The tree is
+compiled into a filters plan (analyzer.filters.compile_filters), which the views run.
+"""
+import re
+from functools import lru_cache
+from .filters import All, AnyOf, Contains, Flag, Not, QueryError, Range, compile_filters
+from .models import StringCharacter
+
+# A "-" directly before a number (not inside a word or a range like 2-3) is kept as its
+# sign, so tokenize() can reject negative numbers instead of reading them as positive
+TOKEN = re.compile(r"(?<![\w-])-\s*\d+|\d+|[^\W\d_]+|[(),]")
+
+NUMBERS = {
+    "zero": 0, "one": 1, "single": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+NEGATIONS = ("not", "no", "non")
+WITHOUT = ("without", "excluding", "lacking")
+CONTAIN = ("contain", "contains", "containing", "include", "includes", "including", "with", "having")
+LETTER_WORDS = ("letter", "letters", "character", "characters")
+WORD_UNITS = ("word", "words")
+LENGTH_UNITS = ("character", "characters", "char", "chars", "letter", "letters", "long")
+PALINDROME = ("palindrome", "palindromes", "palindromic")
+VOWELS = "aeiou"
+# Comparators before a number: (phrase, bounds for the number n)
+COMPARATORS = (
+    (("more", "than"), lambda n: (n + 1, None)),
+    (("greater", "than"), lambda n: (n + 1, None)),
+    (("over",), lambda n: (n + 1, None)),
+    (("above",), lambda n: (n + 1, None)),
+    (("at", "least"), lambda n: (n, None)),
+    (("minimum", "of"), lambda n: (n, None)),
+    (("fewer", "than"), lambda n: (None, n - 1)),
+    (("less", "than"), lambda n: (None, n - 1)),
+    (("under",), lambda n: (None, n - 1)),
+    (("below",), lambda n: (None, n - 1)),
+    (("at", "most"), lambda n: (None, n)),
+    (("up", "to"), lambda n: (None, n)),
+    (("maximum", "of"), lambda n: (None, n)),
+    (("exactly",), lambda n: (n, n)),
+)
+OR_MORE = ("more", "longer", "greater", "above")
+OR_LESS = ("fewer", "less", "shorter", "below")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def tokenize(normalized: str) -> list:
+    tokens = TOKEN.findall(normalized)
+    for token in tokens:
+        if token.startswith("-"):
+            raise QueryError(f"Negative numbers are not supported: '{token}'")
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        # set after a list of letters, so "containing z but not y" reads y as a letter
+        self.after_letters = False
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def accept(self, *words):
+        if self.peek() in words:
+            self.pos += 1
+            return self.tokens[self.pos - 1]
+        return None
+
+    def accept_phrase(self, phrase) -> bool:
+        if tuple(self.tokens[self.pos:self.pos + len(phrase)]) == phrase:
+            self.pos += len(phrase)
+            return True
+        return False
+
+    def number(self):
+        token = self.peek()
+        if token is not None and token.isdigit():
+            self.pos += 1
+            return int(token)
+        if token in NUMBERS:
+            self.pos += 1
+            return NUMBERS[token]
+        return None
+
+    def letter(self):
+        token = self.peek()
+        following = self.peek(1)
+        if token == "a" and following is not None and len(following) > 1 and following not in ("and", "or"):
+            return None  # the article, as in "with a single word"
+        if token is not None and len(token) == 1 and token.isalpha():
+            self.pos += 1
+            return StringCharacter.fold(token)
+        return None
+
+    def parse(self):
+        node = self.or_expr()
+        if self.peek() is not None:  # an unmatched ")"
+            raise QueryError("Unbalanced parentheses in query")
+        if node is None:
+            raise QueryError("Unable to parse natural language query")
+        return node
+
+    def or_expr(self):
+        branches = [self.and_expr()]
+        while self.accept("or"):
+            branches.append(self.and_expr())
+        if len(branches) == 1:
+            return branches[0]
+        if None in branches:
+            raise QueryError("Each side of 'or' needs a filter")
+        return AnyOf(tuple(branches))
+
+    def and_expr(self):
+        nodes = []
+        while self.peek() not in (None, "or", ")"):
+            if self.accept("and", ",", "but"):
+                continue
+            node = self.unary()
+            if node is None:
+                self.pos += 1  # a word the grammar does not use
+            else:
+                nodes.append(node)
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else All(tuple(nodes))
+
+    def unary(self):
+        start = self.pos
+        if self.accept(*NEGATIONS):
+            if self.peek() in ("an", "the", "be", "of") or (self.peek() == "a" and len(self.peek(1) or "") > 1):
+                self.pos += 1
+            node = self.letters(bare=self.after_letters) or self.unary()
+            if node is None:
+                self.pos = start
+                raise QueryError(f"Could not tell what '{self.peek()}' applies to")
+            return Not(node)
+        if self.accept(*WITHOUT):
+            node = self.letters(bare=True) or self.unary()
+            if node is None:
+                raise QueryError(f"Could not tell what '{self.tokens[start]}' applies to")
+            return Not(node)
+        if self.accept("("):
+            node = self.or_expr()
+            if not self.accept(")"):
+                raise QueryError("Unbalanced parentheses in query")
+            return node
+        return self.predicate()
+
+    def predicate(self):
+        start = self.pos
+        self.after_letters = False
+        if self.accept(*PALINDROME):
+            return Flag("is_palindrome", True)
+
+        for word, bounds in (("longer", lambda n: (n + 1, None)), ("shorter", lambda n: (None, n - 1))):
+            if self.accept(word):
+                self.accept("than")
+                n = self.number()
+                if n is None:
+                    self.pos = start
+                    return None
+                self.accept(*LENGTH_UNITS)
+                return Range("length", *bounds(n))
+
+        if self.accept("length"):
+            self.accept("of", "is")
+            found = self.bound()
+            if found is None:
+                self.pos = start
+                return None
+            self.accept(*LENGTH_UNITS)
+            return Range("length", *found)
+
+        if self.accept(*CONTAIN):
+            node = self.letters(bare=True)
+            if node is not None:
+                return node
+            self.pos = start
+
+        node = self.letters(bare=False)
+        if node is not None:
+            return node
+
+        found = self.bound()
+        if found is not None:
+            if self.accept(*WORD_UNITS):
+                return Range("word_count", *self.or_more(found))
+            if self.accept(*LENGTH_UNITS):
+                self.accept("long")
+                return Range("length", *self.or_more(found))
+        self.pos = start
+        return None
+
+    def bound(self):
+        """A number or range of numbers, as inclusive (low, high); None if there is none here."""
+        start = self.pos
+        if self.accept("between", "from"):
+            low = self.number()
+            if low is not None and self.accept("and", "to"):
+                high = self.number()
+                if high is not None:
+                    return low, high
+            self.pos = start
+            return None
+        for phrase, bounds in COMPARATORS:
+            if self.accept_phrase(phrase):
+                n = self.number()
+                if n is None:
+                    self.pos = start
+                    return None
+                return bounds(n)
+        n = self.number()
+        if n is None:
+            return None
+        if self.peek() == "to" and self.peek(1) is not None:
+            self.pos += 1
+            high = self.number()
+            if high is not None:
+                return n, high
+            self.pos -= 1
+        return self.or_more((n, n))
+
+    def or_more(self, found):
+        # "5 or more", "5 words or fewer": widen an exact bound to one side
+        low, high = found
+        if low == high and self.peek() == "or" and self.peek(2) != "than":
+            if self.peek(1) in OR_MORE:
+                self.pos += 2
+                return low, None
+            if self.peek(1) in OR_LESS:
+                self.pos += 2
+                return None, high
+        return found
+
+    def letters(self, bare):
+        """
+        Required characters: "letter a", "letters a, b and z", "letter a or b", the first
+        vowel, a vowel. ``bare`` also takes a letter with no "letter" before it, as after
+        "containing" or "without".
+        """
+        start = self.pos
+        self.accept("the", "any", "an")
+        if self.peek() == "a" and self.peek(1) in ("vowel", "first"):
+            self.pos += 1
+        if self.accept("first"):
+            if self.accept("vowel"):
+                return Contains("a")
+            self.pos = start
+            return None
+        if self.accept("vowel", "vowels"):
+            return AnyOf(tuple(Contains(vowel) for vowel in VOWELS))
+        if self.accept(*LETTER_WORDS):
+            bare = True
+        first = self.letter() if bare else None
+        if first is None:
+            self.pos = start
+            return None
+
+        # One list joins its letters one way; "a and b or c" leaves "or c" to or_expr
+        letters, joined_by = [Contains(first)], None
+        while True:
+            resume = self.pos
+            comma = self.accept(",")
+            joiner = self.accept("and", "or")
+            self.accept("the")
+            self.accept(*LETTER_WORDS)
+            letter = self.letter()
+            if letter is None or not (comma or joiner) or (joiner and joined_by not in (None, joiner)):
+                self.pos = resume
+                break
+            joined_by = joiner or joined_by
+            letters.append(Contains(letter))
+        self.after_letters = True
+        if len(letters) == 1:
+            return letters[0]
+        return AnyOf(tuple(letters)) if joined_by == "or" else All(tuple(letters))
+
+
+@lru_cache(maxsize=1024)
+def compile_query(normalized: str) -> tuple:
+    """
+    Compile a normalized natural-language query into a filters plan (a tuple of
+    Conjunction branches; empty when the query can never match). Raises QueryError for
+    text the grammar cannot use. Plans are cached by query text and, being hashable
+    and canonical, also serve as the result-cache key.
+    """
+    return compile_filters(_Parser(tokenize(normalized)).parse())
+
+
+def describe_plan(plan: tuple) -> dict:
+    """parsed_filters for a plan: its one branch's filters, or each branch under "any_of"."""
+    if len(plan) == 1:
+        return plan[0].as_filters()
+    return {"any_of": [branch.as_filters() for branch in plan]}
@@ -0,0 +1,64 @@
+# analyzer/pagination.py
+import base64
+import binascii
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+# Keyset order: created_at alone is not unique, so the primary key breaks ties
+KEYSET_ORDERING = ("created_at", "id")
+
+
+def encode_cursor(record) -> str:
+    raw = f"{record.created_at.isoformat()}|{record.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), pk
+    except (ValueError, binascii.Error):
+        raise ValidationError("cursor is invalid")
+
+
+def parse_page_size(raw) -> int:
+    if raw is None:
+        return settings.ANALYZER_PAGE_SIZE
+    try:
+        page_size = int(raw)
+    except ValueError:
+        raise ValidationError("page_size must be an integer")
+    if not 1 <= page_size <= settings.ANALYZER_MAX_PAGE_SIZE:
+        raise ValidationError(f"page_size must be between 1 and {settings.ANALYZER_MAX_PAGE_SIZE}")
+    return page_size
+
+
+def page_queryset(queryset, cursor=None, page_size=None):
+    """Slice of ``queryset`` holding the page after ``cursor`` plus one look-ahead row."""
+    qs = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    return qs[:page_size + 1]
+
+
+def finish_page(rows, page_size):
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def paginate(queryset, cursor=None, page_size=None):
+    """
+    Return one page of ``queryset`` in keyset order plus the cursor of the next page
+    (None on the last page). Only page_size + 1 rows are fetched; nothing is counted.
+    """
+    return finish_page(list(page_queryset(queryset, cursor, page_size)), page_size)
+
+
+async def apaginate(queryset, cursor=None, page_size=None):
+    """paginate() for async views, fetching through the async ORM."""
+    rows = [row async for row in page_queryset(queryset, cursor, page_size)]
+    return finish_page(rows, page_size)
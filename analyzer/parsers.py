@@ -0,0 +1,27 @@
+# analyzer/parsers.py
+import json
+from rest_framework.parsers import BaseParser
+
+INVALID_LINE = object()  # placeholder for NDJSON lines that are not valid JSON
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list, one item per non-blank line.
+    Malformed lines become INVALID_LINE so they can be reported per item.
+    """
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        items = []
+        for raw in stream:
+            line = raw.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(INVALID_LINE)
+        return items
@@ -0,0 +1,60 @@
+# analyzer/renderers.py
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+from .metrics import timed
+from .serializers import output_timezone, serialize_row
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder below produces the same bytes
+    orjson = None
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+@timed("render")
+def dumps(data) -> bytes:
+    """
+    Encode ``data`` as DRF's JSONRenderer does by default: compact separators,
+    non-ASCII kept as UTF-8, NaN rejected and U+2028/U+2029 escaped. orjson is used
+    when installed, falling back to the DRF encoder for types it does not know.
+    """
+    if orjson is not None:
+        try:
+            body = orjson.dumps(data)
+        except TypeError:
+            pass
+        else:
+            return body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    text = json.dumps(
+        data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    )
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def dumps_line(data) -> bytes:
+    return dumps(data) + b"\n"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Selected with ``Accept: application/x-ndjson`` or ``?format=ndjson``.
+    Views stream rows themselves; this only renders non-streamed bodies
+    such as errors, as a single line.
+    """
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps_line(data)
+
+
+def stream_ndjson(rows, chunk_size):
+    """Yield one encoded line per row of a row_values() queryset, read in chunks."""
+    tz = output_timezone()
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dumps_line(serialize_row(row, tz))
@@ -1,7 +1,17 @@
 # analyzer/serializers.py
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from .fields import FrequencyMap
+from .metrics import timed
 from .models import StringRecord
 
+# Columns read by serialize_row(), in the order it unpacks them
+ROW_FIELDS = (
+    "id", "value", "length", "is_palindrome", "unique_characters",
+    "word_count", "sha256_hash", "character_frequency_map", "created_at",
+)
+
 class PropertiesSerializer(serializers.Serializer):
     length = serializers.IntegerField()
     is_palindrome = serializers.BooleanField()
@@ -18,11 +28,60 @@ class StringRecordSerializer(serializers.ModelSerializer):
         fields = ("id", "value", "properties", "created_at")
 
     def get_properties(self, obj):
+        frequency_map = obj.character_frequency_map
+        if isinstance(frequency_map, FrequencyMap):
+            # stored rows carry the packed blob; it is only decoded here, at render time
+            frequency_map = frequency_map.to_dict()
         return {
             "length": obj.length,
             "is_palindrome": obj.is_palindrome,
             "unique_characters": obj.unique_characters,
             "word_count": obj.word_count,
             "sha256_hash": obj.sha256_hash,
-            "character_frequency_map": obj.character_frequency_map,
+            "character_frequency_map": frequency_map,
         }
+
+
+def output_timezone():
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def format_datetime(value, tz):
+    # Same output as DRF's DateTimeField with the default ISO 8601 format; ``tz`` is
+    # output_timezone(), looked up once per response rather than once per row
+    if tz is not None:
+        value = value.astimezone(tz)
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def serialize_row(row, tz) -> dict:
+    """
+    Fast path for list responses: build StringRecordSerializer's output from a
+    ``values_list(*ROW_FIELDS)`` tuple, skipping model and serializer field setup.
+    """
+    pk, value, length, is_palindrome, unique_characters, word_count, sha, frequency_map, created_at = row
+    return {
+        "id": pk,
+        "value": value,
+        "properties": {
+            "length": length,
+            "is_palindrome": is_palindrome,
+            "unique_characters": unique_characters,
+            "word_count": word_count,
+            "sha256_hash": sha,
+            "character_frequency_map": frequency_map.to_dict(),
+        },
+        "created_at": format_datetime(created_at, tz),
+    }
+
+
+def row_values(queryset):
+    # named rows keep .created_at/.id available to the keyset cursor
+    return queryset.values_list(*ROW_FIELDS, named=True)
+
+
+@timed("serialize")
+def serialize_rows(rows) -> list:
+    tz = output_timezone()
+    return [serialize_row(row, tz) for row in rows]
@@ -0,0 +1,170 @@
+# analyzer/services.py
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .cache import bump_generation, get_detail_cache
+from .dedup import get_known_hashes, remember
+from .metrics import timed
+from .models import StringCharacter, StringRecord
+from .similarity import similarity_keys
+from .statistics import apply_deltas, deltas_for, record_deltas
+from .writer import get_writer
+
+
+def build_record(value: str, props: dict) -> StringRecord:
+    # bulk_create() skips StringRecord.save(), so every derived column is set here
+    return StringRecord(
+        id=props["sha256_hash"],
+        value=value,
+        length=props["length"],
+        is_palindrome=props["is_palindrome"],
+        unique_characters=props["unique_characters"],
+        word_count=props["word_count"],
+        sha256_hash=props["sha256_hash"],
+        character_frequency_map=props["character_frequency_map"],
+        **similarity_keys(props["character_frequency_map"]),
+    )
+
+
+def chunked(items, size=None):
+    size = size or settings.ANALYZER_BULK_CHUNK_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(ids) -> set:
+    """Return the subset of ``ids`` already stored, one ``id__in`` query per chunk."""
+    found = set()
+    for chunk in chunked(list(ids)):
+        found.update(
+            StringRecord.objects.filter(id__in=chunk).values_list("id", flat=True)
+        )
+    return found
+
+
+@timed("dedup")
+def known_ids(ids) -> set:
+    """
+    existing_ids() for duplicate pre-checks: ids this process's Bloom filter rules out
+    are not looked up. Rows other workers stored meanwhile still fail the insert.
+    """
+    ids = list(ids)
+    known = get_known_hashes()
+    if known is None:
+        return existing_ids(ids)
+    candidates = [sha for sha in ids if known.maybe_exists(sha)]
+    found = existing_ids(candidates) if candidates else set()
+    if known.ready:
+        known.record_false_positives(len(candidates) - len(found))
+    return found
+
+
+def character_rows(records) -> list:
+    rows = []
+    for record in records:
+        rows.extend(StringCharacter.rows_for(record.id, record.character_frequency_map))
+    return rows
+
+
+@timed("insert")
+def create_record(value: str, props: dict) -> StringRecord:
+    """
+    Insert one record together with its character index rows and counter updates,
+    through this process's BatchWriter when write batching is on. Raises IntegrityError
+    if the id is already stored. In write-behind mode (ANALYZER_WRITE_ACK) the record is
+    returned before it is committed. WriterBusy is raised when the queue is full or the
+    writer does not commit the record in time.
+    """
+    record = build_record(value, props)
+    writer = get_writer()
+    if writer is not None:
+        return writer.insert(record)
+    with transaction.atomic():
+        record.save(force_insert=True)
+        StringCharacter.objects.bulk_create(character_rows([record]))
+        apply_deltas(record_deltas([record]))
+        transaction.on_commit(bump_generation)
+    remember([record.id])
+    return record
+
+
+@timed("insert")
+def store_records(records) -> list:
+    """
+    Insert ``records`` with their character index rows and counter updates, in chunks
+    inside a single transaction. Returns the records actually inserted: rows that
+    another writer stored first are dropped and the insert retried, so the counters
+    only ever see rows this call wrote.
+    """
+    batch_size = settings.ANALYZER_BULK_CHUNK_SIZE
+    records = list(records)
+    with transaction.atomic():
+        while records:
+            try:
+                with transaction.atomic():
+                    StringRecord.objects.bulk_create(records, batch_size=batch_size)
+                break
+            except IntegrityError:
+                stored = existing_ids(record.id for record in records)
+                if not stored:
+                    raise
+                records = [record for record in records if record.id not in stored]
+        StringCharacter.objects.bulk_create(character_rows(records), batch_size=batch_size)
+        apply_deltas(record_deltas(records))
+        transaction.on_commit(bump_generation)
+    remember(record.id for record in records)
+    return records
+
+
+def store_new_records(records) -> list:
+    """
+    store_records() for input that may repeat itself or rows already stored: keeps the
+    first record per id, skips ids known_ids() finds, and returns the records inserted.
+    """
+    unique = {}
+    for record in records:
+        unique.setdefault(record.id, record)
+    stored = known_ids(unique)
+    new_records = [record for sha, record in unique.items() if sha not in stored]
+    return store_records(new_records) if new_records else []
+
+
+class _RowsChanged(Exception):
+    pass
+
+
+@timed("delete")
+def delete_records(ids) -> set:
+    """
+    Delete the records with primary keys in ``ids`` and update the counters.
+    Returns the ids that were actually deleted.
+    """
+    deleted = set()
+    for chunk in chunked(list(ids)):
+        with transaction.atomic():
+            while True:
+                rows = list(
+                    StringRecord.objects.select_for_update()
+                    .filter(id__in=chunk)
+                    .values_list("id", "length", "is_palindrome", "word_count")
+                )
+                try:
+                    with transaction.atomic():
+                        _, per_model = StringRecord.objects.filter(id__in=[row[0] for row in rows]).delete()
+                        if per_model.get(StringRecord._meta.label, 0) != len(rows):
+                            # a concurrent delete got some of these rows first; read again
+                            raise _RowsChanged
+                    break
+                except _RowsChanged:
+                    continue
+            apply_deltas(deltas_for((row[1:] for row in rows), sign=-1))
+            transaction.on_commit(bump_generation)
+        deleted.update(row[0] for row in rows)
+
+    cache = get_detail_cache()
+    for pk in deleted:
+        cache.invalidate(pk)
+    return deleted
+
+
+def delete_record(record: StringRecord) -> bool:
+    return bool(delete_records([record.pk]))
@@ -0,0 +1,134 @@
+# analyzer/similarity.py
+"""
+Anagram and near-anagram search. Strings are compared by their letter vector: the
+character_frequency_map case-folded, without whitespace. Two strings are anagrams when
+their vectors are equal, and their distance is the L1 distance between the vectors
+(the number of single-character insertions and deletions between the two multisets).
+
+Every record stores two keys derived from its vector, both indexed:
+
+- ``anagram_key``: a digest of the sorted letters, so anagrams are one equality lookup.
+- ``sketch``: the vector summed into SKETCH_BUCKETS buckets. Summing never increases
+  L1 distance, so every record within distance d of a query has a sketch within
+  distance d of the query's sketch. The finite set of such sketches is enumerated
+  and fetched with ``sketch IN (...)`` instead of scanning the table, nearest ring first.
+"""
+import hashlib
+from collections import Counter
+from itertools import combinations, product
+from django.conf import settings
+
+SKETCH_BUCKETS = 6  # changing this requires recomputing every stored sketch
+PAGE_SIZE = 200  # rows per fetch from one ring of sketches (at least ``limit``)
+
+
+def letter_vector(frequency_map) -> Counter:
+    vector = Counter()
+    for character, count in frequency_map.items():
+        if not character.isspace():
+            for folded in character.lower():  # a few characters lower-case to two
+                vector[folded] += count
+    return vector
+
+
+def anagram_key(vector) -> str:
+    letters = "".join(character * vector[character] for character in sorted(vector))
+    return hashlib.blake2b(letters.encode(), digest_size=16).hexdigest()
+
+
+def sketch(vector) -> tuple:
+    buckets = [0] * SKETCH_BUCKETS
+    for character, count in vector.items():
+        buckets[ord(character) % SKETCH_BUCKETS] += count
+    return tuple(buckets)
+
+
+def sketch_key(buckets) -> str:
+    return ".".join(map(str, buckets))
+
+
+def similarity_keys(frequency_map) -> dict:
+    """The anagram_key and sketch columns for a record with ``frequency_map``."""
+    vector = letter_vector(frequency_map)
+    return {"anagram_key": anagram_key(vector), "sketch": sketch_key(sketch(vector))}
+
+
+def distance(a, b) -> int:
+    return sum(abs(a[character] - b[character]) for character in a.keys() | b.keys())
+
+
+def _compositions(total, parts):
+    """Every way to write ``total`` as ``parts`` positive integers, in order."""
+    for cuts in combinations(range(1, total), parts - 1):
+        bounds = (0,) + cuts + (total,)
+        yield [bounds[i + 1] - bounds[i] for i in range(parts)]
+
+
+def sketch_ring(center, radius):
+    """The non-negative sketches at exactly L1 ``radius`` from ``center``."""
+    if radius == 0:
+        yield center
+        return
+    size = len(center)
+    for changed in range(1, min(radius, size) + 1):
+        for positions in combinations(range(size), changed):
+            for steps in _compositions(radius, changed):
+                for signs in product((1, -1), repeat=changed):
+                    candidate = list(center)
+                    for position, step, sign in zip(positions, steps, signs):
+                        candidate[position] += sign * step
+                    if min(candidate) >= 0:
+                        yield tuple(candidate)
+
+
+def find_similar(value, max_distance, limit) -> list:
+    """
+    Up to ``limit`` stored records within ``max_distance`` of ``value``, as
+    (distance, row) pairs ordered by distance then id; ``value`` itself is left out.
+    Rings of sketches are fetched nearest first, and the search stops once ``limit``
+    records are known to be no further away than anything in the rings not yet read.
+    Every fetch is bounded: a ring is read in id order, a page at a time, and left once
+    ``limit`` of its rows are within its radius (its other rows cannot rank higher), and
+    at most ANALYZER_SIMILAR_MAX_CANDIDATES rows are read per search, which returns the
+    best of those when the budget runs out.
+    """
+    from .models import StringRecord
+    from .serializers import row_values
+
+    query = letter_vector(Counter(value))
+    own_id = hashlib.sha256(value.encode()).hexdigest()
+    records = StringRecord.objects.exclude(id=own_id)
+    if max_distance == 0:
+        rows = row_values(records.filter(anagram_key=anagram_key(query)).order_by("id")[:limit])
+        return [(0, row) for row in rows]
+
+    center = sketch(query)
+    found = []
+    budget = settings.ANALYZER_SIMILAR_MAX_CANDIDATES
+    page_size = max(limit, PAGE_SIZE)
+    for radius in range(max_distance + 1):
+        keys = [sketch_key(candidate) for candidate in sketch_ring(center, radius)]
+        size = settings.ANALYZER_BULK_CHUNK_SIZE
+        for start in range(0, len(keys), size):
+            ring = row_values(records.filter(sketch__in=keys[start:start + size]).order_by("id"))
+            within, after = 0, None
+            while within < limit and budget > 0:
+                page = list((ring if after is None else ring.filter(id__gt=after))[:min(page_size, budget)])
+                budget -= len(page)
+                for row in page:
+                    row_distance = distance(query, letter_vector(row.character_frequency_map))
+                    if row_distance <= max_distance:
+                        found.append((row_distance, row))
+                    within += row_distance <= radius
+                if len(page) < page_size:
+                    break
+                after = page[-1].id
+        # Sketch distance never exceeds true distance, so every record within
+        # ``radius`` has been read by now
+        if budget <= 0 or sum(1 for row_distance, _ in found if row_distance <= radius) >= limit:
+            break
+    return sorted(found, key=_order)[:limit]
+
+
+def _order(match):
+    return match[0], match[1].id
@@ -0,0 +1,135 @@
+# analyzer/statistics.py
+"""
+Exact counts for common filters, read from StringStatistic instead of StringRecord.
+
+Counters: the total, palindromes, one per word_count, and one per length bucket.
+Length buckets are powers of two: bucket 0 holds length 0 and bucket b >= 1 holds
+lengths 2**(b-1) .. 2**b - 1, so a length range is answerable when both ends fall
+on bucket edges. services applies the deltas in the same transaction as the rows.
+"""
+from collections import Counter
+from django.db.models import Count, F
+from .models import StringStatistic
+
+TOTAL = "total"
+PALINDROMES = "palindromes"
+WORD_COUNT_PREFIX = "word_count:"
+LENGTH_BUCKET_PREFIX = "length_bucket:"
+
+
+def length_bucket(length: int) -> int:
+    return length.bit_length()
+
+
+def bucket_bounds(bucket: int):
+    if bucket == 0:
+        return 0, 0
+    return 2 ** (bucket - 1), 2 ** bucket - 1
+
+
+def keys_for(length, is_palindrome, word_count):
+    keys = [TOTAL, f"{WORD_COUNT_PREFIX}{word_count}", f"{LENGTH_BUCKET_PREFIX}{length_bucket(length)}"]
+    if is_palindrome:
+        keys.append(PALINDROMES)
+    return keys
+
+
+def deltas_for(rows, sign=1) -> Counter:
+    """``rows`` are (length, is_palindrome, word_count) tuples."""
+    deltas = Counter()
+    for row in rows:
+        for key in keys_for(*row):
+            deltas[key] += sign
+    return deltas
+
+
+def record_deltas(records, sign=1) -> Counter:
+    return deltas_for(((r.length, r.is_palindrome, r.word_count) for r in records), sign)
+
+
+def apply_deltas(deltas):
+    """
+    Add ``deltas`` to the counters. Call inside the transaction that changed the rows:
+    each UPDATE ... SET count = count + n is atomic, and keys are updated in sorted
+    order so concurrent writers lock counter rows in the same order.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    StringStatistic.objects.bulk_create(
+        [StringStatistic(key=key) for key in deltas], ignore_conflicts=True
+    )
+    for key in sorted(deltas):
+        StringStatistic.objects.filter(key=key).update(count=F("count") + deltas[key])
+
+
+def compute_counters(record_queryset) -> Counter:
+    """Recount every counter from StringRecord (used by check_statistics and the backfill)."""
+    counters = Counter()
+    counters[TOTAL] = record_queryset.count()
+    counters[PALINDROMES] = record_queryset.filter(is_palindrome=True).count()
+    for row in record_queryset.values("word_count").annotate(n=Count("pk")).order_by():
+        counters[f"{WORD_COUNT_PREFIX}{row['word_count']}"] += row["n"]
+    for row in record_queryset.values("length").annotate(n=Count("pk")).order_by():
+        counters[f"{LENGTH_BUCKET_PREFIX}{length_bucket(row['length'])}"] += row["n"]
+    return +counters
+
+
+def _length_buckets(min_len, max_len):
+    """Buckets exactly covering [min_len, max_len] (max_len None = unbounded), or None."""
+    first = length_bucket(min_len)
+    if bucket_bounds(first)[0] != min_len:
+        return None
+    if max_len is None:
+        return first, None
+    last = length_bucket(max_len)
+    if bucket_bounds(last)[1] != max_len:
+        return None
+    return first, last
+
+
+def exact_count(filters: dict):
+    """
+    Answer COUNT(*) for ``filters`` (a filters_applied dict) from the counters,
+    or return None when the combination needs the database.
+    """
+    keys = set(filters)
+    if not keys:
+        return _read([TOTAL])[TOTAL]
+
+    if keys == {"is_palindrome"}:
+        counts = _read([TOTAL, PALINDROMES])
+        return counts[PALINDROMES] if filters["is_palindrome"] else counts[TOTAL] - counts[PALINDROMES]
+
+    if keys == {"word_count"}:
+        key = f"{WORD_COUNT_PREFIX}{filters['word_count']}"
+        return _read([key])[key]
+
+    if keys <= {"min_length", "max_length"}:
+        min_len = max(filters.get("min_length") or 0, 0)  # lengths are never negative
+        max_len = filters.get("max_length")
+        if max_len is not None and max_len < min_len:
+            return 0
+        buckets = _length_buckets(min_len, max_len)
+        if buckets is None:
+            return None
+        first, last = buckets
+        total = 0
+        for key, count in StringStatistic.objects.filter(
+            key__startswith=LENGTH_BUCKET_PREFIX
+        ).values_list("key", "count"):
+            bucket = int(key[len(LENGTH_BUCKET_PREFIX):])
+            if bucket >= first and (last is None or bucket <= last):
+                total += count
+        return total
+    return None
+
+
+def count_matching(queryset, filters: dict) -> int:
+    count = exact_count(filters)
+    return queryset.count() if count is None else count
+
+
+def _read(keys) -> dict:
+    found = dict(StringStatistic.objects.filter(key__in=keys).values_list("key", "count"))
+    return {key: found.get(key, 0) for key in keys}
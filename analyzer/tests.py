@@ -1,3 +1,1127 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import os
+import pickle
+import random
+import tempfile
+import threading
+import warnings
+from collections import Counter
+from urllib.parse import quote
+from concurrent.futures import Future
+from itertools import product
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.management import CommandError, call_command
+from django.db import DataError, OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from . import services
+from .benchmarking import random_corpus, templated_corpus
+from .cache import reset_caches
+from .dedup import BloomFilter, KnownHashes
+from .executor import AnalysisExecutor, ExecutorBusy
+from .fields import FrequencyMap, decode_frequency_map, encode_frequency_map
+from .filters import QueryError, apply_filters
+from .management.commands.export_strings import Command as ExportCommand
+from .metrics import Sample, _current, phase, reset_metrics, timed
+from .models import MAX_VALUE_LENGTH, StringCharacter, StringRecord, StringStatistic
+from .nlquery import compile_query, describe_plan, normalize_query
+from .renderers import dumps, orjson
+from .serializers import StringRecordSerializer, output_timezone, row_values, serialize_row
+from .services import build_record
+from .similarity import distance, find_similar, letter_vector
+from .statistics import apply_deltas, exact_count
+from .utils import PrefixCache, analyze_batch, analyze_string
+from .writer import BatchWriter, Journal
 
-# Create your tests here.
+# Hand-picked cases for the equivalence checks, on top of the random corpora
+EDGE_CASES = [
+    "", " ", "a", "Aa", "racecar", "RaceCar", "A man a plan", "   padded   ",
+    "tab\tseparated\nlines", "\u00a0nbsp\u00a0", "İstanbul", "ΣΊΣΥΦΟΣ", "ß", "straße",
+    "🙂🙃🙂", "e\u0301", "x" * 1000,
+]
+
+
+def sha256(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def record_for(value: str) -> StringRecord:
+    return build_record(value, analyze_string(value))
+
+
+def reference_analyze(value: str) -> dict:
+    # analyze_string as it was before the single-pass rewrite
+    return {
+        "length": len(value),
+        "is_palindrome": value.lower() == value.lower()[::-1],
+        "unique_characters": len(set(value)),
+        "word_count": len(value.split()),
+        "sha256_hash": sha256(value),
+        "character_frequency_map": dict(Counter(value)),
+    }
+
+
+class AnalysisTests(SimpleTestCase):
+    def assertSameAnalysis(self, actual, expected, value):
+        self.assertEqual(actual, expected, value)
+        # the key order of character_frequency_map is part of the response body
+        self.assertEqual(list(actual["character_frequency_map"]), list(expected["character_frequency_map"]), value)
+
+    def test_matches_the_reference_analyzer(self):
+        rng = random.Random(5)
+        values = EDGE_CASES + random_corpus(500, 50, rng) + random_corpus(50, 1000, rng)
+        for value, from_batch in zip(values, analyze_batch(values)):
+            expected = reference_analyze(value)
+            self.assertSameAnalysis(analyze_string(value), expected, value)
+            self.assertSameAnalysis(from_batch, expected, value)
+
+    def test_prefix_cache_matches_analyze_string(self):
+        # Small strides put segment boundaries inside words and runs of whitespace
+        values = EDGE_CASES + ["a b", " a", "a ", "ab  cd", "x y z"] + templated_corpus(200, 200, 5, random.Random(7))
+        for stride in (1, 2, 3, 7, 64):
+            cache = PrefixCache(256, stride)
+            for value in values + values:  # the second pass resumes from cached prefixes
+                self.assertSameAnalysis(cache.analyze(value), analyze_string(value), (value, stride))
+            self.assertGreater(cache.stats()["hits"], 0)
+
+
+# Without the Bloom filter, whose warm-up thread would read the test database on its own
+@override_settings(ANALYZER_BLOOM_CAPACITY=0)
+class AnalyzerTestCase(TestCase):
+    def setUp(self):
+        reset_caches()  # cached bodies and results outlive each test's rollback
+
+    def post_json(self, path, data):
+        return self.client.post(path, data, content_type="application/json")
+
+
+class FrequencyMapFieldTests(AnalyzerTestCase):
+    MAPS = (
+        {},
+        {"b": 2, "a": 1},  # key order is the order of first occurrence, not sorted
+        {"é": 1, "ß": 3, "z": 300},  # latin-1 code points, two-byte counts
+        {"Ж": 1, "你": 2, "a": 70000},  # two-byte code points, four-byte counts
+        {"🙂": 2, " ": 1, "🎉": 1, "\x00": 1},  # beyond the BMP
+    )
+
+    def assertSameMap(self, actual, expected):
+        self.assertEqual(dict(actual), expected)
+        self.assertEqual(list(actual.items()), list(expected.items()))
+
+    def test_encoding_round_trips(self):
+        for frequency_map in self.MAPS:
+            with self.subTest(frequency_map):
+                blob = encode_frequency_map(frequency_map)
+                self.assertSameMap(decode_frequency_map(blob), frequency_map)
+                packed = FrequencyMap(blob)
+                self.assertEqual(packed, frequency_map)
+                self.assertEqual(encode_frequency_map(packed), blob)
+                self.assertEqual(pickle.loads(pickle.dumps(packed)), packed)
+
+    def test_database_round_trip(self):
+        for value in ("", "baab", "Ж你🙂🙂 ", "z" * 300):
+            with self.subTest(value):
+                record = record_for(value)
+                record.id = sha256(value)
+                StringRecord.objects.bulk_create([record])
+                stored = StringRecord.objects.get(id=record.id).character_frequency_map
+                self.assertIsInstance(stored, FrequencyMap)
+                self.assertSameMap(stored, dict(Counter(value)))
+
+
+class PackFrequencyMapMigrationTests(TransactionTestCase):
+    before = [("analyzer", "0004_stringstatistic")]
+    after = [("analyzer", "0005_pack_character_frequency_map")]
+    MAPS = {"racecar": {"r": 2, "a": 2, "c": 2, "e": 1}, "🙂 ß": {"🙂": 1, " ": 1, "ß": 1}, "": {}}
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill_decodes_to_the_old_json(self):
+        old_apps = self.migrate(self.before)
+        OldRecord = old_apps.get_model("analyzer", "StringRecord")
+        for value, frequency_map in self.MAPS.items():
+            OldRecord.objects.create(id=sha256(value), value=value, length=len(value), is_palindrome=False,
+                                     unique_characters=len(frequency_map), word_count=len(value.split()),
+                                     character_frequency_map=frequency_map)
+
+        # as the JSON column returned them: PostgreSQL's jsonb has its own key order
+        before = dict(OldRecord.objects.values_list("id", "character_frequency_map"))
+
+        new_apps = self.migrate(self.after)
+        after = dict(new_apps.get_model("analyzer", "StringRecord").objects.values_list(
+            "id", "character_frequency_map"))
+        self.assertEqual(after.keys(), before.keys())
+        for pk, packed in after.items():
+            self.assertIsInstance(packed, FrequencyMap)
+            self.assertEqual(list(packed.items()), list(before[pk].items()))
+
+        old_apps = self.migrate(self.before)  # and back again
+        restored = dict(old_apps.get_model("analyzer", "StringRecord").objects.values_list(
+            "value", "character_frequency_map"))
+        self.assertEqual(restored, self.MAPS)
+
+
+class CreateTests(AnalyzerTestCase):
+    # The DRF, async and ingest-only views share analyzer.ingest's create flow
+    URLCONFS = ("analyzer.urls", "analyzer.async_urls", "analyzer.ingest_urls")
+    CASES = (
+        ("application/json", json.dumps({"value": "A man a plan"})),
+        ("application/json", json.dumps({"value": "A man a plan"})),
+        ("application/json", json.dumps({"value": "   "})),
+        ("application/json", json.dumps({"value": 5})),
+        ("application/json", json.dumps(["not", "an", "object"])),
+        ("application/x-www-form-urlencoded", "value=form+post"),
+        ("application/json", json.dumps({"value": "y" * (MAX_VALUE_LENGTH + 1)})),
+    )
+
+    def responses(self, urlconf):
+        with self.settings(ROOT_URLCONF=urlconf):
+            responses = [self.client.post("/strings", body, content_type=content_type)
+                         for content_type, body in self.CASES]
+        StringRecord.objects.all().delete()
+        return [(response.status_code, response.json()) for response in responses]
+
+    def test_views_answer_alike(self):
+        expected = self.responses(self.URLCONFS[0])
+        self.assertEqual([status for status, _ in expected], [201, 409, 400, 422, 400, 201, 422])
+        created = expected[0][1]
+        self.assertEqual(created["id"], sha256("A man a plan"))
+        self.assertEqual(created["properties"]["word_count"], 4)
+        for urlconf in self.URLCONFS[1:]:
+            with self.subTest(urlconf):
+                actual = self.responses(urlconf)
+                for (_, body), (_, other) in zip(expected, actual):
+                    body.pop("created_at", None)
+                    other.pop("created_at", None)
+                self.assertEqual(actual, expected)
+
+    @override_settings(ROOT_URLCONF="analyzer.async_urls")
+    async def test_async_create_queries_on_the_shared_orm_thread(self):
+        # With a writer only the wait for its batch leaves the thread whose connections
+        # Django closes after the request
+        threads = {}
+
+        def on_thread(name, func):
+            def wrapper(*args):
+                threads[name] = threading.current_thread()
+                return func(*args)
+            return wrapper
+
+        with mock.patch("analyzer.async_views.get_writer", return_value=mock.Mock()), \
+                mock.patch("analyzer.async_views.known_ids", on_thread("known_ids", services.known_ids)), \
+                mock.patch("analyzer.ingest.create_record", on_thread("insert", build_record)), \
+                mock.patch("analyzer.ingest.write_behind", return_value=True):
+            response = await AsyncClient().post("/strings", {"value": "racecar"}, content_type="application/json")
+        self.assertEqual(response.status_code, 202)
+        self.assertIs(threads["known_ids"], threading.main_thread())
+        self.assertIsNot(threads["insert"], threading.main_thread())
+
+
+class BulkCreateTests(AnalyzerTestCase):
+    def test_reports_each_item(self):
+        StringRecord.objects.create(value="stored", length=6, is_palindrome=False, unique_characters=5,
+                                    word_count=1, character_frequency_map={"s": 1})
+        response = self.post_json("/strings/bulk", ["racecar", {"value": "two words"}, "racecar", "stored", "", 5])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["status"] for item in response.json()["results"]],
+            ["created", "created", "conflict", "conflict", "invalid", "invalid"],
+        )
+        self.assertEqual(response.json()["summary"], {"created": 2, "conflict": 2, "invalid": 2})
+        self.assertEqual(StringRecord.objects.get(value="two words").word_count, 2)
+
+    def test_rejects_values_longer_than_the_column(self):
+        # On PostgreSQL a multi-row insert would truncate the long value into a corrupt row
+        too_long = "y" * (MAX_VALUE_LENGTH + 1)
+        response = self.post_json("/strings/bulk", ["ok value 1", too_long, "x" * MAX_VALUE_LENGTH])
+
+        results = response.json()["results"]
+        self.assertEqual([item["status"] for item in results], ["created", "invalid", "created"])
+        self.assertIn(str(MAX_VALUE_LENGTH), results[1]["error"])
+        for record in StringRecord.objects.all():
+            self.assertEqual(record.id, sha256(record.value))
+            self.assertEqual(record.length, len(record.value))
+        self.assertFalse(StringRecord.objects.filter(length__gt=MAX_VALUE_LENGTH).exists())
+
+    def test_rejects_oversized_requests(self):
+        with self.settings(ANALYZER_BULK_MAX_ITEMS=2):
+            response = self.post_json("/strings/bulk", ["a", "b", "c"])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.post_json("/strings/bulk", {"value": "a"}).status_code, 400)
+
+
+class ImportStringsTests(AnalyzerTestCase):
+    def import_file(self, name, content):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            call_command("import_strings", path, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_rejects_values_longer_than_the_column(self):
+        too_long = "y" * (MAX_VALUE_LENGTH + 1)
+        for name, content in (
+            ("in.txt", f"one\n{too_long}\ntwo\n"),
+            ("in.ndjson", "\n".join(json.dumps(item) for item in ["one", {"value": too_long}, {"value": "two"}])),
+            ("in.csv", f"value\none\n{too_long}\ntwo\n"),
+        ):
+            with self.subTest(name):
+                StringRecord.objects.all().delete()
+                output = self.import_file(name, content)
+                self.assertIn("Imported 2 strings (0 already stored, 1 invalid)", output)
+                self.assertEqual(sorted(StringRecord.objects.values_list("value", flat=True)), ["one", "two"])
+
+
+class ExportImportTests(AnalyzerTestCase):
+    VALUES = ["racecar", "hello world", "  padded  ", "tab\tand\nnewline", "🙂🙃", "ΣΊΣΥΦΟΣ", "x" * MAX_VALUE_LENGTH,
+              "A man a plan"]
+
+    def setUp(self):
+        super().setUp()
+        self.post_json("/strings/bulk", self.VALUES)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def export(self, name, *args):
+        call_command("export_strings", self.path(name), "--chunk-size", "3", *args, stderr=io.StringIO())
+        return self.read(name)
+
+    def read(self, name):
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(self.path(name), "rb") as handle:
+            return handle.read().splitlines()
+
+    @staticmethod
+    def rows(lines):
+        rows = [json.loads(line) for line in lines]
+        for row in rows:
+            row.pop("created_at")
+        return rows
+
+    def test_round_trip_through_a_file(self):
+        for name in ("out.ndjson", "out.ndjson.gz"):
+            with self.subTest(name):
+                exported = self.export(name)
+                self.assertEqual(len(exported), len(self.VALUES))
+                StringRecord.objects.all().delete()
+
+                out = io.StringIO()
+                call_command("import_strings", self.path(name), "--batch-size", "3", stdout=out, stderr=io.StringIO())
+                self.assertIn(f"Imported {len(self.VALUES)} strings (0 already stored, 0 invalid)", out.getvalue())
+                self.assertEqual(self.rows(self.export("again.ndjson")), self.rows(exported))
+
+    def test_export_resumes_after_an_interruption(self):
+        full = self.export("full.ndjson")
+        checkpoint = self.path("export.checkpoint")
+        write_chunk = ExportCommand.write_chunk
+        calls = []
+
+        def interrupt_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return write_chunk(*args)
+
+        with mock.patch.object(ExportCommand, "write_chunk", staticmethod(interrupt_second_chunk)), \
+                self.assertRaisesMessage(CommandError, "Interrupted after 3 rows; resume into a new file with --after"):
+            self.export("part1.ndjson", "--checkpoint", checkpoint)
+        self.assertEqual(self.read("part1.ndjson"), full[:3])
+
+        stderr = io.StringIO()
+        call_command("export_strings", self.path("part2.ndjson"), "--chunk-size", "3", "--checkpoint", checkpoint,
+                     stderr=stderr)
+        self.assertIn(f"Resuming after id {json.loads(full[2])['id']}", stderr.getvalue())
+        self.assertEqual(self.read("part1.ndjson") + self.read("part2.ndjson"), full)
+
+    def test_import_resumes_from_its_checkpoint(self):
+        exported = self.export("out.ndjson")
+        StringRecord.objects.all().delete()
+        checkpoint = self.path("import.checkpoint")
+        store = services.store_new_records
+        calls = []
+
+        def interrupt_second_batch(records):
+            calls.append(records)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return store(records)
+
+        with mock.patch("analyzer.management.commands.import_strings.store_new_records", interrupt_second_batch), \
+                self.assertRaisesMessage(CommandError, "Interrupted; resume with --resume-from"):
+            call_command("import_strings", self.path("out.ndjson"), "--batch-size", "3", "--checkpoint", checkpoint,
+                         stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(StringRecord.objects.count(), 3)
+
+        out = io.StringIO()
+        call_command("import_strings", self.path("out.ndjson"), "--batch-size", "3", "--checkpoint", checkpoint,
+                     stdout=out, stderr=io.StringIO())
+        # the first batch is skipped, not re-read as duplicates
+        self.assertIn(f"Imported {len(self.VALUES) - 3} strings (0 already stored, 0 invalid)", out.getvalue())
+        self.assertEqual(self.rows(self.export("again.ndjson")), self.rows(exported))
+
+
+@override_settings(ANALYZER_BLOOM_CAPACITY=0)
+class BatchWriterTests(TransactionTestCase):
+    # Not TestCase: a failed store closes the connection, and write-behind commits on the writer thread
+
+    def setUp(self):
+        reset_caches()
+
+    @staticmethod
+    def failing_store(bad_value, error=DataError, times=None):
+        """
+        store_records(), failing like PostgreSQL would for any batch holding ``bad_value``
+        (the first ``times`` attempts only, if given).
+        """
+        store = services.store_records
+        attempts = []
+
+        def store_records(records):
+            if any(record.value == bad_value for record in records):
+                attempts.append(records)
+                if times is None or len(attempts) <= times:
+                    raise error("value too long for type character varying(1000)")
+            return store(records)
+
+        return mock.patch("analyzer.services.store_records", store_records)
+
+    @staticmethod
+    def queue(writer, values):
+        # Accepted without starting the writer thread, so the test commits the batch itself
+        with mock.patch.object(writer, "start"):
+            for value in values:
+                writer.insert(record_for(value))
+        return writer._take_batch()
+
+    def stored_values(self):
+        return sorted(StringRecord.objects.values_list("value", flat=True))
+
+    def test_commit_answers_each_request(self):
+        writer = BatchWriter()
+        StringRecord.objects.bulk_create([record_for("stored")])
+        batch = [(record_for(value), Future()) for value in ("new", "bad", "stored", "new")]
+        with self.failing_store("bad"):
+            writer._commit(batch)
+
+        outcomes = []
+        for _, future in batch:
+            error = future.exception()
+            outcomes.append(type(error).__name__ if error else future.result())
+        # created, its own error, conflict with a stored row, conflict within the batch
+        self.assertEqual(outcomes, [True, "DataError", False, False])
+        self.assertEqual(self.stored_values(), ["new", "stored"])
+        self.assertEqual(writer.stats()["records"], 1)
+
+    def test_commit_timeout_is_busy_not_an_error(self):
+        writer = BatchWriter(timeout=0.01)
+        with self.settings(ANALYZER_WRITE_BATCHING=True), mock.patch("analyzer.writer._writer", writer), \
+                mock.patch.object(writer, "start"):  # nothing commits the queued record
+            response = self.client.post("/strings", {"value": "slow"}, content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_write_behind_rejects_long_values_before_acking(self):
+        writer = BatchWriter(ack="queued")
+        with self.assertRaises(ValueError):
+            self.queue(writer, ["y" * (MAX_VALUE_LENGTH + 1)])
+        self.assertEqual(writer.stats()["pending"], 0)
+
+    def test_write_behind_dead_letters_what_cannot_be_stored(self):
+        writer = BatchWriter(ack="queued")
+        batch = self.queue(writer, ["good", "bad"])
+        with self.failing_store("bad"), self.assertLogs("analyzer.writer", "ERROR") as logs:
+            writer._commit(batch)
+
+        self.assertEqual(self.stored_values(), ["good"])
+        self.assertIn('value: "bad"', logs.output[0])
+        stats = writer.stats()
+        self.assertEqual((stats["pending"], stats["dead_letters"], stats["retries"]), (0, 1, 0))
+        self.assertTrue(writer.flush(timeout=0))
+
+    def test_write_behind_retries_transient_errors(self):
+        writer = BatchWriter(ack="queued")
+        batch = self.queue(writer, ["good", "flaky"])
+        with self.failing_store("flaky", error=OperationalError, times=1):
+            writer._commit(batch)
+
+        self.assertEqual(self.stored_values(), ["flaky", "good"])
+        stats = writer.stats()
+        self.assertEqual((stats["pending"], stats["dead_letters"], stats["retries"]), (0, 0, 1))
+
+    def test_replay_stores_orphaned_journals(self):
+        with tempfile.TemporaryDirectory() as directory:
+            orphan = os.path.join(directory, "writer-1-dead.journal")
+            with open(orphan, "w", encoding="utf-8") as handle:
+                for value in ("replayed", "y" * (MAX_VALUE_LENGTH + 1), "also replayed"):
+                    handle.write(json.dumps({"value": value}) + "\n")
+                handle.write('{"value": "torn')
+            writer = BatchWriter(ack="journal", journal=Journal(directory, fsync=False))
+            with self.assertLogs("analyzer.writer", "ERROR"):
+                writer.replay()
+            self.assertFalse(os.path.exists(orphan))
+
+        self.assertEqual(self.stored_values(), ["also replayed", "replayed"])
+        self.assertEqual((writer.replayed, writer.dead_letters), (2, 1))
+
+    def test_journal_rotates_and_removes_committed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writer = BatchWriter(ack="journal", journal=Journal(directory, fsync=False, max_lines=2))
+            batch = self.queue(writer, ["one", "two", "three", "four", "five"])
+
+            def journals():
+                return {path.name: path.read_text().count("\n") for path in Path(directory).iterdir()}
+
+            self.assertEqual(sorted(journals().values()), [1, 2, 2])
+            # committed out of order: the first file still holds an uncommitted line
+            writer._commit([batch[0], batch[2]])
+            self.assertEqual(sorted(journals().values()), [1, 2, 2])
+            writer._commit([batch[1], batch[3]])
+            self.assertEqual(journals(), {writer.journal.path.name: 1})
+            writer._commit(batch[4:])
+            self.assertEqual(journals(), {writer.journal.path.name: 0})
+            self.assertEqual(writer.journal.pending, 0)
+        self.assertEqual(len(self.stored_values()), 5)
+
+    def test_workers_replaying_one_journal_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("writer-1-a", "writer-2-b", "writer-3-c"):
+                with open(os.path.join(directory, f"{name}.journal"), "w", encoding="utf-8") as handle:
+                    handle.write(json.dumps({"value": name}) + "\n")
+            first = BatchWriter(ack="journal", journal=Journal(directory, fsync=False))
+            second = BatchWriter(ack="journal", journal=Journal(directory, fsync=False))
+
+            # the second worker listed every orphan and holds the first one...
+            orphans = second.journal.orphans()
+            held, _ = next(orphans)
+            # ...while the first replays and removes the others
+            first.replay()
+            self.assertEqual(list(orphans), [])
+            self.assertTrue(held.exists())
+            second.replay()
+
+            self.assertEqual(sorted(path.name for path in Path(directory).iterdir()),
+                             sorted([first.journal.path.name, second.journal.path.name]))
+        self.assertEqual(self.stored_values(), ["writer-1-a", "writer-2-b", "writer-3-c"])
+        self.assertEqual(first.replayed + second.replayed, 3)
+
+    def test_writer_thread_survives_failed_batches(self):
+        class Stop(Exception):
+            pass
+
+        writer = BatchWriter()
+        failed, stored = Future(), Future()
+        batches = [[(record_for("lost"), failed)], [(record_for("kept"), stored)], Stop()]
+        with mock.patch.object(writer, "_take_batch", side_effect=batches), \
+                mock.patch.object(writer, "_store_batch", side_effect=[RuntimeError("bug"), ({sha256("kept")}, {})]), \
+                self.assertLogs("analyzer.writer", "ERROR"):
+            with self.assertRaises(Stop):
+                writer._run()
+        self.assertIsInstance(failed.exception(), RuntimeError)
+        self.assertTrue(stored.result())
+
+
+class DetailCacheTests(AnalyzerTestCase):
+    BACKENDS = ("local", "django")
+
+    def test_delete_invalidates_cached_body(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend), self.settings(ANALYZER_DETAIL_CACHE_BACKEND=backend):
+                reset_caches()
+                self.post_json("/strings", {"value": "cached"})
+                first = self.client.get("/strings/cached")
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(self.client.get("/strings/cached").content, first.content)
+                self.assertEqual(self.client.get("/strings/cache/stats").json()["hits"], 1)
+
+                self.assertEqual(self.client.delete("/strings/cached").status_code, 204)
+                self.assertEqual(self.client.get("/strings/cached").status_code, 404)
+
+    def test_off_by_default(self):
+        self.post_json("/strings", {"value": "uncached"})
+        self.client.get("/strings/uncached")
+        StringRecord.objects.filter(value="uncached").delete()  # behind the cache's back
+        self.assertEqual(self.client.get("/strings/uncached").status_code, 404)
+
+
+class NaturalLanguageCacheTests(AnalyzerTestCase):
+    BACKENDS = ("local", "django")
+
+    def palindromes(self):
+        response = self.client.get("/strings/filter-by-natural-language", {"query": "all palindromic strings"})
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["value"] for item in response.json()["data"])
+
+    def test_writes_refresh_cached_results(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend), self.settings(ANALYZER_NL_CACHE_BACKEND=backend), warnings.catch_warnings():
+                warnings.simplefilter("error", CacheKeyWarning)  # keys memcached would refuse
+                reset_caches()
+                StringRecord.objects.all().delete()
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.post_json("/strings", {"value": "racecar"})
+                self.assertEqual(self.palindromes(), ["racecar"])
+
+                # the generation bump runs on commit, and makes the cached result unreachable
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.post_json("/strings", {"value": "level"})
+                self.assertEqual(self.palindromes(), ["level", "racecar"])
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.delete("/strings/racecar")
+                self.assertEqual(self.palindromes(), ["level"])
+
+
+class FastPathRenderingTests(AnalyzerTestCase):
+    # The values_list rows and pre-encoded bodies must match StringRecordSerializer + JSONRenderer
+    VALUES = ("plain", 'quote " and \\ backslash', "line\u2028separator\u2029", "ünï 🙂", "tab\tnew\nline")
+
+    def setUp(self):
+        super().setUp()
+        self.post_json("/strings/bulk", list(self.VALUES))
+
+    def drf_body(self, data):
+        return JSONRenderer().render(data)
+
+    def test_list_and_detail_bodies_match_drf(self):
+        for encoder, urlconf in product(("orjson", "json"), ("analyzer.urls", "analyzer.async_urls")):
+            with self.subTest(encoder, urlconf=urlconf), self.settings(ROOT_URLCONF=urlconf), \
+                    mock.patch("analyzer.renderers.orjson", None if encoder == "json" else orjson):
+                response = self.client.get("/strings", {"min_length": 1})
+                ids = [item["id"] for item in response.json()["data"]]
+                records = StringRecord.objects.in_bulk(ids)
+                self.assertEqual(response.content, self.drf_body({
+                    "data": StringRecordSerializer([records[pk] for pk in ids], many=True).data,
+                    "count": len(ids),
+                    "filters_applied": {"min_length": 1},
+                }))
+
+                for value in self.VALUES:
+                    record = StringRecord.objects.get(value=value)
+                    expected = self.drf_body(StringRecordSerializer(record).data)
+                    row = row_values(StringRecord.objects.filter(pk=record.pk)).get()
+                    self.assertEqual(dumps(serialize_row(row, output_timezone())), expected)
+                    self.assertEqual(self.client.get(f"/strings/{quote(value)}").content, expected)
+
+
+class ContainsCharacterTests(AnalyzerTestCase):
+    VALUES = ("Hello World", "ÉCOLE école", "İstanbul", "🙂 smile", "straße", "racecar")
+
+    def setUp(self):
+        super().setUp()
+        self.post_json("/strings", {"value": self.VALUES[0]})  # single create, then bulk
+        self.post_json("/strings/bulk", list(self.VALUES[1:]))
+
+    def characters(self, value):
+        return set(StringCharacter.objects.filter(record_id=sha256(value)).values_list("character", flat=True))
+
+    def listed(self, *characters, urlconf="analyzer.urls"):
+        with self.settings(ROOT_URLCONF=urlconf):
+            response = self.client.get("/strings", {"contains_character": list(characters), "page_size": 50})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["total"], body["count"])
+        return sorted(item["value"] for item in body["data"])
+
+    def test_side_table_holds_each_folded_character(self):
+        for value in self.VALUES:
+            with self.subTest(value):
+                self.assertEqual(self.characters(value), {character.lower() for character in value})
+
+    def test_filter(self):
+        for characters, expected in (
+            (("h",), ["Hello World"]),
+            (("H",), ["Hello World"]),  # case-folded
+            (("o", "w"), ["Hello World"]),  # repeated: every character is required
+            (("o", "z"), []),
+            (("e",), ["Hello World", "racecar", "straße", "ÉCOLE école", "🙂 smile"]),
+            (("é",), ["ÉCOLE école"]),
+            (("É", "c"), ["ÉCOLE école"]),
+            (("🙂",), ["🙂 smile"]),
+            (("ß",), ["straße"]),
+            (("İ",), ["İstanbul"]),  # lower-cases to two code points
+        ):
+            for urlconf in ("analyzer.urls", "analyzer.async_urls"):
+                with self.subTest(characters, urlconf=urlconf):
+                    self.assertEqual(self.listed(*characters, urlconf=urlconf), expected)
+
+    def test_rejects_more_than_one_character(self):
+        self.assertEqual(self.client.get("/strings", {"contains_character": "ab"}).status_code, 400)
+
+    def test_delete_removes_side_table_rows(self):
+        self.assertEqual(self.client.delete("/strings/Hello World").status_code, 204)
+        self.assertEqual(self.characters("Hello World"), set())
+        self.assertEqual(self.listed("h"), [])
+        self.assertEqual(self.characters("racecar"), set("race"))
+
+
+class ExecutorTests(AnalyzerTestCase):
+    def test_pools_match_inline_analysis(self):
+        values = EDGE_CASES + random_corpus(300, 40, random.Random(3))
+        expected = AnalysisExecutor("inline").analyze(values)
+        for options in ({}, {"prefix_cache_entries": 64, "prefix_stride": 4}):
+            executor = AnalysisExecutor("thread", workers=3, chunk_size=7, **options)
+            self.addCleanup(executor.shutdown)
+            with self.subTest(**options):
+                self.assertEqual(executor.analyze(values), expected)
+                self.assertEqual(executor.analyze(values), expected)  # prefix cache warm
+
+    def test_full_queue_answers_503(self):
+        executor = AnalysisExecutor("thread", workers=1, max_pending=1, queue_timeout=0.01)
+        self.addCleanup(executor.shutdown)
+        self.assertTrue(executor._slots.acquire(blocking=False))  # a chunk still waiting on the pool
+        with self.assertRaises(ExecutorBusy):
+            executor.analyze(["waits"])
+
+        with mock.patch("analyzer.executor._executor", executor):
+            for urlconf in ("analyzer.urls", "analyzer.async_urls", "analyzer.ingest_urls"):
+                with self.subTest(urlconf), self.settings(ROOT_URLCONF=urlconf):
+                    response = self.post_json("/strings", {"value": "busy"})
+                    self.assertEqual(response.status_code, 503)
+                    self.assertEqual(response["Retry-After"], "1")
+            response = self.post_json("/strings/bulk", ["busy", "busier"])
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(StringRecord.objects.exists())
+
+            executor._slots.release()  # the queue drains
+            self.assertEqual(self.post_json("/strings", {"value": "busy"}).status_code, 201)
+
+
+class KeysetPaginationTests(AnalyzerTestCase):
+    def setUp(self):
+        super().setUp()
+        # one bulk insert, so rows share created_at and only the id orders them
+        self.values = [f"page {i}" for i in range(7)] + ["racecar", "level"]
+        self.post_json("/strings/bulk", self.values)
+
+    def walk(self, query, urlconf="analyzer.urls"):
+        pages, cursor = [], None
+        with self.settings(ROOT_URLCONF=urlconf):
+            while True:
+                params = dict(query, page_size=2, **({"cursor": cursor} if cursor else {}))
+                body = self.client.get("/strings", params).json()
+                pages.append(body)
+                cursor = body["next_cursor"]
+                if cursor is None:
+                    return pages
+
+    def test_cursor_pages_cover_every_row_once(self):
+        for urlconf in ("analyzer.urls", "analyzer.async_urls"):
+            for query, expected in (({}, self.values), ({"is_palindrome": "true"}, ["racecar", "level"])):
+                with self.subTest(urlconf, **query):
+                    pages = self.walk(query, urlconf)
+                    values = [item["value"] for page in pages for item in page["data"]]
+                    self.assertEqual(len(values), len(set(values)))
+                    self.assertEqual(sorted(values), sorted(expected))
+                    self.assertEqual({page["total"] for page in pages}, {len(expected)})
+                    self.assertTrue(all(page["count"] <= 2 for page in pages))
+
+    def test_rejects_bad_cursors_and_page_sizes(self):
+        for params in ({"cursor": "not-a-cursor"}, {"page_size": "0"}, {"page_size": "many"}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get("/strings", params).status_code, 400)
+
+
+class NaturalLanguageQueryTests(SimpleTestCase):
+    def parse(self, query):
+        return describe_plan(compile_query(normalize_query(query)))
+
+    def test_compiles_queries(self):
+        cases = (
+            ("all single word palindromic strings", {"is_palindrome": True, "word_count": 1}),
+            ("Strings   LONGER than 10 characters", {"min_length": 11}),
+            ("strings containing the first vowel", {"contains_character": "a"}),
+            ("palindromes longer than 5 that contain the letter a or strings of 2 to 3 words without z",
+             {"any_of": [{"min_word_count": 2, "max_word_count": 3, "excludes_character": "z"},
+                         {"is_palindrome": True, "min_length": 6, "contains_character": "a"}]}),
+        )
+        for query, expected in cases:
+            with self.subTest(query):
+                self.assertEqual(self.parse(query), expected)
+
+    def test_conflicting_filters_compile_to_an_empty_plan(self):
+        # values hold at most MAX_VALUE_LENGTH characters, so at most 500 words
+        for query in ("palindromic and not palindromic", "longer than 1000", "more than 600 words",
+                      "more than 500 words", "at least 400 words shorter than 700 characters"):
+            with self.subTest(query):
+                self.assertEqual(compile_query(normalize_query(query)), ())
+        self.assertEqual(self.parse("at least 1000 characters"), {"min_length": 1000})
+        self.assertEqual(self.parse("at least 500 words"), {"min_word_count": 500})
+
+    def test_rejects_unreadable_queries(self):
+        # a dropped sign would read "longer than -5" as min_length 6
+        for query in ("blah blah", "((( palindromes", "longer than -5", "at least -2 words"):
+            with self.subTest(query), self.assertRaises(QueryError):
+                compile_query(normalize_query(query))
+
+
+class NaturalLanguageViewTests(AnalyzerTestCase):
+    def test_status_codes(self):
+        path = "/strings/filter-by-natural-language"
+        for query, status in (("palindromic strings", 200), ("palindromic and not palindromic", 422),
+                              ("longer than 1000", 422), ("more than 600 words", 422),
+                              ("blah blah", 400), ("longer than -5", 400), ("", 400)):
+            with self.subTest(query):
+                self.assertEqual(self.client.get(path, {"query": query}).status_code, status)
+
+
+class SimilarTests(AnalyzerTestCase):
+    QUERIES = ("listen", "Silent", "tea", "a", "stale nets")
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(11)
+        values = {"listen", "silent", "enlist", "Tinsel", "listens", "list", "tea", "eat", "a", "aa"}
+        while len(values) < 300:  # few letters, so sketches are shared by many rows
+            values.add("".join(rng.choices("aeilnst ", k=rng.randint(1, 9))).strip() or "t")
+        self.post_json("/strings/bulk", sorted(values))
+
+    @staticmethod
+    def scan(value, max_distance, limit):
+        # every stored record, compared one by one
+        query = letter_vector(Counter(value))
+        matches = []
+        for record in StringRecord.objects.exclude(id=sha256(value)):
+            record_distance = distance(query, letter_vector(record.character_frequency_map))
+            if record_distance <= max_distance:
+                matches.append((record_distance, record.id))
+        return sorted(matches)[:limit]
+
+    def similar(self, value, max_distance, limit):
+        return [(row_distance, row.id) for row_distance, row in find_similar(value, max_distance, limit)]
+
+    def test_matches_a_full_scan(self):
+        for page_size in (2, 200):  # 2 forces ring reads to stop part way and page on
+            with mock.patch("analyzer.similarity.PAGE_SIZE", page_size):
+                for value in self.QUERIES:
+                    for max_distance, limit in ((1, 5), (2, 3), (3, 100), (4, 1)):
+                        with self.subTest(value, page_size=page_size, max_distance=max_distance, limit=limit):
+                            self.assertEqual(self.similar(value, max_distance, limit),
+                                             self.scan(value, max_distance, limit))
+
+    def test_anagrams(self):
+        matches = self.similar("listen", 0, 10)
+        self.assertEqual(matches, self.scan("listen", 0, 10))
+        self.assertEqual(sorted(StringRecord.objects.get(id=pk).value for _, pk in matches),
+                         ["Tinsel", "enlist", "silent"])
+        self.assertEqual(self.similar("listen", 0, 2), matches[:2])
+
+    def test_every_fetch_is_bounded(self):
+        with self.settings(ANALYZER_SIMILAR_MAX_CANDIDATES=10), CaptureQueriesContext(connection) as queries:
+            matches = self.similar("a", 4, 100)
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        self.assertTrue(selects)
+        self.assertTrue(all("LIMIT" in sql for sql in selects))
+        self.assertLessEqual(len(matches), 10)
+        self.assertEqual(matches, sorted(matches))
+
+    def test_view(self):
+        response = self.client.get("/strings/similar", {"value": "listen", "max_distance": 1, "limit": 4})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([(item["distance"], item["id"]) for item in body["data"]], self.scan("listen", 1, 4))
+        self.assertEqual(body["query"], {"value": "listen", "max_distance": 1, "limit": 4})
+
+        for params in ({}, {"value": "  "}, {"value": "a", "max_distance": 9}, {"value": "a", "max_distance": -1},
+                       {"value": "a", "limit": 0}, {"value": "a", "limit": 1000}, {"value": "a", "limit": "x"}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get("/strings/similar", params).status_code, 400)
+
+
+class StatisticsTests(AnalyzerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post_json("/strings/bulk", ["a", "ab", "abc", "abcd", "racecar", "hello world"])
+
+    def counters(self):
+        return dict(StringStatistic.objects.values_list("key", "count"))
+
+    def test_exact_count_matches_the_database(self):
+        for filters in ({}, {"is_palindrome": True}, {"is_palindrome": False}, {"word_count": 2},
+                        {"word_count": 7}, {"max_length": 1}, {"min_length": 2, "max_length": 3},
+                        {"min_length": 4}, {"min_length": 1, "max_length": 7}):
+            with self.subTest(**filters):
+                expected = apply_filters(StringRecord.objects.all(), filters).count()
+                self.assertEqual(exact_count(filters), expected)
+        self.assertEqual(exact_count({"min_length": 5, "max_length": 2}), 0)
+
+    def test_exact_count_defers_ranges_off_bucket_edges(self):
+        for filters in ({"min_length": 3}, {"max_length": 5}, {"is_palindrome": True, "word_count": 1}):
+            with self.subTest(**filters):
+                self.assertIsNone(exact_count(filters))
+
+    def test_apply_deltas(self):
+        apply_deltas(Counter({"test:x": 2, "test:y": 0}))
+        apply_deltas(Counter({"test:x": -1}))
+        counters = self.counters()
+        self.assertEqual(counters["test:x"], 1)
+        self.assertNotIn("test:y", counters)
+
+    def test_check_and_repair(self):
+        StringStatistic.objects.filter(key="total").update(count=99)
+        StringStatistic.objects.filter(key="palindromes").delete()
+        StringStatistic.objects.create(key="word_count:9", count=3)
+
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "3 counters differ"):
+            call_command("check_statistics", stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            "palindromes: stored 0, actual 2", "total: stored 99, actual 6", "word_count:9: stored 3, actual 0",
+        ])
+
+        out = io.StringIO()
+        call_command("check_statistics", "--repair", stdout=out)
+        self.assertIn("Repaired 3 counters", out.getvalue())
+        counters = self.counters()
+        self.assertEqual((counters["total"], counters["palindromes"]), (6, 2))
+        self.assertEqual(counters["word_count:9"], 0)  # zeroed in place, never deleted
+
+        out = io.StringIO()
+        call_command("check_statistics", stdout=out)
+        self.assertIn("counters consistent", out.getvalue())
+
+
+class AdminTests(AnalyzerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        self.post_json("/strings/bulk", ["racecar", "level", "hello world"])
+
+    def test_records_are_read_only(self):
+        self.assertEqual(self.client.get("/admin/analyzer/stringrecord/add/").status_code, 403)
+        response = self.client.post(f"/admin/analyzer/stringrecord/{sha256('racecar')}/change/", {"value": "edited"})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(StringRecord.objects.filter(value="racecar").exists())
+
+    @override_settings(ANALYZER_DETAIL_CACHE_BACKEND="local")
+    def test_deletes_go_through_services(self):
+        self.assertEqual(self.client.get("/strings/racecar").status_code, 200)  # now cached
+        self.client.post(f"/admin/analyzer/stringrecord/{sha256('level')}/delete/", {"post": "yes"})
+        self.client.post("/admin/analyzer/stringrecord/", {
+            "action": "delete_selected", "_selected_action": [sha256("racecar")], "post": "yes",
+        })
+
+        self.assertEqual(list(StringRecord.objects.values_list("value", flat=True)), ["hello world"])
+        self.assertEqual(self.client.get("/strings/racecar").status_code, 404)
+        self.assertEqual(self.client.get("/strings?page_size=10").json()["total"], 1)
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_about_the_target_error_rate(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        stored = [sha256(f"stored {i}") for i in range(5000)]
+        for sha in stored:
+            bloom.add(sha)
+        self.assertTrue(all(sha in bloom for sha in stored))
+        false_positives = sum(sha256(f"new {i}") in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertAlmostEqual(bloom.estimated_error_rate(), 0.01, delta=0.005)
+
+
+@override_settings(ANALYZER_BLOOM_CAPACITY=0)
+class KnownHashesWarmTests(TransactionTestCase):
+    # Not TestCase: warm() closes its thread's connections, here the test's own
+
+    def test_warm_up_loads_every_stored_id(self):
+        StringRecord.objects.bulk_create([record_for(f"stored {i}") for i in range(50)])
+        known = KnownHashes(capacity=1000, error_rate=0.01, warm_chunk_size=7)
+        self.assertTrue(known.maybe_exists(sha256("never stored")))  # not ready: every id is "maybe"
+
+        known.warm()
+        self.assertTrue(known.ready)
+        self.assertEqual(known.stats()["items"], 50)
+        self.assertTrue(all(known.maybe_exists(sha256(f"stored {i}")) for i in range(50)))
+        self.assertFalse(known.maybe_exists(sha256("never stored")))
+        self.assertEqual(known.stats()["skipped_lookups"], 1)
+
+
+class KnownHashesCreateTests(AnalyzerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.known = KnownHashes(capacity=1000, error_rate=0.01)
+        self.known.ready = True  # warmed on an empty table
+        patcher = mock.patch("analyzer.dedup._known_hashes", self.known)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings = self.settings(ANALYZER_BLOOM_CAPACITY=1000)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_new_ids_skip_the_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post_json("/strings", {"value": "fresh"}).status_code, 201)
+        self.assertFalse(any('"id" IN' in query["sql"] for query in queries))
+        self.assertEqual(self.known.stats()["skipped_lookups"], 1)
+        # inserted ids are remembered, so the duplicate is looked up and refused
+        self.assertEqual(self.post_json("/strings", {"value": "fresh"}).status_code, 409)
+        self.assertEqual(self.known.stats()["false_positives"], 0)
+
+    def test_rows_stored_by_other_workers_still_conflict(self):
+        # stored without passing through this process's filter, which still says "new"
+        StringRecord.objects.bulk_create([record_for("elsewhere")])
+        self.assertFalse(self.known.maybe_exists(sha256("elsewhere")))
+
+        response = self.post_json("/strings", {"value": "elsewhere"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(StringRecord.objects.filter(value="elsewhere").count(), 1)
+        bulk = self.post_json("/strings/bulk", ["elsewhere", "other"]).json()
+        self.assertEqual([item["status"] for item in bulk["results"]], ["conflict", "created"])
+
+
+class BatchTests(AnalyzerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post_json("/strings/bulk", ["racecar", "batch", "hello world"])
+
+    def batch(self, method, items):
+        response = self.client.generic(method, "/strings/batch", json.dumps(items), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_lookup(self):
+        body = self.batch("POST", [
+            "racecar", {"id": sha256("hello world")}, {"value": "missing"},
+            {"id": "ABC"}, 5, "y" * (MAX_VALUE_LENGTH + 1),
+        ])
+
+        results = body["results"]
+        self.assertEqual([item["status"] for item in results],
+                         ["found", "found", "not_found", "invalid", "invalid", "invalid"])
+        self.assertEqual(results[0]["data"]["value"], "racecar")
+        self.assertEqual(results[1]["data"]["value"], "hello world")
+        self.assertEqual(results[2]["id"], sha256("missing"))
+        self.assertEqual(body["summary"], {"found": 2, "not_found": 1, "invalid": 3})
+
+    @override_settings(ANALYZER_DETAIL_CACHE_BACKEND="local")
+    def test_delete_updates_counters_and_cache(self):
+        self.assertEqual(self.client.get("/strings/racecar").status_code, 200)  # now cached
+        body = self.batch("DELETE", ["racecar", {"id": sha256("hello world")}, "missing"])
+
+        self.assertEqual([item["status"] for item in body["results"]], ["deleted", "deleted", "not_found"])
+        self.assertEqual(self.client.get("/strings/racecar").status_code, 404)
+        self.assertEqual(self.client.get("/strings?page_size=10").json()["total"], 1)
+
+    def test_reaches_strings_shadowed_by_endpoint_paths(self):
+        # /strings/batch is the endpoint, not the stored string "batch"
+        self.assertEqual(self.client.get("/strings/batch").status_code, 405)
+        self.assertEqual(self.batch("POST", ["batch"])["summary"]["found"], 1)
+        self.assertEqual(self.batch("DELETE", ["batch"])["summary"]["deleted"], 1)
+
+    def test_rejects_bodies_that_are_not_lists_or_too_long(self):
+        self.assertEqual(self.post_json("/strings/batch", {"value": "racecar"}).status_code, 400)
+        with self.settings(ANALYZER_BULK_MAX_ITEMS=1):
+            self.assertEqual(self.post_json("/strings/batch", ["a", "b"]).status_code, 413)
+
+
+@override_settings(ANALYZER_METRICS_ENABLED=True, ANALYZER_METRICS_SAMPLE_RATE=1.0, ANALYZER_METRICS_TOKEN="")
+class MetricsTests(AnalyzerTestCase):
+    # The middleware reads its settings when the test client builds its handler, on the first request
+    def setUp(self):
+        super().setUp()
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def metrics(self, client=None):
+        response = (client or self.client).get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        return response.content.decode().splitlines()
+
+    def test_counts_requests_by_route_method_and_status(self):
+        self.post_json("/strings", {"value": "racecar"})
+        self.post_json("/strings", {"value": "racecar"})
+        self.client.get("/strings/racecar")
+        self.client.get("/no/such/route")
+
+        lines = self.metrics()
+        self.assertIn('analyzer_requests_total{route="strings",method="POST",status="201"} 1', lines)
+        self.assertIn('analyzer_requests_total{route="strings",method="POST",status="409"} 1', lines)
+        self.assertIn('analyzer_requests_total{route="strings/<str:string_value>",method="GET",status="200"} 1',
+                      lines)
+        self.assertIn('analyzer_requests_total{route="unmatched",method="GET",status="404"} 1', lines)
+        self.assertIn('analyzer_sampled_requests_total{route="strings",method="POST"} 2', lines)
+
+    def test_sampled_requests_fill_the_histograms(self):
+        self.post_json("/strings", {"value": "racecar"})
+        lines = self.metrics()
+
+        buckets = [line for line in lines
+                   if line.startswith('analyzer_request_duration_seconds_bucket{route="strings",method="POST",')]
+        self.assertEqual(len(buckets), 14)
+        self.assertTrue(buckets[0].startswith(
+            'analyzer_request_duration_seconds_bucket{route="strings",method="POST",le="0.0005"}'))
+        self.assertEqual(buckets[-1],
+                         'analyzer_request_duration_seconds_bucket{route="strings",method="POST",le="+Inf"} 1')
+        counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))  # cumulative
+        self.assertIn('analyzer_request_duration_seconds_count{route="strings",method="POST"} 1', lines)
+        for name in ("parse", "analyze", "dedup", "insert", "db"):
+            self.assertIn(f'analyzer_phase_duration_seconds_count{{route="strings",phase="{name}"}} 1', lines)
+        queries = next(line for line in lines if line.startswith('analyzer_db_queries_per_request_sum{route="strings"}'))
+        self.assertGreater(float(queries.rsplit(" ", 1)[1]), 0)
+
+    @override_settings(ANALYZER_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_only_counted(self):
+        self.post_json("/strings", {"value": "racecar"})
+        lines = self.metrics()
+        self.assertIn('analyzer_requests_total{route="strings",method="POST",status="201"} 1', lines)
+        self.assertFalse([line for line in lines if not line.startswith(("#", "analyzer_requests_total"))])
+
+    def test_phase_and_timed_record_only_inside_a_sample(self):
+        double = timed("double")(lambda value: value * 2)
+        with phase("outside"):
+            self.assertEqual(double(2), 4)
+
+        sample = Sample()
+        token = _current.set(sample)
+        try:
+            with phase("inside"):
+                self.assertEqual(double(3), 6)
+        finally:
+            _current.reset(token)
+        self.assertEqual(sorted(sample.phases), ["double", "inside"])
+
+    @override_settings(ROOT_URLCONF="analyzer.async_urls")
+    async def test_async_requests_are_sampled_through_the_context(self):
+        client = AsyncClient()
+        response = await client.post("/strings", {"value": "racecar"}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        lines = (await client.get("/metrics")).content.decode().splitlines()
+        self.assertIn('analyzer_requests_total{route="strings",method="POST",status="201"} 1', lines)
+        # queries run in sync_to_async threads still count against the request
+        queries = next(line for line in lines if line.startswith('analyzer_db_queries_per_request_sum{route="strings"}'))
+        self.assertGreater(float(queries.rsplit(" ", 1)[1]), 0)
+
+    @override_settings(ANALYZER_METRICS_TOKEN="s3cret")
+    def test_token_guards_the_endpoint(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"analyzer_requests_total", response.content)
+
+    @override_settings(ANALYZER_METRICS_ENABLED=False)
+    def test_disabled_metrics_are_not_served(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
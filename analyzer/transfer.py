@@ -0,0 +1,175 @@
+# analyzer/transfer.py
+"""
+Streaming readers, writers and progress reporting for the import_strings and
+export_strings commands. Inputs are read line by line and outputs written chunk by
+chunk, so memory use does not grow with the file.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from .models import MAX_VALUE_LENGTH
+
+FORMATS = ("ndjson", "csv", "text")
+INVALID = None  # yielded for lines that hold no usable string
+
+
+def detect_format(path: str, fmt: str = "auto") -> str:
+    if fmt != "auto":
+        return fmt
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension == ".csv":
+        return "csv"
+    return "text"
+
+
+def open_input(path: str):
+    """Binary stream for ``path``; "-" is stdin and a .gz suffix is decompressed."""
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def open_output(path: str, compress: bool, level: int = 6):
+    """Binary stream for ``path`` ("-" is stdout), gzip-compressed when ``compress``."""
+    raw = sys.stdout.buffer if path == "-" else open(path, "wb")
+    if compress:
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level), raw
+    return raw, raw
+
+
+class OffsetLines:
+    """Iterate the lines of a binary stream, tracking the byte offset after each one."""
+
+    def __init__(self, stream, offset=0):
+        self.stream = stream
+        self.offset = offset
+
+    def __iter__(self):
+        for line in self.stream:
+            self.offset += len(line)
+            yield line
+
+    def skip_to(self, offset):
+        """Move to ``offset``: seek where the stream allows it, otherwise read and discard."""
+        if offset <= self.offset:
+            return
+        try:
+            self.stream.seek(offset)
+        except (OSError, io.UnsupportedOperation):
+            remaining = offset - self.offset
+            while remaining:
+                chunk = self.stream.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        self.offset = offset
+
+
+def _usable(value: str):
+    # Longer values would be truncated by PostgreSQL's multi-row INSERT into corrupt rows
+    if not value.strip() or len(value) > MAX_VALUE_LENGTH:
+        return INVALID
+    return value
+
+
+def _text_value(line: str):
+    return _usable(line)
+
+
+def _ndjson_value(line: str):
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return INVALID
+    value = item.get("value") if isinstance(item, dict) else item
+    if not isinstance(value, str):
+        return INVALID
+    return _usable(value)
+
+
+def read_values(stream, fmt: str, start: int = 0, column: str = "value"):
+    """
+    Yield (value, offset) per input record, with INVALID for records holding no string
+    or one longer than MAX_VALUE_LENGTH, and ``offset`` the byte position just after the
+    record, so reading can resume there. Blank lines are skipped. For CSV, ``column`` is
+    a header name, or a zero-based index for files without a header row.
+    """
+    lines = OffsetLines(stream)
+    if fmt == "csv":
+        yield from _read_csv(lines, start, column)
+        return
+    parse = _ndjson_value if fmt == "ndjson" else _text_value
+    lines.skip_to(start)
+    for raw in lines:
+        try:
+            line = raw.decode("utf-8").rstrip("\r\n")
+        except UnicodeDecodeError:
+            yield INVALID, lines.offset
+            continue
+        if line.strip() or (fmt == "text" and line):
+            yield parse(line), lines.offset
+
+
+def _read_csv(lines, start, column):
+    decoded = (raw.decode("utf-8", errors="replace") for raw in lines)
+    reader = csv.reader(decoded)
+    if column.isdigit():
+        index = int(column)
+    else:
+        header = next(reader, None) or []
+        if column not in header:
+            raise ValueError(f"CSV header has no {column!r} column: {header}")
+        index = header.index(column)
+    lines.skip_to(start)
+    for row in reader:
+        if not row:
+            continue
+        value = row[index] if index < len(row) else ""
+        yield _usable(value), lines.offset
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return handle.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, position):
+    # write-then-rename so an interrupted run never leaves a half-written checkpoint
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(f"{position}\n")
+    os.replace(temporary, path)
+
+
+class Progress:
+    """Throttled progress lines with the overall rate, written through ``write``."""
+
+    def __init__(self, write, every=5.0, unit="rows"):
+        self.write = write
+        self.every = every
+        self.unit = unit
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def rate(self, count) -> float:
+        elapsed = time.perf_counter() - self.started
+        return count / elapsed if elapsed else 0.0
+
+    def update(self, count, detail="", force=False):
+        now = time.perf_counter()
+        if not force and now - self._last < self.every:
+            return
+        self._last = now
+        self.write(f"{count} {self.unit}, {self.rate(count):.0f} {self.unit}/s, {now - self.started:.1f}s{detail}")
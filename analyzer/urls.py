@@ -1,17 +1,43 @@
 from django.urls import path
+from .metrics import metrics_view
 from .views import (
     StringListCreateView,
+    StringBulkCreateView,
     StringDetailView,
+    StringBatchView,
+    DetailCacheStatsView,
+    DedupStatsView,
     NaturalLanguageFilterView,
+    StringSimilarView,
 )
 
 urlpatterns = [
     # GET / POST /strings
     path("strings", StringListCreateView.as_view(), name="strings_list_create"),
 
+    # POST /strings/bulk
+    path("strings/bulk", StringBulkCreateView.as_view(), name="strings_bulk_create"),
+
+    # POST (lookup) / DELETE /strings/batch
+    path("strings/batch", StringBatchView.as_view(), name="strings_batch"),
+
     # GET /strings/filter-by-natural-language
     path("strings/filter-by-natural-language", NaturalLanguageFilterView.as_view(), name="strings_filter_by_natural_language"),
 
-    # GET / DELETE /strings/{string_value}
+    # GET /strings/similar?value=...
+    path("strings/similar", StringSimilarView.as_view(), name="strings_similar"),
+
+    # GET /strings/cache/stats
+    path("strings/cache/stats", DetailCacheStatsView.as_view(), name="strings_cache_stats"),
+
+    # GET /strings/dedup/stats
+    path("strings/dedup/stats", DedupStatsView.as_view(), name="strings_dedup_stats"),
+
+    # GET /metrics (Prometheus text format)
+    path("metrics", metrics_view, name="metrics"),
+
+    # GET / DELETE /strings/{string_value}. Last, so the literal paths above take precedence:
+    # the stored strings "bulk", "batch", "similar" and "filter-by-natural-language" are
+    # reached through /strings/batch instead
     path("strings/<str:string_value>", StringDetailView.as_view(), name="strings_detail"),
 ]
@@ -1,21 +1,144 @@
 # analyzer/utils.py
-from collections import Counter
+from collections import Counter, OrderedDict
 import hashlib
+import threading
 
-def analyze_string(value: str) -> dict:
-    if value is None:
-        raise ValueError("value required")
-    length = len(value)
-    is_pal = value.lower() == value.lower()[::-1]
-    unique_chars = len(set(value))
-    word_count = len(value.split())
-    sha = hashlib.sha256(value.encode()).hexdigest()
+
+def _analyze(value: str, encoded: bytes) -> dict:
+    # One lower() and one Counter pass; unique_characters comes from the counter
+    # instead of a separate set(), and the hash reads the already-encoded bytes.
+    lowered = value.lower()
     freq_map = dict(Counter(value))
     return {
-        "length": length,
-        "is_palindrome": is_pal,
-        "unique_characters": unique_chars,
-        "word_count": word_count,
-        "sha256_hash": sha,
+        "length": len(value),
+        "is_palindrome": lowered == lowered[::-1],
+        "unique_characters": len(freq_map),
+        "word_count": len(value.split()),
+        "sha256_hash": hashlib.sha256(encoded).hexdigest(),
         "character_frequency_map": freq_map,
     }
+
+
+class PrefixCache:
+    """
+    Bounded LRU of partial analysis state, taken every ``stride`` characters of the
+    strings analyzed through it and keyed by that prefix. A later string starting
+    with a cached prefix resumes from its counts, hash state and word count and only
+    scans the rest. Results are identical to _analyze(); the palindrome check still
+    reads the whole string.
+    """
+
+    def __init__(self, max_entries=4096, stride=64):
+        self.max_entries = max_entries
+        self.stride = stride
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # prefix -> (counts, sha256 state, word count, prefix ends inside a word)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _longest_prefix(self, value):
+        start = len(value) - len(value) % self.stride
+        with self._lock:
+            while start:
+                prefix = value[:start]
+                state = self._entries.get(prefix)
+                if state is not None:
+                    self._entries.move_to_end(prefix)
+                    self.hits += 1
+                    return start, state
+                start -= self.stride
+            self.misses += 1
+        return 0, None
+
+    def _store(self, prefix, state):
+        with self._lock:
+            if prefix in self._entries:
+                return
+            self._entries[prefix] = state
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def analyze(self, value: str) -> dict:
+        if len(value) < 2 * self.stride:
+            # at most one checkpoint: resuming from it cannot pay for the bookkeeping
+            return _analyze(value, value.encode())
+        pos, state = self._longest_prefix(value)
+        if state is None:
+            counts, hasher, words, in_word = Counter(), hashlib.sha256(), 0, False
+        else:
+            cached_counts, cached_hasher, words, in_word = state
+            counts, hasher = Counter(cached_counts), cached_hasher.copy()
+
+        # Counter keeps first-insertion order, so the map's key order matches _analyze()
+        while pos < len(value):
+            end = min(pos + self.stride - pos % self.stride, len(value))
+            segment = value[pos:end]
+            counts.update(segment)
+            hasher.update(segment.encode())
+            segment_words = len(segment.split())
+            if in_word and not segment[0].isspace():
+                segment_words -= 1  # the first word continues the previous segment's last one
+            words += segment_words
+            in_word = not segment[-1].isspace()
+            pos = end
+            if end % self.stride == 0:
+                self._store(value[:end], (dict(counts), hasher.copy(), words, in_word))
+
+        lowered = value.lower()
+        freq_map = dict(counts)
+        return {
+            "length": len(value),
+            "is_palindrome": lowered == lowered[::-1],
+            "unique_characters": len(freq_map),
+            "word_count": words,
+            "sha256_hash": hasher.hexdigest(),
+            "character_frequency_map": freq_map,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "stride": self.stride,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def analyze_string(value: str) -> dict:
+    if value is None:
+        raise ValueError("value required")
+    return _analyze(value, value.encode())
+
+
+def analyze_batch(values, prefix_cache=None) -> list:
+    """
+    Analyze many strings at once; returns one properties dict per value, in order.
+    With a PrefixCache, strings sharing a recently seen prefix resume from it.
+    """
+    values = list(values)
+    if any(value is None for value in values):
+        raise ValueError("value required")
+    if prefix_cache is None:
+        prefix_cache = _worker_prefix_cache
+    if prefix_cache is not None:
+        return [prefix_cache.analyze(value) for value in values]
+    encoded = [value.encode() for value in values]
+    return [_analyze(value, raw) for value, raw in zip(values, encoded)]
+
+
+# Set in process-pool workers by init_worker_prefix_cache(); each worker keeps its own
+_worker_prefix_cache = None
+
+
+def init_worker_prefix_cache(max_entries, stride):
+    global _worker_prefix_cache
+    _worker_prefix_cache = PrefixCache(max_entries, stride)
@@ -1,17 +1,94 @@
 # analyzer/views.py
+import hashlib
+import json
 import re
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListCreateAPIView
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
-from .models import StringRecord
-from .serializers import StringRecordSerializer
-from .utils import analyze_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from .cache import current_generation, get_detail_cache, get_nl_result_cache
+from .dedup import get_known_hashes
+from .executor import ExecutorBusy, get_executor
+from .filters import QueryError, apply_filters, apply_plan, parse_list_filters, parse_similar_params
+from .ingest import BUSY, create_value, json_response as plain_json_response, value_from
+from .metrics import phase
+from .models import MAX_VALUE_LENGTH, VALUE_TOO_LONG, StringRecord
+from .nlquery import compile_query, describe_plan, normalize_query
+from .pagination import KEYSET_ORDERING, paginate, parse_page_size
+from .parsers import INVALID_LINE, NDJSONParser
+from .renderers import NDJSON_CONTENT_TYPE, NDJSONRenderer, dumps, stream_ndjson
+from .serializers import StringRecordSerializer, row_values, serialize_rows
+from .services import build_record, chunked, delete_records, known_ids, store_records
+from .similarity import find_similar
+from .statistics import count_matching
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
+# Primary keys are lowercase hex sha256 digests, as hashlib.hexdigest() returns them
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def json_response(request, data, status_code=status.HTTP_200_OK):
+    # Plain JSON clients get pre-encoded bytes; other renderers (browsable API) a Response
+    if request.accepted_renderer.format == "json":
+        return plain_json_response(data, status_code, dumps=dumps)
+    return Response(data, status=status_code)
+
+
+def outcome_response(outcome):
+    return Response(outcome.data, status=outcome.status, headers=outcome.headers)
+
+
+def parse_items(items, parse_item):
+    """
+    Validate the body of a bulk request (/strings/bulk, /strings/batch). Returns the error
+    Response for a body that is not a list or has too many items; otherwise per-item
+    results (index, plus status and error for invalid items) and {index: parsed} for the
+    rest, where ``parse_item(item)`` returns (parsed, None) or (None, error).
+    """
+    if not isinstance(items, list):
+        return Response(
+            {"error": "Request body must be a JSON array or an NDJSON stream"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    max_items = settings.ANALYZER_BULK_MAX_ITEMS
+    if len(items) > max_items:
+        return Response(
+            {"error": f"At most {max_items} items are accepted per request"},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    results = []
+    parsed = {}
+    for index, item in enumerate(items):
+        result = {"index": index}
+        results.append(result)
+        value, error = parse_item(item)
+        if error is not None:
+            result.update(status="invalid", error=error)
+        else:
+            parsed[index] = value
+    return results, parsed
+
+
+def item_value(item, missing="Invalid item or missing 'value' field"):
+    """(value, None) for a string or {"value": ...} item that can be stored, else (None, error)."""
+    value = item.get("value") if isinstance(item, dict) else item
+    if item is INVALID_LINE or value is None or (isinstance(value, str) and value.strip() == ""):
+        return None, missing
+    if not isinstance(value, str):
+        return None, "Invalid data type for 'value' (must be string)"
+    if len(value) > MAX_VALUE_LENGTH:
+        return None, VALUE_TOO_LONG
+    return value, None
+
 
 class StringListCreateView(ListCreateAPIView):
     """
@@ -20,6 +97,7 @@ class StringListCreateView(ListCreateAPIView):
     """
     serializer_class = StringRecordSerializer
     queryset = StringRecord.objects.all()
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
     applied_filters = {}
 
     @swagger_auto_schema(
@@ -29,60 +107,57 @@ class StringListCreateView(ListCreateAPIView):
     )
     def get_queryset(self):
         qs = super().get_queryset()
-        params = self.request.query_params
-        self.applied_filters = {}
-
-        try:
-            if "is_palindrome" in params:
-                v = params.get("is_palindrome").lower()
-                if v not in ("true", "false"):
-                    raise ValidationError("is_palindrome must be 'true' or 'false'")
-                qs = qs.filter(is_palindrome=(v == "true"))
-                self.applied_filters["is_palindrome"] = (v == "true")
-
-            if "min_length" in params:
-                min_len = int(params.get("min_length"))
-                qs = qs.filter(length__gte=min_len)
-                self.applied_filters["min_length"] = min_len
-
-            if "max_length" in params:
-                max_len = int(params.get("max_length"))
-                qs = qs.filter(length__lte=max_len)
-                self.applied_filters["max_length"] = max_len
-
-            if "word_count" in params:
-                wc = int(params.get("word_count"))
-                qs = qs.filter(word_count=wc)
-                self.applied_filters["word_count"] = wc
-
-            if "contains_character" in params:
-                char = params.get("contains_character")
-                if len(char) != 1:
-                    raise ValidationError("contains_character must be a single character")
-                qs = qs.filter(value__icontains=char)
-                self.applied_filters["contains_character"] = char
-
-            return qs
-        except ValueError:
-            raise ValidationError("Invalid query parameter values or types")
+        self.applied_filters = parse_list_filters(self.request.query_params)
+        return apply_filters(qs, self.applied_filters)
 
     # ✅ Override list to include filters_applied
     @swagger_auto_schema(
         operation_summary="Retrieve all analyzed strings",
-        operation_description="Returns a list of all analyzed strings stored in the system.",
+        operation_description=(
+            "Returns a list of all analyzed strings stored in the system. Pass `page_size` "
+            "and/or `cursor` for keyset pagination, or request `application/x-ndjson` "
+            "(or `?format=ndjson`) to stream every matching row, one JSON object per line."
+        ),
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Opaque cursor returned as next_cursor by the previous page"),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Rows per page (enables pagination)"),
+        ],
         responses={200: StringRecordSerializer(many=True)},
         operation_id="strings_list"
     )
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "data": serializer.data,
-            "count": queryset.count(),
+        # Rows are read with values_list and serialized by serialize_rows(), which
+        # produces the same output as StringRecordSerializer without its field machinery
+        rows = row_values(self.get_queryset())
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            lines = stream_ndjson(rows.order_by(*KEYSET_ORDERING), settings.ANALYZER_STREAM_CHUNK_SIZE)
+            return StreamingHttpResponse(lines, content_type=NDJSON_CONTENT_TYPE)
+
+        params = request.query_params
+        if "cursor" in params or "page_size" in params:
+            page, next_cursor = paginate(
+                rows, params.get("cursor"), parse_page_size(params.get("page_size"))
+            )
+            data = serialize_rows(page)
+            return json_response(request, {
+                "data": data,
+                "count": len(data),
+                "total": count_matching(rows, self.applied_filters),
+                "next_cursor": next_cursor,
+                "filters_applied": self.applied_filters
+            })
+
+        # count comes from the rows already fetched instead of a second COUNT(*) scan
+        data = serialize_rows(rows)
+        return json_response(request, {
+            "data": data,
+            "count": len(data),
             "filters_applied": self.applied_filters
         })
 
-    # Keep your existing create() method as-is
     @swagger_auto_schema(
         operation_summary="Create and analyze a new string",
         operation_description=(
@@ -106,75 +181,255 @@ class StringListCreateView(ListCreateAPIView):
             400: "Invalid request body",
             409: "Duplicate string",
             422: "Invalid data type",
+            503: "Analysis queue is full",
         },
         operation_id="strings_create"
        
     )
     def create(self, request, *args, **kwargs):
-        value = request.data.get("value", None)
+        # Validation, the duplicate check and the response body live in analyzer/ingest.py,
+        # shared with the async and ingest-only views
+        with phase("parse"):
+            value = value_from(request.data)
+        return outcome_response(create_value(value))
 
-        if value is None or (isinstance(value, str) and value.strip() == ""):
-            return Response(
-                {"error": "Invalid request body or missing 'value' field"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
-        if not isinstance(value, str):
-            return Response(
-                {"error": "Invalid data type for 'value' (must be string)"},
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY
-            )
+class StringBulkCreateView(APIView):
+    """
+    POST /strings/bulk → Analyze and store many strings in one request.
+    Accepts a JSON array or an NDJSON stream of strings or {"value": ...} objects.
+    """
+    parser_classes = [JSONParser, NDJSONParser]
 
-        props = analyze_string(value)
-        sha = props["sha256_hash"]
+    @swagger_auto_schema(
+        operation_summary="Create and analyze strings in bulk",
+        operation_description=(
+            "Accepts a JSON array (or an application/x-ndjson body) of strings or "
+            "{\"value\": ...} objects. New strings are analyzed and inserted in chunks "
+            "inside one transaction; each item is reported as created, conflict or invalid."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_STRING, example="hello"),
+        ),
+        responses={
+            200: openapi.Response(description="Per-item ingestion report"),
+            400: "Invalid request body",
+            413: "Too many items in one request",
+            503: "Analysis queue is full",
+        },
+        operation_id="strings_bulk_create"
+    )
+    def post(self, request):
+        parsed = parse_items(request.data, item_value)
+        if isinstance(parsed, Response):
+            return parsed
+        results, values = parsed
+        valid = [(results[index], value) for index, value in values.items()]
 
-        if StringRecord.objects.filter(id=sha).exists() or StringRecord.objects.filter(value=value).exists():
-            return Response(
-                {"error": "String already exists in the system"},
-                status=status.HTTP_409_CONFLICT
-            )
+        pending = {}  # sha -> (result, record) for strings not yet seen in this batch
+        try:
+            analyzed = get_executor().analyze([value for _, value in valid])
+        except ExecutorBusy:
+            return outcome_response(BUSY)
+        for (result, value), props in zip(valid, analyzed):
+            sha = props["sha256_hash"]
+            result["id"] = sha
+            if sha in pending:
+                result["status"] = "conflict"
+                continue
+            pending[sha] = (result, build_record(value, props))
 
-        record = StringRecord.objects.create(
-            id=sha,
-            value=value,
-            length=props["length"],
-            is_palindrome=props["is_palindrome"],
-            unique_characters=props["unique_characters"],
-            word_count=props["word_count"],
-            sha256_hash=props["sha256_hash"],
-            character_frequency_map=props["character_frequency_map"],
-        )
+        stored = known_ids(pending.keys())
+        new_records = []
+        for sha, (result, record) in pending.items():
+            if sha in stored:
+                result["status"] = "conflict"
+            else:
+                result["status"] = "created"
+                new_records.append(record)
+
+        if new_records:
+            inserted = {record.id for record in store_records(new_records)}
+            for record in new_records:
+                if record.id not in inserted:  # stored by a concurrent request meanwhile
+                    pending[record.id][0]["status"] = "conflict"
 
-        data = {
-            "id": record.id,
-            "value": record.value,
-            "properties": props,
-            "created_at": record.created_at.isoformat().replace("+00:00", "Z"),
-        }
-        return Response(data, status=status.HTTP_201_CREATED)
+        summary = {"created": 0, "conflict": 0, "invalid": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        return Response({"results": results, "summary": summary}, status=status.HTTP_200_OK)
 
 
 class StringDetailView(APIView):
+    # Records are keyed by sha256(value), so lookups go through the primary key
+    # and the read-through cache holds the rendered JSON body under the same key.
+
     def get(self, request, string_value):
-        record = StringRecord.objects.filter(value=string_value).first()
-        if not record:
+        sha = hashlib.sha256(string_value.encode()).hexdigest()
+        body = get_detail_cache().get_or_load(sha, lambda: self.render_record(sha, len(string_value)))
+        if body is None:
             return Response(
                 {"error": "String does not exist in the system"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = StringRecordSerializer(record)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if request.accepted_renderer.format != "json":
+            return Response(json.loads(body), status=status.HTTP_200_OK)
+        return HttpResponse(body, content_type="application/json", status=status.HTTP_200_OK)
 
     def delete(self, request, string_value):
-        record = StringRecord.objects.filter(value=string_value).first()
-        if not record:
+        sha = hashlib.sha256(string_value.encode()).hexdigest()
+        if not delete_records([sha]):
             return Response(
                 {"error": "String does not exist in the system"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        record.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @staticmethod
+    def render_record(sha, length):
+        # length is implied by the id; it lets a length-partitioned table read one partition
+        record = StringRecord.objects.filter(id=sha, length=length).first()
+        if record is None:
+            return None
+        return JSONRenderer().render(StringRecordSerializer(record).data)
+
+
+class StringBatchView(APIView):
+    """
+    POST /strings/batch → look up many strings at once.
+    DELETE /strings/batch → delete many strings at once.
+    Items are strings, {"value": ...} or {"id": sha256} objects, in a JSON array or NDJSON stream.
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+
+    batch_schema = openapi.Schema(
+        type=openapi.TYPE_ARRAY,
+        items=openapi.Schema(type=openapi.TYPE_STRING, example="hello"),
+    )
+
+    @swagger_auto_schema(
+        operation_summary="Look up strings in bulk",
+        operation_description=(
+            "Accepts a JSON array (or an application/x-ndjson body) of strings, {\"value\": ...} "
+            "or {\"id\": sha256} objects. Values are hashed on the server and all ids are "
+            "resolved with chunked primary-key queries; each item is reported as found "
+            "(with its record), not_found or invalid."
+        ),
+        request_body=batch_schema,
+        responses={
+            200: openapi.Response(description="Per-item lookup report"),
+            400: "Invalid request body",
+            413: "Too many items in one request",
+        },
+        operation_id="strings_batch_lookup"
+    )
+    def post(self, request):
+        parsed = parse_items(request.data, self.item_id)
+        if isinstance(parsed, Response):
+            return parsed
+        results, ids = parsed
+
+        records = {}
+        for chunk in chunked(list(set(ids.values()))):
+            rows = row_values(StringRecord.objects.filter(id__in=chunk))
+            records.update((item["id"], item) for item in serialize_rows(rows))
+        for index, sha in ids.items():
+            record = records.get(sha)
+            results[index]["id"] = sha
+            results[index].update({"status": "found", "data": record} if record else {"status": "not_found"})
+        return json_response(request, self.report(results, ("found", "not_found", "invalid")))
+
+    @swagger_auto_schema(
+        operation_summary="Delete strings in bulk",
+        operation_description=(
+            "Same items as the batch lookup. Records are deleted in chunked transactions; "
+            "each item is reported as deleted, not_found or invalid."
+        ),
+        request_body=batch_schema,
+        responses={
+            200: openapi.Response(description="Per-item deletion report"),
+            400: "Invalid request body",
+            413: "Too many items in one request",
+        },
+        operation_id="strings_batch_delete"
+    )
+    def delete(self, request):
+        parsed = parse_items(request.data, self.item_id)
+        if isinstance(parsed, Response):
+            return parsed
+        results, ids = parsed
+
+        deleted = delete_records(set(ids.values()))
+        for index, sha in ids.items():
+            results[index].update(id=sha, status="deleted" if sha in deleted else "not_found")
+        return json_response(request, self.report(results, ("deleted", "not_found", "invalid")))
+
+    @staticmethod
+    def item_id(item):
+        """(sha256, None) for a valid value or {"id": ...} item, else (None, error)."""
+        if isinstance(item, dict) and "id" in item:
+            sha = item["id"]
+            if not isinstance(sha, str) or not SHA256_PATTERN.fullmatch(sha):
+                return None, "'id' must be a lowercase hex SHA-256"
+            return sha, None
+        value, error = item_value(item, missing="Invalid item or missing 'value' or 'id' field")
+        if error is not None:
+            return None, error
+        return hashlib.sha256(value.encode()).hexdigest(), None
+
+    @staticmethod
+    def report(results, statuses) -> dict:
+        summary = dict.fromkeys(statuses, 0)
+        for result in results:
+            summary[result["status"]] += 1
+        return {"results": results, "summary": summary}
+
+
+class DetailCacheStatsView(APIView):
+    """GET /strings/cache/stats → hit/miss/eviction counters of this worker's detail cache."""
+
+    def get(self, request):
+        return Response(get_detail_cache().stats(), status=status.HTTP_200_OK)
+
+
+class DedupStatsView(APIView):
+    """GET /strings/dedup/stats → size, false-positive rate and memory of this worker's Bloom filter."""
+
+    def get(self, request):
+        known = get_known_hashes()
+        return Response(known.stats() if known else {"enabled": False}, status=status.HTTP_200_OK)
+
+
+class StringSimilarView(APIView):
+
+    @swagger_auto_schema(
+        operation_summary="Find anagrams and near-anagrams of a string",
+        operation_description=(
+            "Compares case-folded letter counts, ignoring whitespace. distance is the number "
+            "of letters to add or remove to turn a stored string into an anagram of `value`; "
+            "0 means an exact anagram. Results are ordered by distance."
+        ),
+        manual_parameters=[
+            openapi.Parameter('value', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="String to compare against"),
+            openapi.Parameter('max_distance', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Largest distance returned (default 2)"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Most results returned (default 20)"),
+        ],
+        responses={200: openapi.Response(description="Matching string records with their distance"),
+                   400: "Missing value or invalid parameters"},
+        operation_id="strings_similar"
+    )
+    def get(self, request):
+        query = parse_similar_params(request.query_params)
+        matches = find_similar(query["value"], query["max_distance"], query["limit"])
+        data = serialize_rows(row for _, row in matches)
+        for item, (match_distance, _) in zip(data, matches):
+            item["distance"] = match_distance
+        return json_response(request, {"data": data, "count": len(data), "query": query})
+
 
 class NaturalLanguageFilterView(APIView):
 
@@ -183,7 +438,10 @@ class NaturalLanguageFilterView(APIView):
         manual_parameters=[
             openapi.Parameter(
                 'query', openapi.IN_QUERY,
-                description="Natural language filter, e.g. 'palindromic, longer than 5, letter a'",
+                description=(
+                    "Natural language filter, e.g. 'palindromic, longer than 5, letter a' or "
+                    "'2 to 4 words without the letter z or strings shorter than 3'"
+                ),
                 type=openapi.TYPE_STRING,
                 required=True
             )
@@ -197,51 +455,32 @@ class NaturalLanguageFilterView(APIView):
             return Response({"error": "Query is required"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        parsed = {}
-        ql = query.lower()
-
-        if "palindromic" in ql:
-            parsed["is_palindrome"] = True
-        if "single word" in ql or "one word" in ql:
-            parsed["word_count"] = 1
-        if m := re.search(r"longer than (\d+)", ql):
-            parsed["min_length"] = int(m.group(1)) + 1
-        if m := re.search(r"shorter than (\d+)", ql):
-            parsed["max_length"] = int(m.group(1)) - 1
-        if m := re.search(r"letter ([a-z])", ql):
-            parsed["contains_character"] = m.group(1)
-
-        if not parsed:
-            return Response(
-                {"error": "Unable to parse natural language query"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        try:
+            with phase("parse"):
+                plan = compile_query(normalize_query(query))
+        except QueryError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Conflicting filters check
-        if parsed.get("min_length") and parsed.get("max_length") and parsed["min_length"] > parsed["max_length"]:
+        # An empty plan has no satisfiable branch; it is rejected without a query
+        if not plan:
             return Response(
                 {"error": "Query parsed but resulted in conflicting filters"},
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
 
-        qs = StringRecord.objects.all()
-        if parsed.get("is_palindrome"):
-            qs = qs.filter(is_palindrome=True)
-        if parsed.get("word_count"):
-            qs = qs.filter(word_count=parsed["word_count"])
-        if parsed.get("min_length"):
-            qs = qs.filter(length__gte=parsed["min_length"])
-        if parsed.get("max_length"):
-            qs = qs.filter(length__lte=parsed["max_length"])
-        if parsed.get("contains_character"):
-            qs = qs.filter(value__icontains=parsed["contains_character"])
-
-        serializer = StringRecordSerializer(qs, many=True)
-        return Response({
-            "data": serializer.data,
-            "count": qs.count(),
+        # The generation is read before querying, so a concurrent write can only
+        # leave a result under a generation that is already superseded.
+        key = f"{current_generation()}:{plan!r}"
+        data = get_nl_result_cache().get_or_load(key, lambda: self.run_query(plan))
+        return json_response(request, {
+            "data": data,
+            "count": len(data),
             "interpreted_query": {
                 "original": query,
-                "parsed_filters": parsed
+                "parsed_filters": describe_plan(plan)
             }
-        }, status=status.HTTP_200_OK)
+        })
+
+    @staticmethod
+    def run_query(plan):
+        return serialize_rows(row_values(apply_plan(StringRecord.objects.all(), plan)))
@@ -0,0 +1,444 @@
+# analyzer/writer.py
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from pathlib import Path
+from django.conf import settings
+from django.db import IntegrityError, InterfaceError, OperationalError, connection
+from .models import MAX_VALUE_LENGTH, VALUE_TOO_LONG
+
+logger = logging.getLogger(__name__)
+
+# When a create is acknowledged: "commit" after its batch is committed (201), "journal"
+# once it is appended to this process's journal file (202), "queued" once it is queued
+# in memory (202; lost if the process dies before the next flush)
+ACK_MODES = ("commit", "journal", "queued")
+# Failures a later attempt can get past (a lost connection, a locked database). Any
+# other error would fail the same way every time, so it is not retried.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+class WriterBusy(Exception):
+    """
+    Raised instead of queueing when MAX_PENDING creates already wait for a flush, and
+    when a create waiting for its commit is not answered within the writer's timeout.
+    """
+
+
+class _Segment:
+    """One journal file, locked by the process appending to it."""
+
+    def __init__(self, directory):
+        self.path = directory / f"writer-{os.getpid()}-{uuid.uuid4().hex[:8]}.journal"
+        self.file = open(self.path, "ab")
+        fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.lines = 0
+        self.pending = 0  # lines not yet committed
+
+
+class Journal:
+    """
+    Append-only files of the creates acknowledged before their commit, one JSON line per
+    record. Appends go to the current file until it holds ``max_lines``, then to a new
+    one; a file is removed once every line in it has been committed (the current one is
+    emptied instead), so under steady load the journal stays bounded by the records that
+    are actually pending. Each process holds an exclusive lock on its files for their
+    lifetime, so a file whose lock can be taken was left behind by a process that died;
+    the next writer to start replays it and removes it.
+    """
+
+    def __init__(self, directory, fsync=True, max_lines=10000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.max_lines = max_lines
+        self._segment = _Segment(self.directory)
+        self._segments = [self._segment]
+        self.pending = 0  # lines not yet committed, in every file
+        self.syncs = 0
+        self._written = 0
+        self._synced = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    @property
+    def path(self):
+        """The file appends currently go to."""
+        return self._segment.path
+
+    def _rotate(self):
+        if self.fsync:  # the group commit below only syncs the current file
+            os.fsync(self._segment.file.fileno())
+        self._segment = _Segment(self.directory)
+        self._segments.append(self._segment)
+
+    def append(self, record):
+        """Write ``record``'s line and return the file it went to, for committed()."""
+        line = json.dumps({"value": record.value}, ensure_ascii=False).encode() + b"\n"
+        with self._lock:
+            if self._segment.lines >= self.max_lines:
+                self._rotate()
+            segment = self._segment
+            segment.file.write(line)
+            segment.file.flush()
+            segment.lines += 1
+            segment.pending += 1
+            self.pending += 1
+            self._written += 1
+            target = self._written
+        if self.fsync:
+            # Group commit for the journal: one fsync covers every line written before
+            # it, so threads arriving while another syncs usually find theirs done
+            with self._sync_lock:
+                if self._synced < target:
+                    with self._lock:
+                        written, file = self._written, self._segment.file
+                    os.fsync(file.fileno())
+                    self._synced = written
+                    self.syncs += 1
+        return segment
+
+    def committed(self, segments):
+        """Mark one line committed in each of ``segments`` (as returned by append())."""
+        with self._lock:
+            for segment in segments:
+                segment.pending -= 1
+                self.pending -= 1
+            for segment in set(segments):
+                if segment.pending:
+                    continue
+                if segment is self._segment:
+                    segment.file.truncate(0)  # appends still go to the end (O_APPEND)
+                    segment.lines = 0
+                else:
+                    segment.path.unlink(missing_ok=True)
+                    segment.file.close()
+                    self._segments.remove(segment)
+
+    def orphans(self):
+        """Yield (path, values) for each journal left by a process that is gone."""
+        for path in sorted(self.directory.glob("writer-*.journal")):
+            if any(path == segment.path for segment in self._segments):
+                continue
+            try:
+                file = open(path, "rb")
+            except FileNotFoundError:  # replayed and removed by another worker since the glob
+                continue
+            with file:
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its process is still running, or another worker replays it
+                if os.fstat(file.fileno()).st_nlink == 0:
+                    continue  # removed by the worker that held the lock before us
+                values = []
+                for line in file:
+                    try:
+                        values.append(json.loads(line)["value"])
+                    except ValueError:  # torn last line: its request was never acknowledged
+                        continue
+                yield path, values
+
+
+class BatchWriter:
+    """
+    One writer thread per process that commits the inserts of concurrent requests
+    together. Each request queues its record; the thread takes everything queued (up
+    to ``batch_size``, waiting ``max_wait`` seconds for more) and stores it in one
+    transaction, so SQLite sees one writer and one commit per batch instead of one
+    lock round per request.
+
+    With ``ack="commit"`` each request waits for its batch to commit; when the batch
+    fails, its records are retried one at a time so each request gets its own outcome,
+    not a neighbour's error. The other modes
+    are write-behind: the request returns once its record is journaled or queued, ids
+    still waiting for a flush answer as duplicates, and a flush that fails transiently
+    is retried instead of reported, since its requests have already been answered. A
+    record that can never be stored is dead-lettered: logged with its value and dropped.
+    """
+
+    def __init__(self, batch_size=64, max_wait=0.0, timeout=30.0, ack="commit", journal=None, max_pending=10000):
+        if ack not in ACK_MODES:
+            raise ValueError(f"ack must be one of {', '.join(ACK_MODES)}")
+        if (ack == "journal") != (journal is not None):
+            raise ValueError('a journal is used with, and only with, ack="journal"')
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.ack = ack
+        self.journal = journal
+        self.max_pending = max_pending
+        self.batches = 0
+        self.requests = 0
+        self.records = 0  # inserted; the rest of the requests were conflicts
+        self.largest_batch = 0
+        self.replayed = 0
+        self.retries = 0
+        self.dead_letters = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._pending = {}  # id -> journal file, of records acknowledged but not yet committed
+        self._pending_lock = threading.Lock()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="analyzer-writer", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    @property
+    def write_behind(self) -> bool:
+        return self.ack != "commit"
+
+    def insert(self, record):
+        """
+        Store ``record`` with the next batch and return it. Raises IntegrityError when a
+        record with the same id is already stored or sits earlier in the same batch.
+        In write-behind modes it returns once the record is accepted, raising
+        IntegrityError for ids still pending and WriterBusy when too many are; with
+        ``ack="commit"`` it raises WriterBusy when the batch is not committed within
+        ``timeout`` seconds. A value too long to store raises ValueError before anything
+        is accepted.
+        """
+        if len(record.value) > MAX_VALUE_LENGTH:
+            raise ValueError(VALUE_TOO_LONG)
+        self.start()
+        if self.write_behind:
+            with self._pending_lock:
+                if record.id in self._pending:
+                    raise IntegrityError(f"StringRecord {record.id} already exists")
+                if len(self._pending) >= self.max_pending:
+                    raise WriterBusy
+                self._pending[record.id] = None
+            if self.journal is not None:
+                try:
+                    segment = self.journal.append(record)
+                except BaseException:
+                    with self._pending_lock:
+                        del self._pending[record.id]
+                    raise
+                with self._pending_lock:
+                    self._pending[record.id] = segment
+            self._queue.put((record, None))
+            return record
+
+        future = Future()
+        self._queue.put((record, future))
+        try:
+            created = future.result(self.timeout)
+        except FutureTimeout:
+            # The batch may still commit; a retry then gets 409 instead of a second row
+            raise WriterBusy from None
+        if not created:
+            raise IntegrityError(f"StringRecord {record.id} already exists")
+        return record
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # Nothing may end this loop: with the thread gone, write-behind creates would
+        # still be acknowledged and never committed
+        if self.journal is not None:
+            try:
+                self.replay()
+            except Exception:
+                logger.exception("Replaying write-behind journals failed")
+        while True:
+            batch = self._take_batch()
+            try:
+                self._commit(batch)
+            except Exception as exc:
+                logger.exception("Committing a batch of %d creates failed", len(batch))
+                self._abandon(batch, exc)
+
+    def _abandon(self, batch, exc):
+        """Answer, or dead-letter, the records of a batch that _commit() gave up on."""
+        for record, future in batch:
+            if future is None:
+                self._dead_letter(record, exc)
+            elif not future.done():
+                future.set_exception(exc)
+        if self.write_behind:
+            with self._pending_lock:
+                for record, _ in batch:
+                    self._pending.pop(record.id, None)
+
+    def replay(self):
+        """Store the records of journals left behind by dead processes, then remove the files."""
+        from .services import build_record, store_new_records
+        from .utils import analyze_batch
+
+        for path, values in self.journal.orphans():
+            for start in range(0, len(values), self.batch_size):
+                chunk = values[start:start + self.batch_size]
+                records = [build_record(value, props) for value, props in zip(chunk, analyze_batch(chunk))]
+                storable = []
+                for record in records:
+                    if len(record.value) > MAX_VALUE_LENGTH:  # journaled before creates were length-checked
+                        self._dead_letter(record, ValueError(VALUE_TOO_LONG))
+                    else:
+                        storable.append(record)
+                inserted, failed = self._store_batch(store_new_records, storable)
+                self.replayed += len(inserted)
+                for record in storable:
+                    if record.id in failed:
+                        self._dead_letter(record, failed[record.id])
+            path.unlink(missing_ok=True)
+
+    def _store(self, store, records):
+        """``store(records)``, retried while it fails transiently in write-behind modes."""
+        delay = 0.1
+        while True:
+            try:
+                return store(records)
+            except Exception as exc:
+                connection.close()  # start the next attempt on a fresh connection
+                self.last_error = repr(exc)
+                if not self.write_behind or not isinstance(exc, TRANSIENT_ERRORS):
+                    raise
+                self.retries += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    def _store_batch(self, store, records):
+        """
+        ``store(records)`` in one transaction, returning (inserted ids, {id: exception}).
+        If that fails the records are stored one at a time, so a record that cannot be
+        stored fails on its own instead of taking the rest of its batch with it.
+        """
+        try:
+            return {record.id for record in self._store(store, records)}, {}
+        except Exception as exc:
+            if len(records) == 1:
+                return set(), {records[0].id: exc}
+        inserted, failed = set(), {}
+        for record in records:
+            try:
+                inserted.update(stored.id for stored in self._store(store, [record]))
+            except Exception as exc:
+                failed[record.id] = exc
+        return inserted, failed
+
+    def _dead_letter(self, record, exc):
+        self.dead_letters += 1
+        logger.error(
+            "Dropped write-behind create %s, which cannot be stored (%r); value: %s",
+            record.id, exc, json.dumps(record.value, ensure_ascii=False),
+        )
+
+    def _commit(self, batch):
+        from .services import store_records
+
+        first = {}  # id -> the first queued record with it; later ones are conflicts
+        for record, _ in batch:
+            first.setdefault(record.id, record)
+        inserted, failed = self._store_batch(store_records, list(first.values()))
+        self.batches += 1
+        self.requests += len(batch)
+        self.records += len(inserted)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        if self.write_behind:
+            for record_id, exc in failed.items():
+                self._dead_letter(first[record_id], exc)
+            with self._pending_lock:
+                segments = [self._pending.pop(record_id, None) for record_id in first]
+            if self.journal is not None:
+                self.journal.committed([segment for segment in segments if segment is not None])
+            return
+        for record, future in batch:
+            if record.id in failed:
+                future.set_exception(failed[record.id])
+            else:
+                future.set_result(record.id in inserted and first[record.id] is record)
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every accepted record is committed; False if ``timeout`` ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending or not self._queue.empty():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "ack": self.ack,
+            "pending": len(self._pending),
+            "replayed": self.replayed,
+            "retries": self.retries,
+            "dead_letters": self.dead_letters,
+            "last_error": self.last_error,
+            "journal_syncs": self.journal.syncs if self.journal is not None else None,
+            "batches": self.batches,
+            "requests": self.requests,
+            "records": self.records,
+            "mean_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize(),
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """
+    This process's BatchWriter, or None when ANALYZER_WRITE_BATCHING is off and creates
+    are acknowledged after their commit (a write-behind ANALYZER_WRITE_ACK turns it on).
+    """
+    global _writer
+    if not settings.ANALYZER_WRITE_BATCHING and settings.ANALYZER_WRITE_ACK == "commit":
+        return None
+    with _writer_lock:
+        if _writer is None:
+            ack = settings.ANALYZER_WRITE_ACK
+            journal = None
+            if ack == "journal":
+                journal = Journal(settings.ANALYZER_WRITE_JOURNAL_DIR, settings.ANALYZER_WRITE_JOURNAL_FSYNC,
+                                  settings.ANALYZER_WRITE_JOURNAL_MAX_LINES)
+            _writer = BatchWriter(
+                settings.ANALYZER_WRITE_BATCH_SIZE,
+                settings.ANALYZER_WRITE_BATCH_WAIT_MS / 1000,
+                settings.ANALYZER_WRITE_TIMEOUT,
+                ack=ack,
+                journal=journal,
+                max_pending=settings.ANALYZER_WRITE_MAX_PENDING,
+            )
+            if _writer.write_behind:
+                # Commit what was accepted before a normal exit (gunicorn restarts, deploys)
+                atexit.register(_writer.flush, settings.ANALYZER_WRITE_TIMEOUT)
+        return _writer
+
+
+def write_behind() -> bool:
+    """True when creates are acknowledged before their commit (ANALYZER_WRITE_ACK)."""
+    writer = get_writer()
+    return writer is not None and writer.write_behind
+
+
+def reset_writer():
+    """Forget the current writer; its thread keeps draining what was already queued."""
+    global _writer
+    with _writer_lock:
+        _writer = None
@@ -0,0 +1,37 @@
+# gunicorn.conf.py — read automatically by gunicorn from the working directory
+#
+# Every worker process opens its own database connections: one per thread with
+# DB_CONN_MAX_AGE, or a pool of DB_POOL_MAX_SIZE with DB_POOL=true. Keep
+# workers × connections per worker under the server's max_connections.
+import multiprocessing
+from decouple import config as _config  # "config" itself is a gunicorn setting name
+
+workers = _config("WEB_CONCURRENCY", default=1, cast=int)
+threads = _config("GUNICORN_THREADS", default=1, cast=int)
+timeout = _config("GUNICORN_TIMEOUT", default=30, cast=int)
+keepalive = _config("GUNICORN_KEEPALIVE", default=2, cast=int)
+
+# Load the app in each worker, so every process builds its own pool after the fork
+preload_app = False
+
+DB_MAX_CONNECTIONS = _config("DB_MAX_CONNECTIONS", default=100, cast=int)
+
+
+def connections_per_worker() -> int:
+    if _config("DB_POOL", default=False, cast=bool):
+        return _config("DB_POOL_MAX_SIZE", default=threads + 1, cast=int)
+    return threads + 1  # one per thread, plus background work such as the Bloom filter warm-up
+
+
+def when_ready(server):
+    if _config("DB_ENGINE", default="django.db.backends.sqlite3") == "django.db.backends.sqlite3":
+        return
+    needed = workers * connections_per_worker()
+    message = (
+        f"{workers} workers x {connections_per_worker()} connections = up to {needed} database connections "
+        f"(budget {DB_MAX_CONNECTIONS}, {multiprocessing.cpu_count()} CPUs)"
+    )
+    if needed > DB_MAX_CONNECTIONS:
+        server.log.warning(message + ": lower WEB_CONCURRENCY, GUNICORN_THREADS or DB_POOL_MAX_SIZE")
+    else:
+        server.log.info(message)
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 from decouple import config
 from dotenv import load_dotenv
 
@@ -16,9 +17,9 @@ env_file = BASE_DIR / ".env.environment" if os.path.exists(BASE_DIR / ".env.envi
 
 if os.path.exists(env_file):
     load_dotenv(env_file)
-    print(f"✅ Loaded environment file: {env_file.name}")
+    print(f"✅ Loaded environment file: {env_file.name}", file=sys.stderr)
 else:
-    print("⚠️ No .env file found — using Railway environment variables")
+    print("⚠️ No .env file found — using Railway environment variables", file=sys.stderr)
 
 # ----------------------------------------
 # CORE SETTINGS
@@ -44,7 +45,28 @@ if DB_ENGINE == "django.db.backends.sqlite3":
             "NAME": BASE_DIR / config("DB_NAME", default="db.sqlite3"),
         }
     }
+    if config("DB_SQLITE_TUNED", default=False, cast=bool):
+        # Production settings for SQLite: WAL lets reads run alongside the writer,
+        # synchronous=NORMAL syncs at checkpoints rather than every commit (safe under
+        # WAL, a power loss can drop the last commits), and IMMEDIATE transactions take
+        # the write lock up front, so a busy database is waited on for `timeout` seconds
+        # instead of failing mid-transaction with "database is locked".
+        DATABASES["default"]["OPTIONS"] = {
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                f"PRAGMA mmap_size={config('DB_SQLITE_MMAP_SIZE', default=268435456, cast=int)};"
+                f"PRAGMA cache_size=-{config('DB_SQLITE_CACHE_KIB', default=20000, cast=int)};"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": config("DB_SQLITE_TIMEOUT", default=20.0, cast=float),
+        }
 else:
+    # Connections are per process: a gunicorn worker needs at most one per thread
+    # (GUNICORN_THREADS, shared with gunicorn.conf.py), plus one for background work.
+    GUNICORN_THREADS = config("GUNICORN_THREADS", default=1, cast=int)
+    DB_POOL = config("DB_POOL", default=False, cast=bool)
     DATABASES = {
         "default": {
             "ENGINE": DB_ENGINE,
@@ -53,8 +75,38 @@ else:
             "PASSWORD": config("DB_PASSWORD"),
             "HOST": config("DB_HOST"),
             "PORT": config("DB_PORT", default="5432"),
+            # Reuse a connection across requests instead of reconnecting each time;
+            # the pool replaces this, and Django rejects both together
+            "CONN_MAX_AGE": 0 if DB_POOL else config("DB_CONN_MAX_AGE", default=60, cast=int),
+            # Ping a reused connection before handing it to a request, so one the server
+            # dropped is replaced instead of failing the request
+            "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+            "OPTIONS": {},
+        }
+    }
+    if DB_POOL:
+        # psycopg 3 connection pool (pip install "psycopg[pool]")
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": config("DB_POOL_MIN_SIZE", default=GUNICORN_THREADS, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=GUNICORN_THREADS + 1, cast=int),
+            "timeout": config("DB_POOL_TIMEOUT", default=10.0, cast=float),
+            "max_idle": config("DB_POOL_MAX_IDLE", default=600.0, cast=float),
+            "max_lifetime": config("DB_POOL_MAX_LIFETIME", default=3600.0, cast=float),
         }
+
+# --------------------------------------------------
+# CACHES
+# --------------------------------------------------
+# The default locmem cache is private to each process. With more than one worker, point
+# CACHE_BACKEND at a shared one (django.core.cache.backends.redis.RedisCache,
+# ...memcached.PyMemcacheCache or ...db.DatabaseCache) so the "django" analyzer caches
+# and the data generation counter are seen by every worker.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
     }
+}
 
 # --------------------------------------------------
 # APPLICATIONS
@@ -78,6 +130,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "analyzer.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -120,6 +173,89 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {},
 }
 
+# --------------------------------------------------
+# ANALYZER
+# --------------------------------------------------
+# Serve the async views (analyzer/async_urls.py); use with an ASGI worker
+ANALYZER_ASYNC_VIEWS = config("ANALYZER_ASYNC_VIEWS", default=False, cast=bool)
+# Write-only workers: serve just POST /strings (and /metrics) through the plain Django
+# view in analyzer/ingest.py, without loading rest_framework or drf_yasg
+ANALYZER_INGEST_ONLY = config("ANALYZER_INGEST_ONLY", default=False, cast=bool)
+if ANALYZER_INGEST_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ("rest_framework", "drf_yasg")]
+# Largest body accepted by POST /strings/bulk, and rows per id__in / INSERT chunk
+ANALYZER_BULK_MAX_ITEMS = config("ANALYZER_BULK_MAX_ITEMS", default=10000, cast=int)
+ANALYZER_BULK_CHUNK_SIZE = config("ANALYZER_BULK_CHUNK_SIZE", default=500, cast=int)
+# Keyset pagination and NDJSON streaming for GET /strings
+ANALYZER_PAGE_SIZE = config("ANALYZER_PAGE_SIZE", default=100, cast=int)
+ANALYZER_MAX_PAGE_SIZE = config("ANALYZER_MAX_PAGE_SIZE", default=1000, cast=int)
+ANALYZER_STREAM_CHUNK_SIZE = config("ANALYZER_STREAM_CHUNK_SIZE", default=2000, cast=int)
+# Where analyze_batch runs: "inline" (request worker), "thread" or "process" pool.
+# Batches under THRESHOLD total characters stay inline; at most MAX_PENDING chunks of
+# CHUNK_SIZE strings wait on the pool, after QUEUE_TIMEOUT seconds requests get a 503.
+ANALYZER_EXECUTOR_MODE = config("ANALYZER_EXECUTOR_MODE", default="inline")
+ANALYZER_EXECUTOR_WORKERS = config("ANALYZER_EXECUTOR_WORKERS", default=0, cast=int) or None
+ANALYZER_EXECUTOR_THRESHOLD = config("ANALYZER_EXECUTOR_THRESHOLD", default=200000, cast=int)
+ANALYZER_EXECUTOR_CHUNK_SIZE = config("ANALYZER_EXECUTOR_CHUNK_SIZE", default=500, cast=int)
+ANALYZER_EXECUTOR_MAX_PENDING = config("ANALYZER_EXECUTOR_MAX_PENDING", default=64, cast=int)
+ANALYZER_EXECUTOR_QUEUE_TIMEOUT = config("ANALYZER_EXECUTOR_QUEUE_TIMEOUT", default=5.0, cast=float)
+# Prefix-aware analysis for near-duplicate strings (templated messages, log lines):
+# analysis state is kept every STRIDE characters, up to ENTRIES prefixes; 0 = off.
+ANALYZER_PREFIX_CACHE_ENTRIES = config("ANALYZER_PREFIX_CACHE_ENTRIES", default=0, cast=int)
+ANALYZER_PREFIX_CACHE_STRIDE = config("ANALYZER_PREFIX_CACHE_STRIDE", default=64, cast=int)
+# Per-process Bloom filter of stored ids, sized for CAPACITY ids at ERROR_RATE false
+# positives; creates it rules out skip the duplicate lookup. 0 = no filter.
+ANALYZER_BLOOM_CAPACITY = config("ANALYZER_BLOOM_CAPACITY", default=1000000, cast=int)
+ANALYZER_BLOOM_ERROR_RATE = config("ANALYZER_BLOOM_ERROR_RATE", default=0.01, cast=float)
+# Single-writer queue: POST /strings inserts from this process's threads are committed
+# together by one writer thread, up to BATCH_SIZE per transaction, waiting up to
+# BATCH_WAIT_MS for more to arrive (0 = commit whatever is queued). Off by default.
+ANALYZER_WRITE_BATCHING = config("ANALYZER_WRITE_BATCHING", default=False, cast=bool)
+ANALYZER_WRITE_BATCH_SIZE = config("ANALYZER_WRITE_BATCH_SIZE", default=64, cast=int)
+ANALYZER_WRITE_BATCH_WAIT_MS = config("ANALYZER_WRITE_BATCH_WAIT_MS", default=0.0, cast=float)
+ANALYZER_WRITE_TIMEOUT = config("ANALYZER_WRITE_TIMEOUT", default=30.0, cast=float)
+# Write-behind: ACK "commit" answers 201 after the commit; "journal" answers 202 once the
+# record is appended (and fsynced, unless JOURNAL_FSYNC is off) to a file in JOURNAL_DIR
+# that a restarted worker replays; "queued" answers 202 from memory. At most MAX_PENDING
+# accepted creates wait for a flush before requests get a 503.
+ANALYZER_WRITE_ACK = config("ANALYZER_WRITE_ACK", default="commit")
+ANALYZER_WRITE_JOURNAL_DIR = config("ANALYZER_WRITE_JOURNAL_DIR", default=str(BASE_DIR / "journal"))
+ANALYZER_WRITE_JOURNAL_FSYNC = config("ANALYZER_WRITE_JOURNAL_FSYNC", default=True, cast=bool)
+# Lines per journal file before appends move to a new one; a file is removed once all of
+# its lines are committed, which bounds the journal (and a replay) under steady load
+ANALYZER_WRITE_JOURNAL_MAX_LINES = config("ANALYZER_WRITE_JOURNAL_MAX_LINES", default=10000, cast=int)
+ANALYZER_WRITE_MAX_PENDING = config("ANALYZER_WRITE_MAX_PENDING", default=10000, cast=int)
+# Read-through cache of GET /strings/<value> bodies: "none", "django" (the ALIAS of CACHES
+# above) or "local" (in-process LRU). A delete only clears the local cache of the worker
+# serving it, so "local" is only valid with a single worker; use "django" on a shared cache
+# otherwise. TTL is in seconds, 0 = no expiry.
+ANALYZER_DETAIL_CACHE_BACKEND = config("ANALYZER_DETAIL_CACHE_BACKEND", default="none")
+ANALYZER_DETAIL_CACHE_MAX_ENTRIES = config("ANALYZER_DETAIL_CACHE_MAX_ENTRIES", default=10000, cast=int)
+ANALYZER_DETAIL_CACHE_TTL = config("ANALYZER_DETAIL_CACHE_TTL", default=300, cast=int)
+ANALYZER_DETAIL_CACHE_ALIAS = config("ANALYZER_DETAIL_CACHE_ALIAS", default="default")
+# Results of GET /strings/filter-by-natural-language, keyed by parsed filters and the
+# data generation (a counter in the GENERATION alias of CACHES, bumped on every
+# insert/delete). Off by default: a bump in one worker only reaches the others when that
+# alias is a shared cache.
+ANALYZER_NL_CACHE_BACKEND = config("ANALYZER_NL_CACHE_BACKEND", default="none")
+ANALYZER_NL_CACHE_MAX_ENTRIES = config("ANALYZER_NL_CACHE_MAX_ENTRIES", default=256, cast=int)
+ANALYZER_NL_CACHE_TTL = config("ANALYZER_NL_CACHE_TTL", default=60, cast=int)
+ANALYZER_NL_CACHE_ALIAS = config("ANALYZER_NL_CACHE_ALIAS", default="default")
+ANALYZER_GENERATION_CACHE_ALIAS = config("ANALYZER_GENERATION_CACHE_ALIAS", default="default")
+# GET /strings/similar: largest max_distance (each step widens the sketch search, see
+# analyzer/similarity.py) and largest number of results per request
+ANALYZER_SIMILAR_MAX_DISTANCE = config("ANALYZER_SIMILAR_MAX_DISTANCE", default=4, cast=int)
+ANALYZER_SIMILAR_MAX_LIMIT = config("ANALYZER_SIMILAR_MAX_LIMIT", default=100, cast=int)
+# Most rows one search reads: short strings share sketches with much of the table
+ANALYZER_SIMILAR_MAX_CANDIDATES = config("ANALYZER_SIMILAR_MAX_CANDIDATES", default=20000, cast=int)
+# Request metrics served at /metrics (analyzer/metrics.py). Every request is counted;
+# SAMPLE_RATE is the share whose phase timings and query counts are recorded.
+ANALYZER_METRICS_ENABLED = config("ANALYZER_METRICS_ENABLED", default=True, cast=bool)
+ANALYZER_METRICS_SAMPLE_RATE = config("ANALYZER_METRICS_SAMPLE_RATE", default=0.1, cast=float)
+# /metrics is on the public URLconf: with a TOKEN it requires "Authorization: Bearer
+# <token>"; without one it is open and must be firewalled from the internet
+ANALYZER_METRICS_TOKEN = config("ANALYZER_METRICS_TOKEN", default="")
+
 # --------------------------------------------------
 # SWAGGER (drf_yasg)
 # --------------------------------------------------
@@ -184,6 +320,7 @@ LOGGING = {
     "loggers": {
         "django": {"handlers": ["console", "file"], "level": "WARNING"},
         "api": {"handlers": ["console", "file"], "level": "INFO"},
+        "analyzer": {"handlers": ["console", "file"], "level": "INFO"},
     },
 }
 
@@ -195,4 +332,5 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # --------------------------------------------------
 # ENVIRONMENT PRINT
 # --------------------------------------------------
-print(f"✅ Running in {ENVIRONMENT.upper()} mode | DEBUG={DEBUG}")
+# stderr, so commands that write data to stdout (export_strings -) stay clean
+print(f"✅ Running in {ENVIRONMENT.upper()} mode | DEBUG={DEBUG}", file=sys.stderr)
@@ -1,24 +1,44 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from django.http import JsonResponse
 
 def home(request):
     return JsonResponse({"message": "String Analyzer API is live!"})
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="String Analyzer API",
-        default_version='v1',
-        description="Analyze strings and view results",
-    ),
-    public=True,
-)
+_docs_view = None
+
+def docs(request, *args, **kwargs):
+    # drf_yasg and its schema generator are imported on the first /docs/ request
+    # instead of when each worker starts
+    global _docs_view
+    if _docs_view is None:
+        from drf_yasg.views import get_schema_view
+        from drf_yasg import openapi
+
+        schema_view = get_schema_view(
+            openapi.Info(
+                title="String Analyzer API",
+                default_version='v1',
+                description="Analyze strings and view results",
+            ),
+            public=True,
+        )
+        _docs_view = schema_view.with_ui('swagger', cache_timeout=0)
+    return _docs_view(request, *args, **kwargs)
+
+if settings.ANALYZER_INGEST_ONLY:
+    api_urls = 'analyzer.ingest_urls'
+elif settings.ANALYZER_ASYNC_VIEWS:
+    api_urls = 'analyzer.async_urls'
+else:
+    api_urls = 'analyzer.urls'
 
 urlpatterns = [
     path('', home),  # Root URL
     path('admin/', admin.site.urls),
-    path('', include('analyzer.urls')),
-    path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
+    path('', include(api_urls)),
 ]
+
+if not settings.ANALYZER_INGEST_ONLY:
+    urlpatterns.append(path('docs/', docs, name='swagger-ui'))